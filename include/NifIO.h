@@ -360,6 +360,7 @@ namespace nif {
 				havok_root_lvl_container = other.havok_root_lvl_container;
 				connection_points_parent = other.connection_points_parent;
 				physics_data = other.physics_data;
+				physics_binary_path = other.physics_binary_path;
 				transcript_path = other.transcript_path;
 			};
 
@@ -372,6 +373,7 @@ namespace nif {
 				havok_root_lvl_container = other.havok_root_lvl_container;
 				connection_points_parent = other.connection_points_parent;
 				physics_data = other.physics_data;
+				physics_binary_path = other.physics_binary_path;
 				transcript_path = other.transcript_path;
 				return *this;
 			};
@@ -399,6 +401,7 @@ namespace nif {
 			uint32_t bsx_flags = 65536;
 
 			nlohmann::json physics_data;
+			std::string physics_binary_path = ""; // Precomposed physics data, takes priority over physics_data
 			std::string transcript_path = "";
 
 			RTTI GetRTTI() const override {
@@ -469,6 +472,10 @@ namespace nif {
 					physics_data = data["physics_data"];
 				}
 
+				if (data.contains("physics_binary_path")) {
+					physics_binary_path = data["physics_binary_path"];
+				}
+
 				if (data.contains("transcript_path")) {
 					transcript_path = data["transcript_path"];
 				}
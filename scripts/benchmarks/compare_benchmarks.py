@@ -0,0 +1,89 @@
+import sys
+import json
+import argparse
+
+"""
+
+Compares two run_benchmarks.py result files, no Blender needed.
+Run as: python compare_benchmarks.py baseline.json candidate.json --threshold 0.1
+Stages are matched by name and requested size. Exits with 1 when a stage got slower,
+or its peak memory larger, by more than the threshold.
+"""
+
+def _index(result:dict) -> dict:
+	return {(name, run['vertices_requested']): (run['vertices'], stage) for run in result['runs'] for name, stage in run['stages'].items()}
+
+def _ratio(base, new):
+	if base is None or new is None or base <= 0:
+		return None
+	return new / base
+
+def _format_ratio(ratio):
+	return '-' if ratio is None else f'{ratio:.2f}x'
+
+def Compare(baseline:dict, candidate:dict, threshold:float) -> tuple[list[tuple], list[str]]:
+	base_index = _index(baseline)
+	new_index = _index(candidate)
+	rows = [('stage', 'vertices', 'base ms', 'new ms', 'time', 'base KiB', 'new KiB', 'memory')]
+	regressions = []
+	for key in sorted(base_index.keys() & new_index.keys()):
+		name, _ = key
+		vertices, base = base_index[key]
+		_, new = new_index[key]
+		if 'error' in base or 'error' in new:
+			rows.append((name, str(vertices), '-', '-', 'error', '-', '-', '-'))
+			if 'error' in new and 'error' not in base:
+				regressions.append(f'{name} at {vertices} vertices: {new["error"]}')
+			continue
+
+		time_ratio = _ratio(base['seconds'], new['seconds'])
+		memory_ratio = _ratio(base.get('peak_memory'), new.get('peak_memory'))
+		rows.append((
+			name, str(vertices),
+			f'{base["seconds"] * 1000:.1f}', f'{new["seconds"] * 1000:.1f}', _format_ratio(time_ratio),
+			'-' if base.get('peak_memory') is None else f'{base["peak_memory"] / 1024:.0f}',
+			'-' if new.get('peak_memory') is None else f'{new["peak_memory"] / 1024:.0f}',
+			_format_ratio(memory_ratio),
+		))
+		if time_ratio is not None and time_ratio > 1 + threshold:
+			regressions.append(f'{name} at {vertices} vertices is {time_ratio:.2f}x slower')
+		if memory_ratio is not None and memory_ratio > 1 + threshold:
+			regressions.append(f'{name} at {vertices} vertices uses {memory_ratio:.2f}x the peak memory')
+
+	for name in sorted(baseline.get('scaling', {}).keys() & candidate.get('scaling', {}).keys()):
+		base_exponent = baseline['scaling'][name]['exponent']
+		new_exponent = candidate['scaling'][name]['exponent']
+		if base_exponent is not None and new_exponent is not None and new_exponent > base_exponent + threshold:
+			regressions.append(f'{name} scales worse: exponent {base_exponent:.2f} -> {new_exponent:.2f}')
+
+	return rows, regressions
+
+def FormatTable(rows:list[tuple]) -> str:
+	widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+	lines = ['  '.join(cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths))) for row in rows]
+	lines.insert(1, '-' * len(lines[0]))
+	return '\n'.join(lines)
+
+def main(argv):
+	parser = argparse.ArgumentParser(description = 'Compare two benchmark result files.')
+	parser.add_argument('baseline')
+	parser.add_argument('candidate')
+	parser.add_argument('--threshold', type = float, default = 0.1, help = 'Allowed relative slowdown before a stage counts as a regression')
+	args = parser.parse_args(argv)
+
+	with open(args.baseline) as f:
+		baseline = json.load(f)
+	with open(args.candidate) as f:
+		candidate = json.load(f)
+
+	rows, regressions = Compare(baseline, candidate, args.threshold)
+	print(FormatTable(rows))
+	if regressions:
+		print('\nRegressions:')
+		for regression in regressions:
+			print(f'  {regression}')
+		return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,181 @@
+import os
+import json
+import ctypes
+import numpy as np
+
+'''
+Stand-in for MeshConverter.dll so the pipelines run on machines without the native library.
+install() has MeshConverter load its dll with ctypes.CDLL swapped for StubDLL, the Python wrappers are left untouched
+and still do their own marshalling. The numpy entry points store the arrays they are handed in an .npz
+written to the output path, the matching import entry points read them back, so export -> import round trips work.
+Entry points without a stub return a failure code.
+'''
+
+_unsupported_return_code = 1
+
+class _StubFunction:
+	# Accepts the argtypes/restype assignments MeshConverter makes on dll functions
+	def __init__(self, name, impl):
+		self.__name__ = name
+		self.impl = impl
+		self.argtypes = None
+		self.restype = None
+
+	def __call__(self, *args):
+		return self.impl(*args)
+
+def _as_array(pointer, ctype, shape) -> np.ndarray:
+	if isinstance(pointer, int):
+		pointer = ctypes.cast(pointer, ctypes.POINTER(ctype))
+	return np.ctypeslib.as_array(pointer, shape=shape)
+
+def _optional_array(address, ctype, shape):
+	if not address:
+		return None
+	return _as_array(address, ctype, shape).copy()
+
+def _save(path:str, header:dict, arrays:dict):
+	# Through a file object, so np.savez doesn't append .npz to the path the caller asked for
+	with open(path, 'wb') as f:
+		np.savez(f, header=np.array(json.dumps(header)), **{key: value for key, value in arrays.items() if value is not None})
+
+def _load(path:str):
+	data = np.load(path)
+	return json.loads(str(data['header'])), data
+
+def _export_mesh_numpy(header_json:bytes, output_file:bytes, *null_pointers):
+	# ExportMeshFromNumpy passes the buffers as addresses inside the header, the pointer arguments are null
+	header = json.loads(header_json.decode('utf-8'))
+	num_verts = header['num_verts']
+	num_indices = header['num_indices']
+
+	weights_per_vertex = max((len(w) for w in header['vertex_weights']), default=0)
+	bone_indices = np.zeros((num_verts, weights_per_vertex), dtype=np.int32)
+	weights = np.zeros((num_verts, weights_per_vertex), dtype=np.float32)
+	for i, vertex_weights in enumerate(header['vertex_weights']):
+		for j, (bone_id, weight) in enumerate(vertex_weights):
+			bone_indices[i, j] = bone_id
+			weights[i, j] = weight
+
+	arrays = {
+		'positions': _as_array(header['ptr_positions'], ctypes.c_float, (num_verts, 3)).copy(),
+		'indices': _as_array(header['ptr_indices'], ctypes.c_int64, (num_indices,)).astype(np.int32).reshape(-1, 3),
+		'normals': _as_array(header['ptr_normals'], ctypes.c_float, (num_verts, 3)).copy(),
+		'uv1': _as_array(header['ptr_uv1'], ctypes.c_float, (num_verts, 2)).copy(),
+		'uv2': _optional_array(header['ptr_uv2'], ctypes.c_float, (num_verts, 2)),
+		'color': _optional_array(header['ptr_color'], ctypes.c_float, (num_verts, 4)),
+		'tangents': _as_array(header['ptr_tangents'], ctypes.c_float, (num_verts, 3)).copy(),
+		'bitangent_signs': _as_array(header['ptr_bitangent_signs'], ctypes.c_int32, (num_verts,)).copy(),
+		'weights': weights,
+		'bone_indices': bone_indices,
+	}
+	mesh_header = {
+		'num_vertices': num_verts,
+		'indices_size': num_indices,
+		'num_triangles': num_indices // 3,
+		'num_weightsPerVertex': weights_per_vertex,
+		'max_border': header['max_border'],
+	}
+	_save(output_file.decode('utf-8'), mesh_header, arrays)
+	return 0
+
+def _import_mesh_header(input_file:bytes):
+	header, _ = _load(input_file.decode('utf-8'))
+	return json.dumps(header).encode('utf-8')
+
+def _import_mesh_numpy(input_file:bytes, ptr_positions, ptr_indices, ptr_normals, ptr_uv1, ptr_uv2, ptr_color, ptr_tangents, ptr_bitangent_signs, ptr_weights, ptr_bone_indices):
+	header, data = _load(input_file.decode('utf-8'))
+	num_verts = header['num_vertices']
+	num_weights = header['num_weightsPerVertex']
+	targets = [
+		('positions', ptr_positions, (num_verts, 3)),
+		('indices', ptr_indices, (header['num_triangles'], 3)),
+		('normals', ptr_normals, (num_verts, 3)),
+		('uv1', ptr_uv1, (num_verts, 2)),
+		('uv2', ptr_uv2, (num_verts, 2)),
+		('color', ptr_color, (num_verts, 4)),
+		('tangents', ptr_tangents, (num_verts, 3)),
+		('bitangent_signs', ptr_bitangent_signs, (num_verts,)),
+		('weights', ptr_weights, (num_verts, num_weights)),
+		('bone_indices', ptr_bone_indices, (num_verts, num_weights)),
+	]
+	for key, pointer, shape in targets:
+		if key in data.files and np.prod(shape) > 0:
+			np.ctypeslib.as_array(pointer, shape=shape)[...] = data[key]
+	return 0
+
+def _export_morph_numpy(header_json:bytes, output_file:bytes, ptr_delta_pos, ptr_target_colors, ptr_delta_norm, ptr_delta_tangent):
+	header = json.loads(header_json.decode('utf-8'))
+	shape = (len(header['shapeKeys']), header['numVertices'], 3)
+	arrays = {
+		'deltaPositions': np.ctypeslib.as_array(ptr_delta_pos, shape=shape).copy(),
+		'targetColors': np.ctypeslib.as_array(ptr_target_colors, shape=shape).copy(),
+		'deltaNormals': np.ctypeslib.as_array(ptr_delta_norm, shape=shape).copy(),
+		'deltaTangents': np.ctypeslib.as_array(ptr_delta_tangent, shape=shape).copy(),
+	}
+	_save(output_file.decode('utf-8'), header, arrays)
+	return 0
+
+def _import_morph_header(input_file:bytes):
+	header, _ = _load(input_file.decode('utf-8'))
+	return json.dumps(header).encode('utf-8')
+
+def _import_morph_numpy(input_file:bytes, ptr_delta_pos, ptr_target_colors, ptr_delta_norm, ptr_delta_tangent):
+	header, data = _load(input_file.decode('utf-8'))
+	shape = (len(header['shapeKeys']), header['numVertices'], 3)
+	if np.prod(shape) == 0:
+		return 0
+	for key, pointer in (('deltaPositions', ptr_delta_pos), ('targetColors', ptr_target_colors), ('deltaNormals', ptr_delta_norm), ('deltaTangents', ptr_delta_tangent)):
+		np.ctypeslib.as_array(pointer, shape=shape)[...] = data[key]
+	return 0
+
+_implementations = {
+	'ExportMeshNumpy': _export_mesh_numpy,
+	'ImportMeshHeader': _import_mesh_header,
+	'ImportMeshNumpy': _import_mesh_numpy,
+	'ExportMorphNumpy': _export_morph_numpy,
+	'ImportMorphHeader': _import_morph_header,
+	'ImportMorphNumpy': _import_morph_numpy,
+}
+
+class StubDLL:
+	def __init__(self, path:str):
+		self._name = path
+		self.calls = {}
+
+	def __repr__(self):
+		return f"<StubDLL '{os.path.basename(self._name)}'>"
+
+	def __getattr__(self, name:str):
+		if name.startswith('_'):
+			raise AttributeError(name)
+		impl = _implementations.get(name)
+		if impl is None:
+			def impl(*args):
+				print(f"StubDLL: {name} is not stubbed")
+				return _unsupported_return_code
+		def counted(*args):
+			self.calls[name] = self.calls.get(name, 0) + 1
+			return impl(*args)
+		function = _StubFunction(name, counted)
+		# Cache it, MeshConverter configures each function once and calls it later
+		setattr(self, name, function)
+		return function
+
+def install():
+	'''
+	Load MeshConverter against StubDLL, must run before anything calls into the converter.
+	'''
+	import MeshConverter
+	if MeshConverter.IsDllLoaded():
+		if not isinstance(MeshConverter._dll, StubDLL):
+			raise RuntimeError("MeshConverter already loaded the native library")
+		return MeshConverter
+
+	original_cdll = ctypes.CDLL
+	ctypes.CDLL = lambda path, *args, **kw: StubDLL(path)
+	try:
+		MeshConverter.LoadDll()
+	finally:
+		ctypes.CDLL = original_cdll
+	return MeshConverter
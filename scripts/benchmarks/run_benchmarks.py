@@ -0,0 +1,307 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import statistics
+
+"""
+
+Export/import pipeline benchmarks on synthetic meshes, without MeshConverter.dll.
+Run as: blender -b --factory-startup --python run_benchmarks.py -- --sizes 1000 10000 100000 --output result.json
+Every stage runs --repeats times for the timings, then once more under tracemalloc for the peak memory.
+Per-stage medians, peaks and nested span times are written as json, together with the log-log
+scaling exponent of every stage across the sizes. compare_benchmarks.py diffs two result files.
+"""
+
+format_version = 1
+
+_benchmark_dir = os.path.dirname(os.path.abspath(__file__))
+_module_dir = os.path.join(os.path.dirname(_benchmark_dir), 'tool_export_mesh')
+for _path in (_benchmark_dir, _module_dir):
+	if _path not in sys.path:
+		sys.path.append(_path)
+
+import converter_stub
+MeshConverter = converter_stub.install()
+
+import bpy
+import numpy as np
+
+import utils_trace
+import utils_primitive
+import utils_transfer
+import MeshIO
+import MorphIO
+
+from synthetic_mesh import SyntheticMeshSettings, CreateSyntheticMesh, RemoveSyntheticMesh
+
+class _Operator:
+	# Stands in for the bpy operator the IO functions report to
+	def __init__(self):
+		self.reports = []
+
+	def report(self, type, message):
+		self.reports.append((set(type), message))
+		if 'ERROR' in type or 'WARNING' in type:
+			print(f"{'/'.join(type)}: {message}")
+
+class Stage:
+	'''
+	setup() builds the untimed input and returns it, run(state) is the measured part,
+	teardown(state) undoes whatever run created so the next repeat starts from the same scene.
+	'''
+	def __init__(self, name, run, setup = None, teardown = None):
+		self.name = name
+		self.run = run
+		self.setup = setup
+		self.teardown = teardown
+
+def _mesh_options():
+	options = utils_primitive.Primitive.Options()
+	options.gather_weights_data = True
+	return options
+
+def _morph_options():
+	options = utils_primitive.Primitive.Options()
+	options.gather_morph_data = True
+	return options
+
+def _snap_options():
+	options = utils_primitive.Primitive.Options()
+	options.gather_tangents = False
+	return options
+
+def _gathered(obj, options):
+	primitive = utils_primitive.Primitive(obj, options)
+	primitive.gather()
+	return primitive
+
+def _new_objects(before:set):
+	return [obj for obj in bpy.data.objects if obj.name not in before]
+
+def _remove_objects(objects):
+	for obj in objects:
+		mesh = obj.data if obj.type == 'MESH' else None
+		bpy.data.objects.remove(obj)
+		if mesh is not None and mesh.users == 0:
+			bpy.data.meshes.remove(mesh)
+
+def BuildStages(obj, neighbour, work_dir:str) -> list[Stage]:
+	operator = _Operator()
+	mesh_path = os.path.join(work_dir, obj.name + '.mesh')
+	morph_path = os.path.join(work_dir, obj.name + '_morph')
+
+	def export_mesh(primitive):
+		matrices, data = primitive.to_mesh_numpy_dict()
+		returncode = MeshConverter.ExportMeshFromNumpy({**data, **matrices}, mesh_path)
+		if not returncode:
+			raise RuntimeError(returncode.what())
+
+	def export_morph(primitive):
+		returncode = MeshConverter.ExportMorphFromNumpy(primitive.to_morph_numpy_dict(), morph_path)
+		if not returncode:
+			raise RuntimeError(returncode.what())
+
+	def import_mesh_setup():
+		return set(o.name for o in bpy.data.objects)
+
+	def import_mesh(before):
+		if 'FINISHED' not in MeshIO.ImportMesh_Alt(mesh_path, None, bpy.context, operator):
+			raise RuntimeError('ImportMesh_Alt failed')
+
+	def import_morph_setup():
+		before = set(o.name for o in bpy.data.objects)
+		MeshIO.ImportMesh_Alt(mesh_path, None, bpy.context, operator, _suppress_timer_print_ = True)
+		return before
+
+	def import_morph(before):
+		if 'FINISHED' not in MorphIO.ImportMorphFromNumpy(morph_path + '.dat', operator, force_import_on_active = True):
+			raise RuntimeError('ImportMorphFromNumpy failed')
+
+	def rbf_setup():
+		# Same preparation as utils_transfer.TransferShapekeys for the first morph
+		source = utils_transfer.MeshToTransferable(obj)
+		source.Unique()
+		utils_transfer.ShapekeyDataToTransferable(obj, obj.data.shape_keys.key_blocks[1], source)
+		target = utils_transfer.MeshToTransferable(neighbour)
+		target.GenWeightingScheme(source, sigma = 0.1, copy_range = 0.005)
+		return source, target
+
+	def rbf_transfer(state):
+		source, target = state
+		utils_transfer.RBFTransfer(source, target, scale = 74, epsilon = 3, neighbours = 6, smoothing = 0, use_normals = False)
+
+	remove_new_objects = lambda before: _remove_objects(_new_objects(before))
+
+	stages = [
+		Stage('mesh_gather', lambda primitive: primitive.gather(), setup = lambda: utils_primitive.Primitive(obj, _mesh_options())),
+		Stage('to_mesh_numpy_dict', lambda primitive: primitive.to_mesh_numpy_dict(), setup = lambda: _gathered(obj, _mesh_options())),
+		Stage('export_mesh', export_mesh, setup = lambda: _gathered(obj, _mesh_options())),
+		Stage('import_mesh', import_mesh, setup = import_mesh_setup, teardown = remove_new_objects),
+		Stage('morph_gather', lambda primitive: primitive.gather(), setup = lambda: utils_primitive.Primitive(obj, _morph_options())),
+		Stage('export_morph', export_morph, setup = lambda: _gathered(obj, _morph_options())),
+		Stage('import_morph', import_morph, setup = import_morph_setup, teardown = remove_new_objects),
+		Stage('snap_positions', lambda state: utils_primitive.SnapPositions(*state, copy_range = 0.005), setup = lambda: (_gathered(obj, _snap_options()), _gathered(neighbour, _snap_options()))),
+	]
+	if obj.data.shape_keys is not None and len(obj.data.shape_keys.key_blocks) > 1:
+		stages.append(Stage('rbf_transfer', rbf_transfer, setup = rbf_setup))
+	return stages
+
+def _measure_once(stage:Stage, memory:bool):
+	state = stage.setup() if stage.setup else None
+	tracer = utils_trace.start(f'bench_{stage.name}', memory = memory)
+	try:
+		with utils_trace.span(stage.name):
+			stage.run(state)
+	finally:
+		utils_trace.stop()
+		if stage.teardown:
+			stage.teardown(state)
+	return tracer
+
+def MeasureStage(stage:Stage, repeats:int, memory:bool) -> dict:
+	samples = []
+	spans = {}
+	for _ in range(repeats):
+		tracer = _measure_once(stage, memory = False)
+		samples.append(tracer.stats[stage.name].total / 1e6)
+		for name, stats in tracer.stats.items():
+			spans.setdefault(name, []).append(stats.self_time / 1e6)
+
+	result = {
+		'seconds': statistics.median(samples),
+		'min': min(samples),
+		'max': max(samples),
+		'samples': samples,
+		'peak_memory': None,
+		'spans': {name: statistics.median(times) for name, times in spans.items()},
+	}
+	if memory:
+		tracer = _measure_once(stage, memory = True)
+		result['peak_memory'] = tracer.stats[stage.name].peak_memory
+	return result
+
+def _scaling_exponent(vertices:list, seconds:list):
+	# Slope of log(time) over log(size), 1 is linear
+	points = [(v, s) for v, s in zip(vertices, seconds) if v > 0 and s > 0]
+	if len(points) < 2:
+		return None
+	x = np.log([v for v, _ in points])
+	y = np.log([s for _, s in points])
+	return float(np.polyfit(x, y, 1)[0])
+
+def RunBenchmarks(args) -> dict:
+	bpy.ops.wm.read_homefile(use_empty = True)
+	work_dir = tempfile.mkdtemp(prefix = 'sgb_bench_')
+
+	runs = []
+	for size in args.sizes:
+		settings = SyntheticMeshSettings()
+		settings.vertices = size
+		settings.uv_islands = args.uv_islands
+		settings.sharp_edge_every = args.sharp_edge_every
+		settings.shape_keys = args.shape_keys
+		settings.bones = args.bones
+		settings.weights_per_vertex = args.weights_per_vertex
+
+		neighbour_settings = SyntheticMeshSettings()
+		neighbour_settings.vertices = size
+		neighbour_settings.uv_islands = args.uv_islands
+		neighbour_settings.sharp_edge_every = 0
+		neighbour_settings.shape_keys = 0
+		neighbour_settings.bones = 0
+		# Shares the right border of the benchmarked mesh, just inside the snapping range
+		neighbour_settings.offset = (settings.size + 0.0001, 0.0, 0.0)
+
+		time_start = time.perf_counter()
+		obj = CreateSyntheticMesh(f'Bench_{size}', settings)
+		neighbour = CreateSyntheticMesh(f'Bench_{size}_Neighbour', neighbour_settings)
+		generate_seconds = time.perf_counter() - time_start
+
+		run = {
+			'vertices_requested': size,
+			'vertices': len(obj.data.vertices),
+			'loops': len(obj.data.loops),
+			'triangles': len(obj.data.polygons),
+			'generate_seconds': generate_seconds,
+			'stages': {},
+		}
+		for stage in BuildStages(obj, neighbour, work_dir):
+			if args.stages and stage.name not in args.stages:
+				continue
+			print(f'Benchmark {stage.name} at {run["vertices"]} vertices')
+			try:
+				run['stages'][stage.name] = MeasureStage(stage, args.repeats, args.memory)
+			except Exception as e:
+				print(f'Benchmark {stage.name} failed: {e}')
+				run['stages'][stage.name] = {'error': str(e)}
+
+		RemoveSyntheticMesh(obj)
+		RemoveSyntheticMesh(neighbour)
+		runs.append(run)
+
+	scaling = {}
+	stage_names = list(dict.fromkeys(name for run in runs for name in run['stages']))
+	for name in stage_names:
+		measured = [(run['vertices'], run['stages'][name]['seconds']) for run in runs if 'seconds' in run['stages'].get(name, {})]
+		vertices = [v for v, _ in measured]
+		seconds = [s for _, s in measured]
+		scaling[name] = {'vertices': vertices, 'seconds': seconds, 'exponent': _scaling_exponent(vertices, seconds)}
+
+	return {
+		'format': format_version,
+		'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'environment': {
+			'blender': bpy.app.version_string,
+			'python': platform.python_version(),
+			'numpy': np.__version__,
+			'platform': platform.platform(),
+			'converter': 'stub',
+		},
+		'settings': {
+			'sizes': args.sizes,
+			'repeats': args.repeats,
+			'uv_islands': args.uv_islands,
+			'sharp_edge_every': args.sharp_edge_every,
+			'shape_keys': args.shape_keys,
+			'bones': args.bones,
+			'weights_per_vertex': args.weights_per_vertex,
+		},
+		'runs': runs,
+		'scaling': scaling,
+		# Whole process, includes Blender's own allocations which tracemalloc doesn't see
+		'max_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+	}
+
+def ParseArgs(argv):
+	parser = argparse.ArgumentParser(description = 'Benchmark the mesh and morph pipelines on synthetic meshes.')
+	parser.add_argument('--sizes', type = int, nargs = '+', default = [1000, 10000, 50000], help = 'Approximate vertex counts')
+	parser.add_argument('--repeats', type = int, default = 3)
+	parser.add_argument('--shape-keys', type = int, default = 8)
+	parser.add_argument('--bones', type = int, default = 16)
+	parser.add_argument('--weights-per-vertex', type = int, default = 4)
+	parser.add_argument('--uv-islands', type = int, default = 4, help = 'UV islands per axis')
+	parser.add_argument('--sharp-edge-every', type = int, default = 16, help = 'Grid rows between sharp edge rows, 0 for none')
+	parser.add_argument('--stages', nargs = '*', default = None, help = 'Only run these stages')
+	parser.add_argument('--no-memory', dest = 'memory', action = 'store_false', help = 'Skip the tracemalloc run')
+	parser.add_argument('--output', default = None, help = 'Result json, printed when omitted')
+	return parser.parse_args(argv)
+
+def main():
+	argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+	args = ParseArgs(argv)
+	result = RunBenchmarks(args)
+
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(result, f, indent = 1)
+		print(f'Benchmark results written to {args.output}')
+	else:
+		print(json.dumps(result, indent = 1))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import platform
+
+"""
+
+Add-on startup cost: import and register() time of each add-on in a fresh Blender, which of the heavy
+modules got loaded by registering, and what the deferred ones cost on first use.
+Run as: blender -b --factory-startup --python startup_benchmark.py -- --output startup.json
+Module import times only mean something in a fresh process, run it once per measurement.
+"""
+
+format_version = 1
+
+_scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+addons = ['tool_export_mesh', 'tool_physics_editor', 'tool_batch_process']
+
+# Should stay out of sys.modules until an operator or panel needs them
+heavy_modules = ['scipy', 'utils_primitive', 'utils_transfer', 'MeshIO', 'MorphIO', 'NifIO', 'PhysicsConverter', 'BoneRegionsReader', 'concurrent.futures']
+
+import bpy
+
+def MeasureAddon(name:str) -> dict:
+	ts = time.perf_counter()
+	module = importlib.import_module(name)
+	import_seconds = time.perf_counter() - ts
+
+	ts = time.perf_counter()
+	module.register()
+	register_seconds = time.perf_counter() - ts
+	return {'module': module, 'import_seconds': import_seconds, 'register_seconds': register_seconds}
+
+def FirstUseCost(names:list[str]) -> dict:
+	costs = {}
+	for name in names:
+		if name in sys.modules:
+			continue
+		ts = time.perf_counter()
+		try:
+			importlib.import_module(name)
+		except Exception as e:
+			costs[name] = {'error': str(e)}
+			continue
+		costs[name] = {'seconds': time.perf_counter() - ts}
+	return costs
+
+def RunStartupBenchmark() -> dict:
+	if _scripts_dir not in sys.path:
+		sys.path.append(_scripts_dir)
+	preloaded = [name for name in ('numpy', 'mathutils', 'bmesh') if name in sys.modules]
+
+	measured = {}
+	for name in addons:
+		print(f'Registering {name}')
+		measured[name] = MeasureAddon(name)
+
+	import MeshConverter
+	import utils_common
+	eager = [name for name in heavy_modules if name in sys.modules]
+	dll_loaded = MeshConverter.IsDllLoaded()
+
+	deferred = FirstUseCost([name for name in heavy_modules if name not in eager])
+
+	for name in reversed(addons):
+		measured[name]['module'].unregister()
+
+	return {
+		'format': format_version,
+		'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'environment': {
+			'blender': bpy.app.version_string,
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+		},
+		'preloaded': preloaded,
+		'addons': {name: {'import_seconds': m['import_seconds'], 'register_seconds': m['register_seconds']} for name, m in measured.items()},
+		'total_seconds': sum(m['import_seconds'] + m['register_seconds'] for m in measured.values()),
+		'startup_times': dict(utils_common.startup_times),
+		'eager_heavy_modules': eager,
+		'dll_loaded_at_startup': dll_loaded,
+		'deferred_first_use': deferred,
+	}
+
+def main():
+	argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+	parser = argparse.ArgumentParser(description = 'Measure add-on import and registration time.')
+	parser.add_argument('--output', default = None, help = 'Result json, printed when omitted')
+	args = parser.parse_args(argv)
+
+	result = RunStartupBenchmark()
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(result, f, indent = 1)
+		print(f'Startup results written to {args.output}')
+	else:
+		print(json.dumps(result, indent = 1))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,173 @@
+import math
+import bpy
+import numpy as np
+
+import utils_blender
+
+'''
+Procedural test meshes for the benchmarks: a triangulated wavy grid with
+	UV islands (seams along the island borders), sharp edge rows (split normals),
+	a corner byte color attribute, shape keys, and weights to an armature of bones laid along x.
+Everything is derived from the grid coordinates, the same settings always give the same mesh.
+'''
+
+class SyntheticMeshSettings():
+	def __init__(self):
+		self.vertices = 10000 # Approximate, rounded to a square grid
+		self.size = 1.0
+		self.uv_islands = 4 # Per axis
+		self.sharp_edge_every = 16 # Grid rows between sharp edge rows, 0 for none
+		self.shape_keys = 8
+		self.bones = 16
+		self.weights_per_vertex = 4
+		self.offset = (0.0, 0.0, 0.0)
+		self.seed = 0
+
+def _grid_resolution(vertices:int) -> int:
+	return max(2, int(math.ceil(math.sqrt(vertices))))
+
+def _grid(settings:SyntheticMeshSettings):
+	res = _grid_resolution(settings.vertices)
+	ids = np.arange(res * res)
+	gx = ids % res
+	gy = ids // res
+	u = gx / (res - 1)
+	v = gy / (res - 1)
+
+	positions = np.empty((res * res, 3), dtype=np.float32)
+	positions[:, 0] = u * settings.size
+	positions[:, 1] = v * settings.size
+	positions[:, 2] = 0.05 * settings.size * np.sin(u * 4 * math.pi) * np.cos(v * 3 * math.pi)
+	positions += np.asarray(settings.offset, dtype=np.float32)
+
+	# Two triangles per quad, split along alternating diagonals
+	qx, qy = np.meshgrid(np.arange(res - 1), np.arange(res - 1))
+	qx = qx.ravel()
+	qy = qy.ravel()
+	v00 = qy * res + qx
+	v10 = v00 + 1
+	v01 = v00 + res
+	v11 = v01 + 1
+	flip = (qx + qy) % 2 == 1
+	tri_a = np.where(flip[:, None], np.stack((v00, v10, v01), axis=1), np.stack((v00, v10, v11), axis=1))
+	tri_b = np.where(flip[:, None], np.stack((v10, v11, v01), axis=1), np.stack((v00, v11, v01), axis=1))
+	triangles = np.concatenate((tri_a, tri_b), axis=0)
+	return res, positions, triangles, np.stack((u, v), axis=1)
+
+def _set_uvs(mesh:bpy.types.Mesh, grid_uv:np.ndarray, islands:int):
+	num_loops = len(mesh.loops)
+	loop_vertex = np.empty(num_loops, dtype=np.int32)
+	mesh.loops.foreach_get('vertex_index', loop_vertex)
+
+	# Each face lands in the island of its centroid, corners on island borders get one UV per side
+	face_uv = grid_uv[loop_vertex].reshape(-1, 3, 2).mean(axis=1)
+	islands = max(1, islands)
+	island = np.minimum((face_uv * islands).astype(np.int32), islands - 1)
+	gap = 0.1 / islands
+	scale = 1 / (1 + gap * islands)
+	corner_uv = (grid_uv[loop_vertex] + np.repeat(island, 3, axis=0) * gap) * scale
+
+	uv_layer = mesh.uv_layers.new(name='UVMap')
+	uv_layer.data.foreach_set('uv', corner_uv.astype(np.float32).ravel())
+	mesh.uv_layers.active = uv_layer
+
+def _set_sharp_edges(mesh:bpy.types.Mesh, res:int, every:int):
+	mesh.shade_smooth()
+	if every <= 0:
+		return
+	edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+	mesh.edges.foreach_get('vertices', edge_verts)
+	rows = edge_verts.reshape(-1, 2) // res
+	sharp = (rows[:, 0] == rows[:, 1]) & (rows[:, 0] % every == 0) & (rows[:, 0] > 0) & (rows[:, 0] < res - 1)
+	attr = mesh.attributes.new('sharp_edge', 'BOOLEAN', 'EDGE')
+	attr.data.foreach_set('value', sharp)
+
+def _set_colors(mesh:bpy.types.Mesh, positions:np.ndarray, size:float):
+	loop_vertex = np.empty(len(mesh.loops), dtype=np.int32)
+	mesh.loops.foreach_get('vertex_index', loop_vertex)
+	p = (positions[loop_vertex] - positions.min(axis=0)) / size
+	colors = np.ones((len(loop_vertex), 4), dtype=np.float32)
+	colors[:, 0] = 0.5 + 0.5 * np.sin(p[:, 0] * 7)
+	colors[:, 1] = 0.5 + 0.5 * np.cos(p[:, 1] * 5)
+	colors[:, 2] = np.clip(p[:, 2] * 10 + 0.5, 0, 1)
+
+	col_attr = mesh.color_attributes.new(name='Col', type='BYTE_COLOR', domain='CORNER')
+	col_attr.data.foreach_set('color', colors.ravel())
+	mesh.color_attributes.active_color = col_attr
+	mesh.color_attributes.render_color_index = mesh.color_attributes.active_color_index
+
+def _add_shape_keys(obj:bpy.types.Object, positions:np.ndarray, count:int, size:float, seed:int):
+	if count <= 0:
+		return
+	rng = np.random.default_rng(seed)
+	obj.shape_key_add(name='Basis', from_mix=False)
+	p = (positions - positions.min(axis=0)) / size
+	for i in range(count):
+		fx, fy = rng.uniform(1, 6, size=2)
+		phase = rng.uniform(0, 2 * math.pi)
+		delta = np.zeros_like(positions)
+		delta[:, 2] = 0.02 * size * np.sin(p[:, 0] * fx * math.pi + phase) * np.sin(p[:, 1] * fy * math.pi)
+		delta[:, 0] = 0.005 * size * np.cos(p[:, 1] * fy * math.pi + phase)
+		sk = obj.shape_key_add(name=f'Morph_{i:03d}', from_mix=False)
+		sk.data.foreach_set('co', (positions + delta).ravel())
+
+def _add_armature(obj:bpy.types.Object, positions:np.ndarray, settings:SyntheticMeshSettings):
+	if settings.bones <= 0:
+		return None
+	arm_data = bpy.data.armatures.new(obj.name + '_Armature')
+	arm_obj = bpy.data.objects.new(arm_data.name, arm_data)
+	bpy.context.collection.objects.link(arm_obj)
+
+	x_min = float(positions[:, 0].min())
+	spacing = settings.size / settings.bones
+	bone_x = x_min + (np.arange(settings.bones) + 0.5) * spacing
+	bone_names = [f'Bone_{i:03d}' for i in range(settings.bones)]
+
+	original_active = utils_blender.SetActiveObject(arm_obj)
+	bpy.ops.object.mode_set(mode='EDIT')
+	center_y = float(positions[:, 1].mean())
+	for name, x in zip(bone_names, bone_x):
+		eb = arm_data.edit_bones.new(name)
+		eb.head = (x, center_y, 0)
+		eb.tail = (x, center_y, spacing)
+	bpy.ops.object.mode_set(mode='OBJECT')
+	utils_blender.SetActiveObject(original_active)
+
+	# Gaussian falloff along x, the strongest influences per vertex are kept and normalized
+	falloff = np.exp(-((positions[:, 0, None] - bone_x[None, :]) / spacing) ** 2)
+	keep = min(settings.weights_per_vertex, settings.bones)
+	bone_ids = np.argsort(-falloff, axis=1)[:, :keep]
+	weights = np.take_along_axis(falloff, bone_ids, axis=1)
+	weights /= weights.sum(axis=1, keepdims=True)
+	vertex_ids = np.repeat(np.arange(len(positions)), keep)
+	utils_blender.AddVertexGroupWeights(obj, vertex_ids, bone_ids.ravel(), weights.ravel(), bone_names)
+
+	modifier = obj.modifiers.new(name='Armature', type='ARMATURE')
+	modifier.object = arm_obj
+	return arm_obj
+
+def CreateSyntheticMesh(name:str, settings:SyntheticMeshSettings) -> bpy.types.Object:
+	res, positions, triangles, grid_uv = _grid(settings)
+	mesh = utils_blender.MeshFromTriangles(name, positions, triangles)
+	obj = bpy.data.objects.new(name, mesh)
+	bpy.context.collection.objects.link(obj)
+
+	_set_uvs(mesh, grid_uv, settings.uv_islands)
+	_set_sharp_edges(mesh, res, settings.sharp_edge_every)
+	_set_colors(mesh, positions, settings.size)
+	_add_shape_keys(obj, positions, settings.shape_keys, settings.size, settings.seed)
+	_add_armature(obj, positions, settings)
+	mesh.update()
+	return obj
+
+def RemoveSyntheticMesh(obj:bpy.types.Object):
+	mesh = obj.data
+	armatures = [m.object for m in obj.modifiers if m.type == 'ARMATURE' and m.object is not None]
+	bpy.data.objects.remove(obj)
+	if mesh.users == 0:
+		bpy.data.meshes.remove(mesh)
+	for arm_obj in armatures:
+		arm_data = arm_obj.data
+		bpy.data.objects.remove(arm_obj)
+		if arm_data.users == 0:
+			bpy.data.armatures.remove(arm_data)
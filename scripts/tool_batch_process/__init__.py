@@ -1,4 +1,4 @@
-import bpy, os, sys, NifIO, MorphIO, json
+import bpy, os, sys, json
 
 dir = os.path.dirname(os.path.realpath(__file__))
 if dir not in sys.path:
@@ -91,48 +91,122 @@ class ImportFromBatchList(bpy.types.Operator):
     bl_description = "Imports batch list selected entry"
 
     def execute(self, event):
-        self.body_type = "any"
-        self.morph_type = "Chargen"
-
         context = bpy.context
 
         plugin = context.scene.plugin_list[bpy.context.scene.plugin_list_index]
 
-        self.assets_folder = context.scene.assets_folder_override[context.scene.assets_folder_override.find(plugin.name)].assets_folder
-        self.correct_rotation = True
-        self.max_lod = 1
-        self.meshlets_debug = False
-        self.tangents_debug = False
-        self.import_as_read_only = False
-        self.geo_bounding_debug = False
-        self.boneinfo_debug = False
-        self.load_havok_skeleten = False
-
-        self.debug_delta_normal = False
-        self.debug_padding = False
-        self.debug_delta_tangent = False
-        self.as_multiple = False
-        self.use_attributes = False
-
-        self.batch_m = bpy.context.scene.batch_m
-        self.batch_f = bpy.context.scene.batch_f
-        self.batch_first_person_model = bpy.context.scene.batch_first_person_model
-        self.batch_world_model = bpy.context.scene.batch_world_model
-        self.batch_chargen_morph = bpy.context.scene.batch_chargen_morph
-        self.batch_perf_morph = bpy.context.scene.batch_perf_morph
+        for name, value in batch_utils.getBatchImportOptions(context, plugin).items():
+            setattr(self, name, value)
 
         plugin_item = plugin.plugin_items[bpy.context.scene.batch_list_index]
 
-        batch_utils.importFromBatchList(self, event, plugin_item)
+        manifest = batch_utils.BatchManifest(plugin.name)
+
+        failed = batch_utils.importFromBatchList(self, event, plugin_item, manifest, context.scene.batch_resume)
+
+        for error in failed:
+            self.report({'WARNING'}, error)
         
         return {'FINISHED'}
     
     def invoke(self, context, event):
         return self.execute(event)
 
+"""
+
+Import from batch list in background Blender processes.
+"""
+
+class ImportFromBatchListBackground(bpy.types.Operator):
+    bl_idname = "scene.import_from_batch_list_background"
+    bl_label = "Import in background"
+    bl_description = "Imports batch list selected entry using several background Blender processes, the results are appended when all of them are done"
+
+    _timer = None
+    _shards = []
+    _completed = []
+    _manifest = None
+
+    def execute(self, context):
+        plugin = context.scene.plugin_list[context.scene.plugin_list_index]
+        options = batch_utils.getBatchImportOptions(context, plugin)
+        plugin_item = plugin.plugin_items[context.scene.batch_list_index]
+
+        jobs = batch_utils.getBatchJobs(batch_utils.BatchImportOptions(options), plugin_item)
+
+        if len(jobs) == 0:
+            self.report({'WARNING'}, "Nothing to import with the current batch configuration.")
+            return {'CANCELLED'}
+
+        self._manifest = batch_utils.BatchManifest(plugin.name)
+        self._manifest.pruneRuns()
+
+        if context.scene.batch_resume:
+            jobs, self._completed = self._manifest.filterCompleted(jobs)
+        else:
+            jobs, self._completed = [dict(job, digest=batch_utils.batchJobDigest(job)) for job in jobs], []
+
+        if len(jobs) == 0:
+            self.appendCompleted(context)
+            self.report({'INFO'}, "All items were already imported with unchanged inputs.")
+            return {'FINISHED'}
+
+        self._shards = batch_utils.startBatchWorkers(options, jobs, context.scene.batch_workers, self._manifest)
+
+        wm = context.window_manager
+        wm.progress_begin(0, len(jobs))
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            for shard in self._shards:
+                shard.terminate()
+            self.finish(context)
+            self.report({'WARNING'}, "Background import cancelled.")
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        self._manifest.updateFromShards(self._shards)
+
+        done, failed, total = batch_utils.batchProgress(self._shards)
+        context.window_manager.progress_update(done + failed)
+        context.workspace.status_text_set(f"Batch import: {done}/{total} imported, {failed} failed")
+
+        if any(shard.running() for shard in self._shards):
+            return {'PASS_THROUGH'}
+
+        self.finish(context)
+
+        appended = batch_utils.appendBatchOutputs(context, [self._manifest.jobs[job["id"]]["outputs"] for shard in self._shards for job in shard.jobs if self._manifest.jobs.get(job["id"], {}).get("status") == "done"])
+        appended += self.appendCompleted(context)
+
+        for name, error in batch_utils.batchFailures(self._shards):
+            self.report({'WARNING'}, f"{name}: {error}")
+
+        self.report({'INFO'}, f"Batch import finished, {done} of {total} imported, {len(self._completed)} skipped, {len(appended)} collections appended.")
+        return {'FINISHED'}
+
+    def appendCompleted(self, context):
+        outputs_list = [self._manifest.jobs[job["id"]]["outputs"] for job in self._completed if not self._manifest.inCurrentFile(job)]
+        return batch_utils.appendBatchOutputs(context, outputs_list)
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def invoke(self, context, event):
+        return self.execute(context)
+
 classes = [
     RefreshBatchList,
     ImportFromBatchList,
+    ImportFromBatchListBackground,
     GenOutfitJson
 ]
 
@@ -1,4 +1,4 @@
-import bpy, os, json
+import bpy, os, json, hashlib
 
 from bpy.props import CollectionProperty, StringProperty, IntProperty, BoolProperty, EnumProperty, FloatProperty
 
@@ -30,6 +30,7 @@ class ArmorAddonData(bpy.types.PropertyGroup):
 
 class ArmorAddons(bpy.types.PropertyGroup):
     name: StringProperty(name="Armor addon name", default="")
+    digest: StringProperty(name="Armor addon json digest", default="")
 
     world_male: CollectionProperty(type=ArmorAddonData)
     world_female: CollectionProperty(type=ArmorAddonData)
@@ -43,6 +44,7 @@ class BatchListItem(bpy.types.PropertyGroup):
     mod: StringProperty(name="Mod name", default="")
     form_key: StringProperty(name="Form key", default="")
     race: StringProperty(name="Form key", default="")
+    file_stamp: StringProperty(name="Outfit json size, modification time and options digest", default="")
     armor_addons: CollectionProperty(name="Armor addons", type=ArmorAddons)
 
 class StarfieldPluginItem(bpy.types.PropertyGroup):
@@ -54,18 +56,99 @@ class AssetFolderOverride(bpy.types.PropertyGroup):
     assets_folder: StringProperty(name="Assets", default="", subtype='DIR_PATH', get=getAssetsFolder, set=setAssetsFolder)
 
 
+"""
+Cached filter/sort index for the UI lists.
+The search text of every row is built once per list generation, filter flags and order are only
+recomputed when the filter settings change, so redraws don't walk the whole collection.
+Filter: space separated terms, all must match. Plain terms match any field, 'field:term' a single one.
+"""
+
+# Bumped whenever refreshBatchList modifies the lists
+batch_list_generation = 0
+
+list_filter_cache = {}
+
+class IndexedFilterList:
+    search_fields = ["name"]
+
+    def get_search_fields(self, item):
+        return {field: str(getattr(item, field)).lower() for field in self.search_fields}
+
+    def filter_items(self, context, data, propname):
+        items = getattr(data, propname)
+        key = (data.as_pointer(), propname, self.__class__.__name__)
+        entry = list_filter_cache.get(key)
+
+        if entry == None or entry["generation"] != batch_list_generation or entry["length"] != len(items):
+            entry = {
+                "generation": batch_list_generation,
+                "length": len(items),
+                "index": [self.get_search_fields(item) for item in items],
+                "filter": None,
+            }
+            list_filter_cache[key] = entry
+
+        # Blender applies use_filter_invert and use_filter_sort_reverse to what filter_items returns, they stay out of the cache
+        filter_state = (self.filter_name, self.use_filter_sort_alpha)
+
+        if entry["filter"] != filter_state:
+            entry["filter"] = filter_state
+            entry["flags"] = self.build_flags(entry["index"], self.filter_name)
+            entry["order"] = self.build_order(entry["index"]) if self.use_filter_sort_alpha else []
+
+        return entry["flags"], entry["order"]
+
+    def build_flags(self, index, filter_name):
+        terms = filter_name.lower().split()
+
+        if len(terms) == 0:
+            return []
+
+        parsed_terms = []
+
+        for term in terms:
+            field, sep, value = term.partition(":")
+            parsed_terms.append((term, field if sep != "" else None, value))
+
+        flags = []
+
+        for fields in index:
+            match = all(
+                value in fields[field] if field in fields else any(term in text for text in fields.values())
+                for term, field, value in parsed_terms
+            )
+            flags.append(self.bitflag_filter_item if match else 0)
+
+        return flags
+
+    def build_order(self, index):
+        sorted_ids = sorted(range(len(index)), key=lambda i: index[i]["name"])
+        order = [0] * len(index)
+
+        for pos, i in enumerate(sorted_ids):
+            order[i] = pos
+
+        return order
+
 """
 UI panels
 """
 
-class SGB_UL_BatchList(bpy.types.UIList):
+class SGB_UL_BatchList(IndexedFilterList, bpy.types.UIList):
     bl_idname = "SGB_UL_BatchList"
     layout_type = "DEFAULT"
 
+    search_fields = ["name", "mod", "form_key", "file_name"]
+
+    def get_search_fields(self, item):
+        fields = super().get_search_fields(item)
+        fields["addon"] = " ".join(armor_addon.name for armor_addon in item.armor_addons).lower()
+        return fields
+
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         layout.prop(item, "name", text="", emboss=False)
 
-class SGB_UL_PluginList(bpy.types.UIList):
+class SGB_UL_PluginList(IndexedFilterList, bpy.types.UIList):
     bl_idname = "SGB_UL_PluginList"
     layout_type = "DEFAULT"
 
@@ -116,7 +199,9 @@ class SGB_PT_Batch(bpy.types.Panel):
                 text=f"{plugin.name} assets"
             )
 
-            layout.operator("scene.import_from_batch_list")
+            row = layout.row(align=True)
+            row.operator("scene.import_from_batch_list")
+            row.operator("scene.import_from_batch_list_background")
 
 class SGB_PT_BatchConfig(bpy.types.Panel):
     bl_idname = "SGB_PT_BatchConfig"
@@ -147,6 +232,10 @@ class SGB_PT_BatchConfig(bpy.types.Panel):
         row.prop(context.scene, "batch_perf_morph")
         row.prop(context.scene, "batch_chargen_morph")
 
+        row = layout.row(align=True)
+        row.prop(context.scene, "batch_workers")
+        row.prop(context.scene, "batch_resume")
+
 class SGB_PT_ArmorAddonInfo(bpy.types.Panel):
     bl_idname = "SGB_PT_ArmorAddonInfo"
 
@@ -215,9 +304,29 @@ Functions used in UI only.
 """
 
 Refreshes batch list.
+Incremental, only outfit json files whose size or modification time changed are parsed again,
+and only their armor addons that changed are rebuilt.
 """
 
+# Outfit json files rejected by the options, path: stamp
+skipped_batch_files = {}
+
+def getFileStamp(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def getJsonDigest(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+def removeStale(collection, valid_names, key="name"):
+    for idx in reversed(range(len(collection))):
+        if getattr(collection[idx], key) not in valid_names:
+            collection.remove(idx)
+
 def refreshBatchList(batch_folder="", options=None):
+    global batch_list_generation
+    batch_list_generation += 1
+
     default_batch_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_files")
 
     if (batch_folder == None or not os.path.isdir(batch_folder)):
@@ -225,8 +334,6 @@ def refreshBatchList(batch_folder="", options=None):
             batch_folder = default_batch_folder
         else:
             return False
-    
-    bpy.context.scene.plugin_list.clear()
 
     if options == None:
         options = {
@@ -234,46 +341,95 @@ def refreshBatchList(batch_folder="", options=None):
             "valid_race": "00347D"
         }
 
+    options_digest = getJsonDigest(options)
+
     assets_folder_plugins = [p.name for p in bpy.context.scene.assets_folder_override]
+    plugin_list = bpy.context.scene.plugin_list
+
+    plugin_folders = [f for f in os.listdir(batch_folder) if os.path.isdir(os.path.join(batch_folder, f))]
+    removeStale(plugin_list, plugin_folders)
 
-    for plugin_folder in os.listdir(batch_folder):
+    for plugin_folder in plugin_folders:
 
         if plugin_folder not in assets_folder_plugins:
             assets_folder_override = bpy.context.scene.assets_folder_override.add()
             assets_folder_override.name = plugin_folder
 
-        plugin_item = bpy.context.scene.plugin_list.add()
-        plugin_item.name = plugin_folder
+        plugin_idx = plugin_list.find(plugin_folder)
+
+        if plugin_idx == -1:
+            plugin_item = plugin_list.add()
+            plugin_item.name = plugin_folder
+        else:
+            plugin_item = plugin_list[plugin_idx]
 
         plugin_path = os.path.join(batch_folder, plugin_folder)
 
+        items = {item.file_name: item for item in plugin_item.plugin_items}
+        valid_file_names = set()
+
         for json_file_name in os.listdir(plugin_path):
             json_path = os.path.join(plugin_path, json_file_name)
 
             if not os.path.isfile(json_path):
                 continue
 
-            json_file = json.load(open(json_path))
+            stamp = f"{getFileStamp(json_path)}:{options_digest}"
+            item = items.get(json_file_name)
+
+            if item != None and item.file_stamp == stamp:
+                valid_file_names.add(json_file_name)
+                continue
+
+            if skipped_batch_files.get(json_path) == stamp:
+                continue
+
+            with open(json_path) as f:
+                json_file = json.load(f)
 
             if options["skip_empty_armor_addons"] and json_file["ArmorAddons"] == {}:
+                skipped_batch_files[json_path] = stamp
                 continue
             
             if options["valid_race"] != "" and json_file["Race"] != options["valid_race"]:
+                skipped_batch_files[json_path] = stamp
                 continue
 
-            item = plugin_item.plugin_items.add()
+            skipped_batch_files.pop(json_path, None)
+            valid_file_names.add(json_file_name)
+
+            if item == None:
+                item = plugin_item.plugin_items.add()
+                item.file_name = json_file_name
+
             item.name = json_file["Name"]
-            item.file_name = json_file_name
             item.mod = json_file["Mod"]
             item.form_key = json_file["FormKey"]
             item.race = json_file["Race"]
+            item.file_stamp = stamp
+
+            json_armor_addons = json_file["ArmorAddons"]
+            digests = {name: getJsonDigest(json_armor_addon) for name, json_armor_addon in json_armor_addons.items()}
 
-            if json_file["ArmorAddons"] != {}:
-                for name, json_armor_addon in json_file["ArmorAddons"].items():
+            # Keep the armor addons that did not change, rebuild the others
+            for idx in reversed(range(len(item.armor_addons))):
+                armor_addon = item.armor_addons[idx]
+                if digests.get(armor_addon.name) != armor_addon.digest:
+                    item.armor_addons.remove(idx)
+
+            for name, json_armor_addon in json_armor_addons.items():
+                if item.armor_addons.find(name) == -1:
                     genArmorAddon(json_armor_addon, item, name)
-    
-    bpy.context.scene.batch_list_index = 0
-    bpy.context.scene.plugin_list_index = 0
+                    item.armor_addons[-1].digest = digests[name]
+
+        removeStale(plugin_item.plugin_items, valid_file_names, key="file_name")
+
+    if bpy.context.scene.plugin_list_index >= len(plugin_list):
+        bpy.context.scene.plugin_list_index = 0
+
+    if len(plugin_list) == 0 or bpy.context.scene.batch_list_index >= len(plugin_list[bpy.context.scene.plugin_list_index].plugin_items):
+        bpy.context.scene.batch_list_index = 0
+
     return True
 
 """
@@ -393,6 +549,20 @@ def register():
         description="If checked, performance morph be allowed for processing and import"
     )
 
+    s.batch_workers = IntProperty(
+        name="Workers",
+        default=max(1, min(4, (os.cpu_count() or 1) // 2)),
+        min=1,
+        max=32,
+        description="Number of background Blender processes used by Import in background"
+    )
+
+    s.batch_resume = BoolProperty(
+        name="Skip completed",
+        default=True,
+        description="If checked, items imported by an earlier run whose input files are unchanged are not imported again"
+    )
+
 def unregister():
     for c in classes:
         bpy.utils.unregister_class(c)
@@ -411,3 +581,5 @@ def unregister():
     del s.batch_world_model
     del s.batch_chargen_morph
     del s.batch_perf_morph
+    del s.batch_workers
+    del s.batch_resume
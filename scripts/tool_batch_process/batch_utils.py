@@ -1,4 +1,9 @@
-import bpy, os, subprocess, NifIO, MorphIO
+import bpy, os, json, time, shutil, hashlib, subprocess, utils_trace
+
+from utils_common import LazyModule
+
+NifIO = LazyModule("NifIO")
+MorphIO = LazyModule("MorphIO")
 
 
 """
@@ -18,11 +23,71 @@ def getPluginFolders():
 
 """
 
-Imports nif from batch list with all morphs.
+Import options shared by the interactive import and the background workers.
+"""
+
+batch_import_defaults = {
+    "body_type": "any",
+    "morph_type": "Chargen",
+    "correct_rotation": True,
+    "max_lod": 1,
+    "share_mesh_data": True,
+    "meshlets_debug": False,
+    "tangents_debug": False,
+    "import_as_read_only": False,
+    "geo_bounding_debug": False,
+    "boneinfo_debug": False,
+    "load_havok_skeleten": False,
+    "debug_delta_normal": False,
+    "debug_padding": False,
+    "debug_delta_tangent": False,
+    "as_multiple": False,
+    "use_attributes": False,
+}
+
+batch_scene_options = [
+    "batch_m",
+    "batch_f",
+    "batch_first_person_model",
+    "batch_world_model",
+    "batch_chargen_morph",
+    "batch_perf_morph",
+]
+
+def getBatchImportOptions(context, plugin):
+    options = dict(batch_import_defaults)
+    options["assets_folder"] = context.scene.assets_folder_override[context.scene.assets_folder_override.find(plugin.name)].assets_folder
+
+    for name in batch_scene_options:
+        options[name] = getattr(context.scene, name)
+
+    return options
+
+"""
+
+Stand-in for the operator inside background workers, collects reports instead of showing them.
 """
 
-def importFromBatchList(self, context, batch_list_item):
-    assets = self.assets_folder
+class BatchImportOptions:
+    def __init__(self, options):
+        self.__dict__.update(options)
+        self.reports = []
+
+    def report(self, type, message):
+        level = next(iter(type), 'INFO')
+        self.reports.append((level, message))
+        print(f"[{level}] {message}")
+
+"""
+
+Lists every model of a batch list item allowed by the batch configuration.
+"""
+
+model_labels = ["world_male", "fp_male", "world_female", "fp_female"]
+
+def getBatchJobs(options, batch_list_item):
+    assets = options.assets_folder
+    jobs = []
 
     for armor_addon in batch_list_item.armor_addons:
         models = [
@@ -39,11 +104,11 @@ def importFromBatchList(self, context, batch_list_item):
             world_model = idx % 2 == 0
             fp_model = not world_model
 
-            excl_m = idx <= 1 and self.batch_m == False
-            excl_f = idx >= 2 and self.batch_f == False
+            excl_m = idx <= 1 and options.batch_m == False
+            excl_f = idx >= 2 and options.batch_f == False
             
-            excl_world = world_model and self.batch_world_model == False
-            excl_fp = fp_model and self.batch_first_person_model == False
+            excl_world = world_model and options.batch_world_model == False
+            excl_fp = fp_model and options.batch_first_person_model == False
 
             excl_match = any((
                 excl_m, excl_f,
@@ -53,43 +118,428 @@ def importFromBatchList(self, context, batch_list_item):
             if excl_match:
                 continue
 
-            if idx <= 1:
-                self.skeleton_name = "skeleton_male"
-            else:
-                self.skeleton_name = "skeleton_female"
-
-            nif = model[0].nif
-
-            NifIO.ImportNif(
-                os.path.join(assets, "meshes", nif),
-                self,
-                context,
-                self
-            )
-            
             morphs = []
 
-            if self.batch_chargen_morph and model[0].chargen_morph != "":
+            if options.batch_chargen_morph and model[0].chargen_morph != "":
                 morphs.append(os.path.join(assets, model[0].chargen_morph, "morph.dat"))
 
-            if self.batch_perf_morph and model[0].performance_morph != "":
+            if options.batch_perf_morph and model[0].performance_morph != "":
                 morphs.append(os.path.join(assets, model[0].performance_morph, "morph.dat"))
-            
-            for morph in morphs:
-                self.filepath = morph
 
-                MorphIO.ImportMorph(self, context, self)
+            jobs.append({
+                "id": f"{batch_list_item.file_name}/{armor_addon.name}/{model_labels[idx]}",
+                "name": f"{armor_addon.name} {model_labels[idx]}",
+                "skeleton_name": "skeleton_male" if idx <= 1 else "skeleton_female",
+                "nif": os.path.join(assets, "meshes", model[0].nif),
+                "morphs": morphs,
+            })
+
+    return jobs
+
+"""
+
+Imports a single batch job, nif with all morphs.
+Returns an error message (None on success) and the names of the collections it created.
+"""
+
+def importBatchJob(options, context, job):
+    options.skeleton_name = job["skeleton_name"]
+    collections_before = set(c.name for c in bpy.context.scene.collection.children)
+
+    rtn = NifIO.ImportNif(
+        job["nif"],
+        options,
+        context,
+        options
+    )
+
+    error = None
+
+    if rtn[0] != {'FINISHED'}:
+        error = f"Failed to import {job['nif']}"
+    else:
+        for morph in job["morphs"]:
+            options.filepath = morph
+
+            if MorphIO.ImportMorphFromNumpy(morph, options, options.debug_delta_normal) != {'FINISHED'}:
+                error = f"Failed to import {morph}"
 
-            for obj in [obj for obj in bpy.context.scene.objects if obj in bpy.context.selected_objects]:
-                obj.select_set(False)
+    for obj in [obj for obj in bpy.context.scene.objects if obj in bpy.context.selected_objects]:
+        obj.select_set(False)
 
+    collections = [c.name for c in bpy.context.scene.collection.children if c.name not in collections_before]
+    return error, collections
+
+"""
+
+Imports nif from batch list with all morphs.
+Jobs completed in an earlier run with unchanged inputs are skipped, or appended from their background shard.
+"""
+
+def importFromBatchList(self, context, batch_list_item, manifest=None, resume=True):
+    failed = []
+
+    for job in getBatchJobs(self, batch_list_item):
+        digest = batchJobDigest(job)
+
+        if resume and manifest != None and manifest.completed(job, digest):
+            if not manifest.inCurrentFile(job):
+                appendBatchOutputs(context, [manifest.jobs[job["id"]]["outputs"]])
+            continue
+
+        error, collections = importBatchJob(self, context, job)
+
+        if manifest != None:
+            manifest.update(job, "done" if error == None else "failed", digest, error, {"file": bpy.data.filepath, "collections": collections})
+            manifest.save()
+
+        if error != None:
+            failed.append(error)
+
+    return failed
+
+"""
+
+Job manifest, one per plugin, stored next to the batch files.
+Records per job status, input digest and outputs so reruns only redo failed or stale jobs.
+"""
+
+def writeJsonAtomic(path, data):
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+
+    os.replace(tmp_path, path)
+
+def readJson(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def getBatchJobsFolder(plugin_name):
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_jobs", plugin_name)
+
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    return folder
+
+def batchJobDigest(job):
+    h = hashlib.sha1()
+    h.update(json.dumps([{k: v for k, v in job.items() if k != "digest"}, batch_import_defaults], sort_keys=True).encode())
+
+    for path in [job["nif"]] + job["morphs"]:
+        try:
+            stat = os.stat(path)
+            h.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        except OSError:
+            h.update(f"{path}:missing".encode())
+
+    return h.hexdigest()
+
+class BatchManifest:
+    version = 1
+
+    def __init__(self, plugin_name):
+        self.path = os.path.join(getBatchJobsFolder(plugin_name), "manifest.json")
+        data = readJson(self.path)
+
+        if data == None or data.get("version") != self.version:
+            data = {"version": self.version, "jobs": {}}
+
+        self.jobs = data["jobs"]
+
+    def save(self):
+        writeJsonAtomic(self.path, {"version": self.version, "jobs": self.jobs})
+
+    def update(self, job, status, digest, error=None, outputs=None):
+        self.jobs[job["id"]] = {
+            "name": job["name"],
+            "status": status,
+            "digest": digest,
+            "error": error,
+            "outputs": outputs if outputs != None else {},
+            "time": time.time(),
+        }
+
+    # Outputs are either collections of the .blend the job was imported into, or collections in a background shard
+    def completed(self, job, digest):
+        entry = self.jobs.get(job["id"])
+
+        if entry == None or entry["status"] != "done" or entry["digest"] != digest:
+            return False
+
+        outputs = entry["outputs"]
+
+        if outputs.get("blend", "") != "":
+            return os.path.isfile(outputs["blend"])
+
+        return self.inCurrentFile(job)
+
+    def inCurrentFile(self, job):
+        outputs = self.jobs.get(job["id"], {}).get("outputs", {})
+
+        if "file" not in outputs or outputs["file"] != bpy.data.filepath:
+            return False
+
+        return all(name in bpy.data.collections for name in outputs.get("collections", []))
+
+    # Splits jobs into pending jobs, tagged with their digest, and completed jobs
+
+    def filterCompleted(self, jobs):
+        pending = []
+        completed = []
+
+        for job in jobs:
+            digest = batchJobDigest(job)
+
+            if self.completed(job, digest):
+                completed.append(job)
+            else:
+                pending.append(dict(job, digest=digest))
+
+        return pending, completed
+
+    # Records the shard results, jobs of workers that exited before reaching them count as failed
+
+    def updateFromShards(self, shards):
+        changed = False
+
+        for shard in shards:
+            results = shard.results()
+            running = shard.running()
+
+            for job in shard.jobs:
+                result = results.get(job["id"])
+
+                if result == None:
+                    if running:
+                        continue
+                    result = {"status": "failed", "error": f"Worker crashed, see {shard.log_path}", "collections": []}
+
+                entry = self.jobs.get(job["id"])
+
+                if entry != None and entry["digest"] == job["digest"] and entry["status"] == result["status"] and entry["outputs"].get("blend") == shard.blend_path:
+                    continue
+
+                self.update(job, result["status"], job["digest"], result["error"], {"blend": shard.blend_path, "collections": result["collections"]})
+                changed = True
+
+        if changed:
+            self.save()
+
+    # Removes background runs none of the jobs refer to anymore
+
+    def pruneRuns(self):
+        folder = os.path.dirname(self.path)
+        used = set(os.path.dirname(entry["outputs"]["blend"]) for entry in self.jobs.values() if entry["outputs"].get("blend", "") != "")
+
+        for name in os.listdir(folder):
+            run_folder = os.path.join(folder, name)
+
+            if name.startswith("run_") and os.path.isdir(run_folder) and run_folder not in used:
+                shutil.rmtree(run_folder, ignore_errors=True)
+
+"""
+
+Background import. Jobs are split across several headless Blender processes,
+each one imports its share and saves it to a .blend shard that the main session appends.
+"""
+
+def splitBatchJobs(jobs, num_shards):
+    num_shards = max(1, min(num_shards, len(jobs)))
+    return [jobs[i::num_shards] for i in range(num_shards)]
+
+class BatchShard:
+    def __init__(self, folder, idx, jobs, options):
+        self.jobs = jobs
+        self.job_path = os.path.join(folder, f"shard_{idx}.json")
+        self.result_path = os.path.join(folder, f"shard_{idx}_result.json")
+        self.blend_path = os.path.join(folder, f"shard_{idx}.blend")
+        self.log_path = os.path.join(folder, f"shard_{idx}.log")
+        self.process = None
+
+        writeJsonAtomic(self.job_path, {
+            "index": idx,
+            "trace_dir": utils_trace.output_folder,
+            "options": options,
+            "jobs": jobs,
+            "result_path": self.result_path,
+            "blend_path": self.blend_path,
+            "module_paths": [os.path.dirname(os.path.abspath(__file__)), os.path.dirname(os.path.abspath(utils_trace.__file__))],
+        })
+
+    def start(self):
+        worker = os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_worker.py")
+        args = [bpy.app.binary_path, "-b", "--python", worker, "--", self.job_path]
+
+        with open(self.log_path, "w") as log:
+            self.process = subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT)
+
+    def running(self):
+        return self.process != None and self.process.poll() == None
+
+    def terminate(self):
+        if self.running():
+            self.process.terminate()
+
+    # Jobs the worker hasn't saved to the shard .blend yet are left out, or failed if the worker is gone
+
+    def results(self):
+        # Polled before reading, so a worker that exits in between can't leave a stale file looking final
+        running = self.running()
+        result = readJson(self.result_path)
+
+        if result == None:
+            return {}
+
+        jobs = {}
+
+        for job_id, job_result in result["jobs"].items():
+            if job_result.get("saved", True):
+                jobs[job_id] = job_result
+            elif not running:
+                jobs[job_id] = {"status": "failed", "error": f"Worker exited before saving, see {self.log_path}", "collections": []}
+
+        return jobs
+
+"""
+
+Starts the background workers in a new run folder next to the manifest, returns the shards.
+"""
+
+def startBatchWorkers(options, jobs, num_workers, manifest):
+    work_folder = os.path.join(os.path.dirname(manifest.path), time.strftime("run_%Y%m%d_%H%M%S"))
+    os.makedirs(work_folder, exist_ok=True)
+
+    shards = [BatchShard(work_folder, idx, shard_jobs, options) for idx, shard_jobs in enumerate(splitBatchJobs(jobs, num_workers))]
+
+    for shard in shards:
+        shard.start()
+
+    return shards
+
+"""
+
+Aggregated progress of all shards: (done, failed, total).
+A shard whose process exited without finishing counts its remaining jobs as failed.
+"""
+
+def batchProgress(shards):
+    done = 0
+    failed = 0
+    total = 0
+
+    for shard in shards:
+        results = shard.results()
+        total += len(shard.jobs)
+
+        for job in shard.jobs:
+            status = results.get(job["id"], {}).get("status")
+
+            if status == "done":
+                done += 1
+            elif status == "failed" or not shard.running():
+                failed += 1
+
+    return done, failed, total
+
+def batchFailures(shards):
+    failures = []
+
+    for shard in shards:
+        results = shard.results()
+
+        for job in shard.jobs:
+            result = results.get(job["id"], {})
+
+            if result.get("status") != "done":
+                failures.append((job["name"], result.get("error", f"Worker crashed, see {shard.log_path}")))
+
+    return failures
+
+"""
+
+Appends the collections of background outputs to the current scene.
+"""
+
+def appendBatchOutputs(context, outputs_list):
+    blend_collections = {}
+
+    for outputs in outputs_list:
+        if outputs.get("blend", "") == "" or not os.path.isfile(outputs["blend"]):
+            continue
+
+        blend_collections.setdefault(outputs["blend"], []).extend(outputs.get("collections", []))
+
+    appended = []
+
+    for blend_path, collection_names in blend_collections.items():
+        if len(collection_names) == 0:
+            continue
+
+        with bpy.data.libraries.load(blend_path, link=False) as (data_from, data_to):
+            data_to.collections = [name for name in data_from.collections if name in collection_names]
+
+        for coll in data_to.collections:
+            if coll == None:
+                continue
+
+            context.scene.collection.children.link(coll)
+            appended.append(coll)
+
+    return appended
+
+"""
+
+genoutfit.exe results are cached per plugin, keyed by the size and content hash of the plugin file.
+The hash is only recomputed when the size or modification time changed.
+"""
+
+def getOutfitCachePath():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_cache", "genoutfit.json")
+
+def hashFile(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+def outfitCacheKey(plugin_path, gen_folder):
+    return os.path.normcase(os.path.abspath(plugin_path)) + "|" + os.path.normcase(os.path.abspath(gen_folder))
+
+def isOutfitJsonCached(plugin_path, gen_folder, cache):
+    entry = cache.get(outfitCacheKey(plugin_path, gen_folder))
+
+    if entry == None or not all(os.path.isdir(os.path.join(gen_folder, output)) for output in entry["outputs"]):
+        return False
+
+    stat = os.stat(plugin_path)
+
+    if stat.st_size != entry["size"]:
+        return False
+
+    if stat.st_mtime_ns != entry["mtime_ns"]:
+        if hashFile(plugin_path) != entry["sha1"]:
+            return False
+
+        entry["mtime_ns"] = stat.st_mtime_ns
+        writeJsonAtomic(getOutfitCachePath(), cache)
+
+    return True
 
 """
 
 Generate outfit JSON file using genoutfit.exe.
 """
 
-def generateOutfitJson(plugin_path, gen_folder=None):
+def generateOutfitJson(plugin_path, gen_folder=None, use_cache=True):
     if not os.path.isfile(plugin_path):
         return False
     
@@ -104,6 +554,15 @@ def generateOutfitJson(plugin_path, gen_folder=None):
     
     if not os.path.isdir(gen_folder):
         os.makedirs(gen_folder)
+
+    cache_path = getOutfitCachePath()
+    cache = readJson(cache_path) or {}
+
+    if use_cache and isOutfitJsonCached(plugin_path, gen_folder, cache):
+        print(f"Outfit json for {os.path.basename(plugin_path)} is up to date, skipping genoutfit.")
+        return True
+
+    start_time = time.time()
     
     args = [
         os.path.join(addon_folder, "gen_outfit", "genoutfit.exe"),
@@ -112,6 +571,40 @@ def generateOutfitJson(plugin_path, gen_folder=None):
         f"overwrite=true"
     ]
 
-    subprocess.run(args, stdout=subprocess.PIPE, cwd=gen_folder)
+    try:
+        rtn = subprocess.run(args, stdout=subprocess.PIPE, cwd=gen_folder)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"genoutfit failed to run for {os.path.basename(plugin_path)}: {e}")
+        return False
+
+    # A failed run is neither cached nor reported as done
+    if rtn.returncode != 0:
+        print(f"genoutfit exited with code {rtn.returncode} for {os.path.basename(plugin_path)}")
+        return False
+
+    # Plugin folders genoutfit wrote to, the cache entry is only valid while they exist
+    outputs = []
+
+    for f in os.listdir(gen_folder):
+        folder = os.path.join(gen_folder, f)
+
+        if os.path.isdir(folder) and any(entry.stat().st_mtime >= start_time - 1 for entry in os.scandir(folder)):
+            outputs.append(f)
+
+    if len(outputs) == 0:
+        return True
+
+    stat = os.stat(plugin_path)
+    cache[outfitCacheKey(plugin_path, gen_folder)] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha1": hashFile(plugin_path),
+        "outputs": outputs,
+    }
+
+    if not os.path.isdir(os.path.dirname(cache_path)):
+        os.makedirs(os.path.dirname(cache_path))
+
+    writeJsonAtomic(cache_path, cache)
 
-    return True
\ No newline at end of file
+    return True
@@ -0,0 +1,94 @@
+import bpy, sys, json, time, traceback
+
+"""
+
+Background batch import worker.
+Run as: blender -b --python batch_worker.py -- <shard json>
+Imports the jobs of one shard and reports each job to the shard result json.
+The shard .blend file grows with every import, so it is saved every save_every_jobs jobs or save_interval seconds
+and once at the end. Job entries stay marked unsaved until then, BatchShard.results() only counts saved ones.
+With a trace folder set, the whole shard is traced as one session.
+"""
+
+save_every_jobs = 16
+save_interval = 60.0
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:]
+    with open(argv[0]) as f:
+        shard = json.load(f)
+
+    for module_path in shard["module_paths"]:
+        if module_path not in sys.path:
+            sys.path.append(module_path)
+
+    import batch_utils
+    import utils_trace
+
+    if shard.get("trace_dir"):
+        utils_trace.output_folder = shard["trace_dir"]
+
+    bpy.ops.wm.read_homefile(use_empty=True)
+
+    options = batch_utils.BatchImportOptions(shard["options"])
+    result = {"finished": False, "jobs": {}}
+    batch_utils.writeJsonAtomic(shard["result_path"], result)
+
+    with utils_trace.session(f"batch_shard_{shard['index']}"):
+        runShardJobs(shard, options, result)
+
+    result["finished"] = True
+    batch_utils.writeJsonAtomic(shard["result_path"], result)
+
+def runShardJobs(shard, options, result):
+    import batch_utils
+    import utils_trace
+
+    every_jobs = shard.get("save_every_jobs", save_every_jobs)
+    interval = shard.get("save_interval", save_interval)
+    unsaved = []
+    last_save = time.monotonic()
+
+    for job in shard["jobs"]:
+        options.reports.clear()
+        utils_trace.count("jobs")
+
+        try:
+            error, collections = batch_utils.importBatchJob(options, bpy.context, job)
+        except Exception:
+            error = traceback.format_exc()
+            collections = []
+
+        if error != None and len(options.reports) != 0:
+            error = f"{error}: {options.reports[-1][1]}"
+
+        result["jobs"][job["id"]] = {
+            "status": "done" if error == None else "failed",
+            "error": error,
+            "collections": collections,
+            "saved": False,
+        }
+        unsaved.append(job["id"])
+
+        if len(unsaved) >= every_jobs or time.monotonic() - last_save >= interval:
+            saveShard(shard, result, unsaved)
+            last_save = time.monotonic()
+        else:
+            batch_utils.writeJsonAtomic(shard["result_path"], result)
+
+    if len(unsaved) != 0:
+        saveShard(shard, result, unsaved)
+
+def saveShard(shard, result, unsaved):
+    import batch_utils
+
+    # A job is only done once its output is on disk
+    bpy.ops.wm.save_as_mainfile(filepath=shard["blend_path"])
+
+    for job_id in unsaved:
+        result["jobs"][job_id]["saved"] = True
+    unsaved.clear()
+    batch_utils.writeJsonAtomic(shard["result_path"], result)
+
+if __name__ == "__main__":
+    main()
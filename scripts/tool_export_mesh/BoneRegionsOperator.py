@@ -1,8 +1,10 @@
 import bpy
 import utils_bone_regions as ubr
-import BoneRegionsReader
+import utils_common as utils
 import os
 
+BoneRegionsReader = utils.LazyModule('BoneRegionsReader')
+
 def sculpt_regions_enum_items(self, context):
 	items = [(region_name, region_name, "") for region_name in ubr.br_data().sculpt_regions]
 	if len(items) == 0:
@@ -10,6 +12,9 @@ def sculpt_regions_enum_items(self, context):
 
 	return items
 
+def all_sculpt_regions_enum_items(self, context):
+	return [(region, region, region) for region in BoneRegionsReader.__all_sculpt_regions__]
+
 def sculpt_region_sliders_enum_items(self, context):
 	region_name = self.region_name
 	region = ubr.br_data().regions.get(region_name, None)
@@ -45,7 +50,7 @@ class SculptRegionsAddOperator(bpy.types.Operator):
     bl_label = "Add New Slider"
     bl_options = {'REGISTER', 'UNDO'}
 
-    region_name: bpy.props.EnumProperty(name="Region Name", items=[(region, region, region) for region in BoneRegionsReader.__all_sculpt_regions__])
+    region_name: bpy.props.EnumProperty(name="Region Name", items=all_sculpt_regions_enum_items)
     slider_name: bpy.props.StringProperty(name="Slider Name", default="")
     is_zero_to_one: bpy.props.BoolProperty(name="Is Zero To One", default=True)
 
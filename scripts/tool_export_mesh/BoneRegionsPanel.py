@@ -1,5 +1,4 @@
 import bpy
-import BoneRegionsReader
 import numpy as np
 import math
 import os
@@ -8,41 +7,43 @@ from utils_bone_regions import br_data, apply_transform
 
 import utils_bone_regions as ubr
 
+from utils_common import LazyModule
+
+BoneRegionsReader = LazyModule('BoneRegionsReader')
+
 def forward_update(self, context):
 	data = [entry.value for entry_group in bpy.context.scene.br_regions_forward_list for entry in entry_group.entries if entry.name != "NONE"]
 
 	control_matrix = np.array(data).reshape(BoneRegionsReader.__bone_regions_data__.get_input_shape()).T
 
-	result = BoneRegionsReader.__bone_regions_data__._forward(control_matrix)
+	result, changed_bone_ids = BoneRegionsReader.__bone_regions_data__._forward_changed(control_matrix)
 
-	# Change Bone Pose
-	armature:bpy.types.Object = bpy.context.scene.br_driven_armature
-	if armature is None:
-			return
-
-	for i, bone_name in enumerate(br_data().bone_names):
-		if bone_name == 'L_Eye':
-			bone:bpy.types.PoseBone = armature.pose.bones.get('Eye.L')
-		elif bone_name == 'R_Eye':
-			bone:bpy.types.PoseBone = armature.pose.bones.get('Eye.R')
-		else:
-			bone:bpy.types.PoseBone = armature.pose.bones.get(bone_name)
-		if bone is not None:
-			apply_transform(result[i], bone)
+	apply_forward_result('PHENOTYPES', result, changed_bone_ids)
 
 def forward_sculpt_update(self, context):
 	data = [entry.value if entry.is_zero_to_one else entry.value_non_z2o for entry_group in bpy.context.scene.br_sculpt_regions_forward_list for entry in entry_group.entries if entry.name != "NONE"]
 
 	slider_values = np.array(data)
 
-	result = BoneRegionsReader.__bone_regions_data__._forward_sculpt(slider_values)
+	result, changed_bone_ids = BoneRegionsReader.__bone_regions_data__._forward_sculpt_changed(slider_values)
+
+	apply_forward_result('SCULPT', result, changed_bone_ids)
 
-	# Change Bone Pose
+_last_forward_target = [None, None]
+
+def apply_forward_result(source:str, result, bone_ids):
+	# Change Bone Pose, only for the bones the last slider change moved unless the armature or the driving sliders changed
 	armature:bpy.types.Object = bpy.context.scene.br_driven_armature
 	if armature is None:
 		return
-	
-	for i, bone_name in enumerate(br_data().bone_names):
+
+	if _last_forward_target != [source, armature.name]:
+		_last_forward_target[:] = [source, armature.name]
+		bone_ids = np.arange(len(result))
+
+	bone_names = br_data().bone_names
+	for i in bone_ids.tolist():
+		bone_name = bone_names[i]
 		if bone_name == 'L_Eye':
 			bone:bpy.types.PoseBone = armature.pose.bones.get('Eye.L')
 		elif bone_name == 'R_Eye':
@@ -1,9 +1,12 @@
+import os
 import json
 import csv
 import bpy
 
 import numpy as np
 
+import utils_common as utils
+
 
 __all_sculpt_regions__ = [
     'Mouth',
@@ -106,11 +109,11 @@ class ControlBone:
             }
         }
 
-    def to_matrix(self)->np.ndarray:
+    def to_matrix(self, dtype = np.float32)->np.ndarray:
         return np.array([
             self.position_maxima + self.rotation_maxima + self.scale_maxima,
             self.position_minima + self.rotation_minima + self.scale_minima
-        ], dtype=np.float32)
+        ], dtype=dtype)
 
     def is_zeros(self, is_maxima:bool):
         if is_maxima:
@@ -126,7 +129,26 @@ class Slider:
         self.id = ID
         self.name = name
         self.is_zero_to_one = is_zero_to_one
-        self.bones:dict[str, ControlBone] = {}
+        self._bones:dict[str, ControlBone] = {}
+        # (bone names, n x 2 x 9 maxima/minima rows) from a snapshot, turned into ControlBones on first access
+        self._packed_bones:tuple[list[str], np.ndarray] = None
+
+    @property
+    def bones(self) -> dict[str, ControlBone]:
+        if self._packed_bones is not None:
+            bone_names, rows = self._packed_bones
+            self._packed_bones = None
+            for bone_name, bone_rows in zip(bone_names, rows):
+                bone = ControlBone(bone_name)
+                bone.set_bone_data(bone_rows[0], True)
+                bone.set_bone_data(bone_rows[1], False)
+                self._bones[bone_name] = bone
+        return self._bones
+
+    @bones.setter
+    def bones(self, bones: dict[str, ControlBone]):
+        self._packed_bones = None
+        self._bones = bones
 
     def add_bone(self, bone: ControlBone, overwrite = False):
         # Check if the bone already exists
@@ -253,28 +275,139 @@ class Region:
         else:
             return self.is_valid()
 
-    def to_matrix(self, bone_names:list[str]) -> np.ndarray:
+    @staticmethod
+    def _slider_matrix(slider: Slider, bone_index: utils.BoneIndex):
+        '''
+            Ids of the slider bones in bone_index, and their 2 x 9 maxima/minima rows
+        '''
+        if slider._packed_bones is not None:
+            bone_names, rows = slider._packed_bones
+        else:
+            bone_names = list(slider.bones.keys())
+            # Double precision, so bone data unpacked from a snapshot exports the same values as the source
+            rows = np.array([bone.to_matrix(np.float64) for bone in slider.bones.values()], dtype=np.float64).reshape(-1, 2, 9)
+        ids = bone_index.lookup(bone_names)
+        if np.any(ids < 0):
+            missing = [name for name, i in zip(bone_names, ids) if i < 0]
+            raise ValueError(f"{missing[0]} is not in bone list")
+        return ids, rows
+
+    def to_matrix(self, bone_index: utils.BoneIndex) -> np.ndarray:
         if self.is_phenotype():
-            slider = self.sliders[""]
-            matrix = np.zeros((len(bone_names), 9), dtype=np.float32)
-            for bone_name, bone in slider.bones.items():
-                index = bone_names.index(bone_name)
-                matrix[index] = bone.to_matrix()[0]
+            matrix = np.zeros((len(bone_index), 9), dtype=np.float32)
+            ids, rows = self._slider_matrix(self.sliders[""], bone_index)
+            matrix[ids] = rows[:, 0]
             return matrix
         elif self.is_sculpt():
-            maxima = np.zeros((len(self.sliders), len(bone_names), 9), dtype=np.float32)
-            minima = np.zeros((len(self.sliders), len(bone_names), 9), dtype=np.float32)
+            maxima = np.zeros((len(self.sliders), len(bone_index), 9), dtype=np.float32)
+            minima = np.zeros((len(self.sliders), len(bone_index), 9), dtype=np.float32)
             for i, slider in enumerate(self.sliders.values()):
-                for bone_name, bone in slider.bones.items():
-                    index = bone_names.index(bone_name)
-                    maxima[i, index] = bone.to_matrix()[0]
-                    minima[i, index] = bone.to_matrix()[1]
+                ids, rows = self._slider_matrix(slider, bone_index)
+                maxima[i, ids] = rows[:, 0]
+                minima[i, ids] = rows[:, 1]
             return maxima, minima
         raise ValueError("Region is not a phenotype")
 
 import functools
 
+class SparseRegionTensor:
+    '''
+        Compressed rows of a n_rows x n_bones x n_channels x 9 tensor, every row (phenotype or slider) keeps only the bones it moves.
+        Row i covers bone_ids[row_ptr[i]:row_ptr[i+1]] and values[row_ptr[i]:row_ptr[i+1]].
+    '''
+    def __init__(self, n_bones: int, row_ptr: np.ndarray, bone_ids: np.ndarray, values: np.ndarray) -> None:
+        self.n_bones = n_bones
+        self.row_ptr = row_ptr
+        self.bone_ids = bone_ids
+        self.values = values
+
+    @staticmethod
+    def from_sliders(sliders: list[Slider], bone_index: utils.BoneIndex, n_channels: int):
+        row_ptr = [0]
+        bone_ids = []
+        values = []
+        for slider in sliders:
+            ids, rows = Region._slider_matrix(slider, bone_index)
+            bone_ids.append(ids)
+            values.append(rows[:, :n_channels])
+            row_ptr.append(row_ptr[-1] + len(ids))
+        if len(values) == 0:
+            return SparseRegionTensor(len(bone_index), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, n_channels, 9), dtype=np.float64))
+        return SparseRegionTensor(len(bone_index), np.array(row_ptr, dtype=np.int64), np.concatenate(bone_ids).astype(np.int64), np.concatenate(values).astype(np.float64))
+
+    def __len__(self):
+        return len(self.row_ptr) - 1
+
+    def row(self, i: int):
+        start, end = self.row_ptr[i], self.row_ptr[i + 1]
+        return self.bone_ids[start:end], self.values[start:end]
+
+    @property
+    def entry_rows(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self)), np.diff(self.row_ptr))
+
+    def to_dense(self) -> np.ndarray:
+        dense = np.zeros((len(self), self.n_bones) + self.values.shape[1:], dtype=self.values.dtype)
+        dense[self.entry_rows, self.bone_ids] = self.values
+        return dense
+
+    def to_arrays(self, prefix: str) -> dict:
+        return {
+            f'{prefix}_shape': np.array([self.n_bones]),
+            f'{prefix}_row_ptr': self.row_ptr,
+            f'{prefix}_bone_ids': self.bone_ids,
+            f'{prefix}_values': self.values,
+        }
+
+    @staticmethod
+    def from_arrays(arrays, prefix: str):
+        return SparseRegionTensor(int(arrays[f'{prefix}_shape'][0]), arrays[f'{prefix}_row_ptr'], arrays[f'{prefix}_bone_ids'], arrays[f'{prefix}_values'])
+
+class SparseEvaluator:
+    '''
+        Keeps the last inputs and result of a sparse tensor evaluation, so a changed input row only updates the bones of that row.
+            contribution(row, bone_ids, values, row_input) -> len(bone_ids) x 9
+    '''
+    def __init__(self, tensor: SparseRegionTensor, contribution) -> None:
+        self.tensor = tensor
+        self.contribution = contribution
+        self.inputs: np.ndarray = None
+        self.result = np.zeros((tensor.n_bones, 9), dtype=np.float64)
+
+    def evaluate(self, inputs: np.ndarray):
+        '''
+            return: n_bones x 9 result, ids of the bones whose result changed
+        '''
+        inputs = np.array(inputs, dtype=np.float64)
+        if self.inputs is None or self.inputs.shape != inputs.shape:
+            changed_rows = np.arange(len(self.tensor))
+            self.result[:] = 0
+            previous = None
+        else:
+            changed = inputs != self.inputs
+            changed_rows = np.flatnonzero(changed.reshape(len(changed), -1).any(axis=1))
+            previous = self.inputs
+
+        touched = []
+        for row in changed_rows.tolist():
+            bone_ids, values = self.tensor.row(row)
+            if len(bone_ids) == 0:
+                continue
+            delta = self.contribution(row, bone_ids, values, inputs[row])
+            if previous is not None:
+                delta = delta - self.contribution(row, bone_ids, values, previous[row])
+            np.add.at(self.result, bone_ids, delta)
+            touched.append(bone_ids)
+
+        self.inputs = inputs
+        if previous is None:
+            return self.result, np.arange(self.tensor.n_bones)
+        touched = np.unique(np.concatenate(touched)) if len(touched) != 0 else np.zeros(0, dtype=np.int64)
+        return self.result, touched
+
 class BoneRegions:
+    snapshot_version = 2
+
     def __init__(self) -> None:
         self.constraints = None
         self.regions:dict[str, Region] = {}
@@ -284,41 +417,145 @@ class BoneRegions:
         self.phenotypes:list[str] = []
         self.sculpt_regions:list[str] = []
         self._BR_tensor:np.ndarray = None
+        # Source files while the data still matches them, the snapshot next to them is then kept up to date
+        self._source_files:tuple[str, str] = None
+
+    @functools.cached_property
+    def bone_index(self) -> utils.BoneIndex:
+        return utils.BoneIndex(self.bone_names)
 
     @functools.cached_property 
-    def _Pheno_tensor(self):
+    def _Pheno_tensor(self) -> SparseRegionTensor:
         '''
-            n_bones x n_phenotypes x 9
+            n_phenotypes rows of n_bones x 2 (maxima, minima) x 9, only maxima are evaluated
         '''
         if self.is_emtpy():
             return None
-        arr = np.array([self.regions[phenotype].to_matrix(self.bone_names) for phenotype in self.phenotypes])
-        
-        arr = np.swapaxes(arr, 0, 1)
-
-        return arr
+        return self._compiled_tensors()[0]
 
     @functools.cached_property
-    def _Sculpt_tensor(self):
+    def _Sculpt_tensor(self) -> SparseRegionTensor:
         '''
-            maxima = all_sliders x n_bones x 9
-            minima = all_sliders x n_bones x 9
+            all_sliders rows of n_bones x 2 (maxima, minima) x 9
         '''
         if self.is_emtpy():
             return None
-        maxima = []
-        minima = []
-        for region in self.sculpt_regions:
-            maxima_region, minima_region = self.regions[region].to_matrix(self.bone_names)
-            maxima.append(maxima_region)
-            minima.append(minima_region)
+        return self._compiled_tensors()[1]
+
+    @functools.cached_property
+    def _pheno_evaluator(self) -> SparseEvaluator:
+        BR_matrix = self._BR_tensor[:, :, 0]
+        def contribution(row, bone_ids, values, region_weights):
+            return values[:, 0] * (BR_matrix[bone_ids] @ region_weights)[:, np.newaxis]
+        return SparseEvaluator(self._Pheno_tensor, contribution)
+
+    @functools.cached_property
+    def _sculpt_evaluator(self) -> SparseEvaluator:
+        def contribution(row, bone_ids, values, slider_value):
+            return values[:, 0] * max(slider_value, 0) - values[:, 1] * min(slider_value, 0)
+        return SparseEvaluator(self._Sculpt_tensor, contribution)
+
+    def _pheno_sliders(self) -> list[Slider]:
+        return [self.regions[phenotype].sliders[""] for phenotype in self.phenotypes]
 
-        maxima = np.concatenate(maxima, axis=0)
-        minima = np.concatenate(minima, axis=0)
-        return maxima, minima
+    def _sculpt_sliders(self) -> list[Slider]:
+        return [slider for region in self.sculpt_regions for slider in self.regions[region].sliders.values()]
+
+    def _compiled_tensors(self):
+        if '_compiled' not in self.__dict__:
+            self.__dict__['_compiled'] = SparseRegionTensor.from_sliders(self._pheno_sliders(), self.bone_index, 2), SparseRegionTensor.from_sliders(self._sculpt_sliders(), self.bone_index, 2)
+        return self.__dict__['_compiled']
+
+    def _invalidate_tensors(self, pheno = True, sculpt = True, bones = False):
+        # Edited data no longer matches the source files
+        self._source_files = None
+        for name in ['_compiled'] + (['_Pheno_tensor', '_pheno_evaluator'] if pheno else []) + (['_Sculpt_tensor', '_sculpt_evaluator'] if sculpt else []) + (['bone_index'] if bones else []):
+            self.__dict__.pop(name, None)
+
+    def _snapshot_path(self) -> str:
+        return self._source_files[0] + '.compiled.npz'
+
+    def _source_stamp(self) -> np.ndarray:
+        stats = [os.stat(path) for path in self._source_files]
+        return np.array([self.snapshot_version] + [v for stat in stats for v in (stat.st_size, stat.st_mtime_ns)], dtype=np.int64)
+
+    def _save_snapshot(self):
+        '''
+            Binary snapshot of the parsed regions next to the source files: the region and slider layout as json,
+            the bone mapping and the compiled sparse tensors, which also hold the bone data of every slider.
+        '''
+        try:
+            compiled = self._compiled_tensors()
+        except ValueError as e:
+            print(f"Bone regions snapshot skipped: {e}")
+            return
+        meta = {
+            'Constraints': self.constraints,
+            'BoneNames': self.bone_names,
+            'FaceRegionNames': self.pheno_face_region_names,
+            'LastID': self.id_recorder.id,
+            'Regions': [{
+                'ID': region.id,
+                'Name': region.name,
+                'SculptRegion': region.is_sculpt_region,
+                'SlidersA': [{'ID': slider.id, 'Name': slider.name, 'ZeroToOne': slider.is_zero_to_one} for slider in region.sliders.values()]
+            } for region in self.regions.values()]
+        }
+        arrays = {'source_stamp': self._source_stamp(), 'meta': np.array(json.dumps(meta)), 'BR_matrix': self._BR_tensor[:, :, 0]}
+        arrays.update(compiled[0].to_arrays('pheno'))
+        arrays.update(compiled[1].to_arrays('sculpt'))
+
+        snapshot_path = self._snapshot_path()
+        try:
+            with open(snapshot_path + '.tmp', 'wb') as file:
+                np.savez(file, **arrays)
+            os.replace(snapshot_path + '.tmp', snapshot_path)
+        except OSError as e:
+            print(f"Could not write bone regions snapshot {snapshot_path}: {e}")
+
+    def _load_snapshot(self) -> bool:
+        try:
+            with np.load(self._snapshot_path()) as arrays:
+                if not np.array_equal(arrays['source_stamp'], self._source_stamp()):
+                    return False
+                meta = json.loads(str(arrays['meta']))
+                BR_matrix = arrays['BR_matrix']
+                pheno = SparseRegionTensor.from_arrays(arrays, 'pheno')
+                sculpt = SparseRegionTensor.from_arrays(arrays, 'sculpt')
+        except (OSError, KeyError, ValueError):
+            return False
+
+        self.constraints = meta['Constraints']
+        self.bone_names = meta['BoneNames']
+        self.pheno_face_region_names = meta['FaceRegionNames']
+        self._BR_tensor = BR_matrix[:, :, np.newaxis]
+        for region_data in meta['Regions']:
+            region = Region(region_data['ID'], region_data['Name'], region_data['SculptRegion'])
+            self.id_recorder.set_id(region.id)
+            for slider_data in region_data['SlidersA']:
+                region.add_slider(Slider(slider_data['ID'], slider_data['Name'], slider_data['ZeroToOne']))
+                self.id_recorder.set_id(slider_data['ID'])
+            self.regions[region.name] = region
+            if region.is_phenotype():
+                self.phenotypes.append(region.name)
+            else:
+                self.sculpt_regions.append(region.name)
+        self.id_recorder.set_id(meta['LastID'])
+
+        # Slider bones stay packed until edited, the tensors are used as they are
+        for tensor, sliders in ((pheno, self._pheno_sliders()), (sculpt, self._sculpt_sliders())):
+            for i, slider in enumerate(sliders):
+                bone_ids, values = tensor.row(i)
+                slider._packed_bones = ([self.bone_names[j] for j in bone_ids.tolist()], values)
+        self.__dict__['_compiled'] = pheno, sculpt
+        return True
 
     def import_from_file(self, bone_regions_file: str, bone_regions_mapping_file:str) -> None:
         self.clear()
+        self._source_files = (os.path.abspath(bone_regions_file), os.path.abspath(bone_regions_mapping_file))
+        if self._load_snapshot():
+            return
+
         data = None
         with open(bone_regions_file, 'r') as file:
             data = json.load(file)
@@ -348,6 +585,8 @@ class BoneRegions:
             else:
                 print(f"Region {region.name} is neither a phenotype nor a sculpt region")
 
+        self._save_snapshot()
+
     def export_to_file(self, file_path: str) -> None:
         data = {
             'Constraints': self.constraints,
@@ -446,24 +685,35 @@ class BoneRegions:
             control_matrix: n_phenos x n_regions
             return: n_bones x 9
         '''
-        return np.sum(np.einsum("ijk,jl->ilk", self._Pheno_tensor, control_matrix) * self._BR_tensor, axis=1)
+        return self._forward_changed(control_matrix)[0].copy()
+
+    def _forward_changed(self, control_matrix:np.ndarray):
+        '''
+            control_matrix: n_phenos x n_regions
+            return: n_bones x 9, ids of the bones changed since the last evaluation
+        '''
+        return self._pheno_evaluator.evaluate(control_matrix)
 
     def _forward_sculpt(self, slider_value_vector:np.ndarray):
         '''
             slider_value_vector: all_sliders
             return: n_bones x 9
         '''
-        positive = slider_value_vector.clip(min=0)
-        negative = slider_value_vector.clip(max=0)
-        return np.einsum('ijk,i->jk', self._Sculpt_tensor[0], positive) - np.einsum('ijk,i->jk', self._Sculpt_tensor[1], negative)
+        return self._forward_sculpt_changed(slider_value_vector)[0].copy()
+
+    def _forward_sculpt_changed(self, slider_value_vector:np.ndarray):
+        '''
+            slider_value_vector: all_sliders
+            return: n_bones x 9, ids of the bones changed since the last evaluation
+        '''
+        return self._sculpt_evaluator.evaluate(slider_value_vector)
 
     def AddPhenotype(self, phenotype_name:str):
         if phenotype_name not in self.regions:
             self.new_region(phenotype_name, False)
             self.new_slider(phenotype_name, "", True)
             self.phenotypes.append(phenotype_name)
-            if hasattr(self, "_Pheno_tensor"):
-                del self._Pheno_tensor
+            self._invalidate_tensors(sculpt=False)
         else:
             print(f"Phenotype {phenotype_name} already exists")
         return self.regions[phenotype_name]
@@ -471,6 +721,7 @@ class BoneRegions:
     def RemovePhenotype(self, phenotype_name:str):
         if phenotype_name in self.phenotypes:
             self.phenotypes.remove(phenotype_name)
+            self._invalidate_tensors(sculpt=False)
         return self.remove_region(phenotype_name)
 
     def SetPhenotype(self, phenotype_name:str, bone_data:dict, additive = False):
@@ -484,8 +735,7 @@ class BoneRegions:
         if pheno_slider is None:
             return False
         
-        if hasattr(self, "_Pheno_tensor"):
-            del self._Pheno_tensor
+        self._invalidate_tensors(sculpt=False)
 
         pheno_slider.set_bone_data(bone_data, True, additive)
         return True
@@ -496,12 +746,12 @@ class BoneRegions:
             if not create_region_if_not_exists:
                 return None
             region = self.new_region(region_name, True)
-        if hasattr(self, "_Sculpt_tensor"):
-            del self._Sculpt_tensor
+        self._invalidate_tensors(pheno=False, bones=True)
         slider = self.new_slider(region_name, slider_name, is_zero_to_one)
         return slider
     
     def RemoveSculptRegion(self, region_name:str, slider_name:str):
+        self._invalidate_tensors(pheno=False)
         return self.remove_slider(region_name, slider_name)
 
     def SetSculptRegionSlider(self, region_name:str, slider_name:str, bone_data:dict, is_maxima:bool, additive = False):
@@ -511,8 +761,7 @@ class BoneRegions:
         slider = self.get_slider(region_name, slider_name)
         if slider is None:
             return False
-        if hasattr(self, "_Sculpt_tensor"):
-            del self._Sculpt_tensor
+        self._invalidate_tensors(pheno=False, bones=True)
         slider.set_bone_data(bone_data, is_maxima, additive)
         return True
 
@@ -534,10 +783,7 @@ class BoneRegions:
         self.phenotypes.clear()
         self.sculpt_regions.clear()
         self._BR_tensor = None
-        if hasattr(self, "_Pheno_tensor"):
-            del self._Pheno_tensor
-        if hasattr(self, "_Sculpt_tensor"):
-            del self._Sculpt_tensor
+        self._invalidate_tensors(bones=True)
 
     def get_input_shape(self):
         return len(self.phenotypes), len(self.pheno_face_region_names)
@@ -562,4 +808,4 @@ if __name__ == "__main__":
 
     print(bone_regions.phenotypes[0])
     for bone_name in bone_regions.bone_names:
-        print(f"{bone_name}: {result[bone_regions.bone_names.index(bone_name)][3:6]}")
\ No newline at end of file
+        print(f"{bone_name}: {result[bone_regions.bone_index.id(bone_name)][3:6]}")
\ No newline at end of file
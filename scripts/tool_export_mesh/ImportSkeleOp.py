@@ -5,7 +5,7 @@ from bpy.types import Context
 import nif_armature
 
 def get_skeleton_names(self, context):
-    nif_armature.LoadAllSkeletonLookup()
+    nif_armature.EnsureSkeletonLookup()
     skel_names = nif_armature.GetAvailableSkeletonNames()
     if len(skel_names) == 0:
         return [("NONE", "None", "None")]
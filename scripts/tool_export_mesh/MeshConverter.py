@@ -2,98 +2,123 @@ import ctypes
 import os
 import json
 import numpy as np
-
-# Load the DLL
-_dll = ctypes.CDLL(os.path.join(os.path.dirname(__file__),'MeshConverter.dll'))
-print("Loaded DLL from: ", os.path.join(os.path.dirname(__file__),'MeshConverter.dll'))
-print(_dll)
-# Define the function signature
-_dll_export_mesh = _dll.ExportMesh
-_dll_export_mesh.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_float, ctypes.c_bool, ctypes.c_bool, ctypes.c_bool]
-
-_dll_export_mesh_numpy = _dll.ExportMeshNumpy
-_dll_export_mesh_numpy.argtypes = [
-    ctypes.c_char_p, 
-    ctypes.c_char_p,
-    ctypes.POINTER(ctypes.c_float), # ptr_positions
-    ctypes.POINTER(ctypes.c_int64), # ptr_indices
-    ctypes.POINTER(ctypes.c_float), # ptr_normals
-    ctypes.POINTER(ctypes.c_float), # ptr_uv1
-    ctypes.POINTER(ctypes.c_float), # ptr_uv2
-    ctypes.POINTER(ctypes.c_float), # ptr_color
-    ctypes.POINTER(ctypes.c_float), # ptr_tangents
-    ctypes.POINTER(ctypes.c_int32), # ptr_bitangent_signs
-    ]
-
-_dll_export_morph = _dll.ExportMorph
-_dll_export_morph.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
-
-_dll_export_morph_numpy = _dll.ExportMorphNumpy
-_dll_export_morph_numpy.argtypes = [
-    ctypes.c_char_p, 
-    ctypes.c_char_p, 
-    ctypes.POINTER(ctypes.c_float), 
-    ctypes.POINTER(ctypes.c_float), 
-    ctypes.POINTER(ctypes.c_float), 
-    ctypes.POINTER(ctypes.c_float),
-    ]
-
-_dll_export_empty_morph = _dll.ExportEmptyMorph
-_dll_export_empty_morph.argtypes = [ctypes.c_uint32, ctypes.c_char_p]
-
-_dll_export_nif = _dll.CreateNif
-_dll_export_nif.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p]
-
-_dll_import_nif = _dll.ImportNif
-_dll_import_nif.argtypes = [ctypes.c_char_p, ctypes.c_bool, ctypes.c_char_p]
-_dll_import_nif.restype = ctypes.c_char_p
-
-_dll_edit_nif_bsgeometries = _dll.EditNifBSGeometries
-_dll_edit_nif_bsgeometries.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_bool]
-
-_dll_import_mesh = _dll.ImportMesh
-_dll_import_mesh.argtypes = [ctypes.c_char_p]
-_dll_import_mesh.restype = ctypes.c_char_p
-
-_dll_import_morph = _dll.ImportMorph
-_dll_import_morph.argtypes = [ctypes.c_char_p]
-_dll_import_morph.restype = ctypes.c_char_p
-
-_dll_import_morph_header = _dll.ImportMorphHeader
-_dll_import_morph_header.argtypes = [ctypes.c_char_p]
-_dll_import_morph_header.restype = ctypes.c_char_p
-
-_dll_import_morph_numpy = _dll.ImportMorphNumpy
-_dll_import_morph_numpy.argtypes = [
-    ctypes.c_char_p, # morph file path
-    ctypes.POINTER(ctypes.c_float), # delta_pos
-    ctypes.POINTER(ctypes.c_float), # target_colors
-    ctypes.POINTER(ctypes.c_float), # delta_norm
-    ctypes.POINTER(ctypes.c_float), # delta_tangent
-    ]
-
-
-_dll_import_mesh_header = _dll.ImportMeshHeader
-_dll_import_mesh_header.argtypes = [ctypes.c_char_p]
-_dll_import_mesh_header.restype = ctypes.c_char_p
-
-_dll_import_mesh_numpy = _dll.ImportMeshNumpy
-_dll_import_mesh_numpy.argtypes = [
-    ctypes.c_char_p, # morph file path
-    ctypes.POINTER(ctypes.c_float), # ptr_positions
-    ctypes.POINTER(ctypes.c_int32), # ptr_indices
-    ctypes.POINTER(ctypes.c_float), # ptr_normals
-    ctypes.POINTER(ctypes.c_float), # ptr_uv1
-    ctypes.POINTER(ctypes.c_float), # ptr_uv2
-    ctypes.POINTER(ctypes.c_float), # ptr_color
-    ctypes.POINTER(ctypes.c_float), # ptr_tangents
-    ctypes.POINTER(ctypes.c_int32), # ptr_bitangent_signs
-    ctypes.POINTER(ctypes.c_float), # ptr_weights
-    ctypes.POINTER(ctypes.c_int32), # ptr_bone_indices
-    ]
-
-_dll_compose_physics_data = _dll.ComposePhysicsData
-_dll_compose_physics_data.argtypes = [ctypes.c_char_p, ctypes.c_uint32, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_bool]
+from functools import wraps
+
+_dll = None
+
+def LoadDll():
+    '''
+    Loads MeshConverter.dll and declares the function signatures. Called on the first converter call
+    instead of at import, so enabling the add-on doesn't load the dll.
+    '''
+    global _dll, _dll_export_mesh, _dll_export_mesh_numpy, _dll_export_morph, _dll_export_morph_numpy, _dll_export_empty_morph, _dll_export_nif, _dll_import_nif, _dll_edit_nif_bsgeometries, _dll_import_mesh, _dll_import_morph, _dll_import_morph_header, _dll_import_morph_numpy, _dll_import_mesh_header, _dll_import_mesh_numpy, _dll_compose_physics_data
+    if _dll is not None:
+        return _dll
+
+    dll = ctypes.CDLL(os.path.join(os.path.dirname(__file__),'MeshConverter.dll'))
+    print("Loaded DLL from: ", os.path.join(os.path.dirname(__file__),'MeshConverter.dll'))
+    print(dll)
+    # Define the function signature
+    _dll_export_mesh = dll.ExportMesh
+    _dll_export_mesh.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_float, ctypes.c_bool, ctypes.c_bool, ctypes.c_bool]
+
+    _dll_export_mesh_numpy = dll.ExportMeshNumpy
+    _dll_export_mesh_numpy.argtypes = [
+        ctypes.c_char_p, 
+        ctypes.c_char_p,
+        ctypes.POINTER(ctypes.c_float), # ptr_positions
+        ctypes.POINTER(ctypes.c_int64), # ptr_indices
+        ctypes.POINTER(ctypes.c_float), # ptr_normals
+        ctypes.POINTER(ctypes.c_float), # ptr_uv1
+        ctypes.POINTER(ctypes.c_float), # ptr_uv2
+        ctypes.POINTER(ctypes.c_float), # ptr_color
+        ctypes.POINTER(ctypes.c_float), # ptr_tangents
+        ctypes.POINTER(ctypes.c_int32), # ptr_bitangent_signs
+        ]
+
+    _dll_export_morph = dll.ExportMorph
+    _dll_export_morph.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
+
+    _dll_export_morph_numpy = dll.ExportMorphNumpy
+    _dll_export_morph_numpy.argtypes = [
+        ctypes.c_char_p, 
+        ctypes.c_char_p, 
+        ctypes.POINTER(ctypes.c_float), 
+        ctypes.POINTER(ctypes.c_float), 
+        ctypes.POINTER(ctypes.c_float), 
+        ctypes.POINTER(ctypes.c_float),
+        ]
+
+    _dll_export_empty_morph = dll.ExportEmptyMorph
+    _dll_export_empty_morph.argtypes = [ctypes.c_uint32, ctypes.c_char_p]
+
+    _dll_export_nif = dll.CreateNif
+    _dll_export_nif.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p]
+
+    _dll_import_nif = dll.ImportNif
+    _dll_import_nif.argtypes = [ctypes.c_char_p, ctypes.c_bool, ctypes.c_char_p]
+    _dll_import_nif.restype = ctypes.c_char_p
+
+    _dll_edit_nif_bsgeometries = dll.EditNifBSGeometries
+    _dll_edit_nif_bsgeometries.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_bool]
+
+    _dll_import_mesh = dll.ImportMesh
+    _dll_import_mesh.argtypes = [ctypes.c_char_p]
+    _dll_import_mesh.restype = ctypes.c_char_p
+
+    _dll_import_morph = dll.ImportMorph
+    _dll_import_morph.argtypes = [ctypes.c_char_p]
+    _dll_import_morph.restype = ctypes.c_char_p
+
+    _dll_import_morph_header = dll.ImportMorphHeader
+    _dll_import_morph_header.argtypes = [ctypes.c_char_p]
+    _dll_import_morph_header.restype = ctypes.c_char_p
+
+    _dll_import_morph_numpy = dll.ImportMorphNumpy
+    _dll_import_morph_numpy.argtypes = [
+        ctypes.c_char_p, # morph file path
+        ctypes.POINTER(ctypes.c_float), # delta_pos
+        ctypes.POINTER(ctypes.c_float), # target_colors
+        ctypes.POINTER(ctypes.c_float), # delta_norm
+        ctypes.POINTER(ctypes.c_float), # delta_tangent
+        ]
+
+
+    _dll_import_mesh_header = dll.ImportMeshHeader
+    _dll_import_mesh_header.argtypes = [ctypes.c_char_p]
+    _dll_import_mesh_header.restype = ctypes.c_char_p
+
+    _dll_import_mesh_numpy = dll.ImportMeshNumpy
+    _dll_import_mesh_numpy.argtypes = [
+        ctypes.c_char_p, # morph file path
+        ctypes.POINTER(ctypes.c_float), # ptr_positions
+        ctypes.POINTER(ctypes.c_int32), # ptr_indices
+        ctypes.POINTER(ctypes.c_float), # ptr_normals
+        ctypes.POINTER(ctypes.c_float), # ptr_uv1
+        ctypes.POINTER(ctypes.c_float), # ptr_uv2
+        ctypes.POINTER(ctypes.c_float), # ptr_color
+        ctypes.POINTER(ctypes.c_float), # ptr_tangents
+        ctypes.POINTER(ctypes.c_int32), # ptr_bitangent_signs
+        ctypes.POINTER(ctypes.c_float), # ptr_weights
+        ctypes.POINTER(ctypes.c_int32), # ptr_bone_indices
+        ]
+
+    _dll_compose_physics_data = dll.ComposePhysicsData
+    _dll_compose_physics_data.argtypes = [ctypes.c_char_p, ctypes.c_uint32, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_bool]
+
+    _dll = dll
+    return _dll
+
+def IsDllLoaded() -> bool:
+    return _dll is not None
+
+def _uses_dll(f):
+    @wraps(f)
+    def wrap(*args, **kw):
+        if _dll is None:
+            LoadDll()
+        return f(*args, **kw)
+    return wrap
 
 
 from enum import Enum
@@ -182,10 +207,12 @@ def _check_numpy_type_and_size(np_mat: np.ndarray | None, np_type, size, allow_n
         return np_mat.ctypes.data_as(ctypes.POINTER(_np_types_to_ctypes[np_type]))
     
 
+@_uses_dll
 def ExportMeshFromJson(json_data_string: str, output_file: str, max_border: float, smooth_edge_normal: bool, normalize_weights: bool, do_optimization: bool) -> DLLReturnCode:
     rtn = _dll_export_mesh(json_data_string.encode('utf-8'), output_file.encode('utf-8'), max_border, smooth_edge_normal, normalize_weights, do_optimization)
     return DLLReturnCode(rtn)
 
+@_uses_dll
 def ExportMeshFromNumpy(numpy_dict: dict, output_file: str) -> DLLReturnCode:
     header_dict = {key:value for key, value in numpy_dict.items() if not isinstance(value, np.ndarray)}
     header_json_str = json.dumps(header_dict)
@@ -213,10 +240,12 @@ def ExportMeshFromNumpy(numpy_dict: dict, output_file: str) -> DLLReturnCode:
         )
     return DLLReturnCode(rtn)
 
+@_uses_dll
 def ExportMorphFromJson(json_data_string: str, output_file: str) -> DLLReturnCode:
     rtn = _dll_export_morph(json_data_string.encode('utf-8'), output_file.encode('utf-8'))
     return DLLReturnCode(rtn)
 
+@_uses_dll
 def ExportMorphFromNumpy(numpy_dict: dict, output_file: str) -> DLLReturnCode:
     if not output_file.endswith('.dat'):
         output_file += '.dat'
@@ -242,17 +271,21 @@ def ExportMorphFromNumpy(numpy_dict: dict, output_file: str) -> DLLReturnCode:
         )
     return DLLReturnCode(rtn)
 
+@_uses_dll
 def ExportEmptyMorphFromJson(num_vertices: int, output_file: str) -> DLLReturnCode:
     rtn = _dll_export_empty_morph(num_vertices, output_file.encode('utf-8'))
     return DLLReturnCode(rtn)
 
+@_uses_dll
 def EditNifBSGeometries(base_nif_path: str, json_data_string: str, output_file: str, assets_folder: str, edit_mat_path: bool = False) -> DLLReturnCode:
     rtn = _dll_edit_nif_bsgeometries(base_nif_path.encode('utf-8'), json_data_string.encode('utf-8'), output_file.encode('utf-8'), assets_folder.encode('utf-8'), edit_mat_path)
     return DLLReturnCode(rtn)
 
+@_uses_dll
 def ImportMeshAsJson(input_file: str) -> str:
     return _dll_import_mesh(input_file.encode('utf-8')).decode('utf-8')
 
+@_uses_dll
 def ImportMeshAsNumpy(input_file: str) -> dict:
     mesh_header_json_str = _dll_import_mesh_header(input_file.encode('utf-8')).decode('utf-8')
     mesh_header = json.loads(mesh_header_json_str)
@@ -312,9 +345,11 @@ def ImportMeshAsNumpy(input_file: str) -> dict:
         "bone_indices": bone_indices
     }
 
+@_uses_dll
 def ImportMorphAsJson(input_file: str) -> str:
     return _dll_import_morph(input_file.encode('utf-8')).decode('utf-8')
 
+@_uses_dll
 def ImportMorphAsNumpy(input_file: str, base_vert_bytecolor: int = 0) -> dict:
     morph_header_json_str = _dll_import_morph_header(input_file.encode('utf-8')).decode('utf-8')
     morph_header = json.loads(morph_header_json_str)
@@ -349,6 +384,7 @@ def ImportMorphAsNumpy(input_file: str, base_vert_bytecolor: int = 0) -> dict:
         "deltaTangents": delta_tangent
     }
 
+@_uses_dll
 def CreateNifFromJson(json_data_string: str, output_file: str, assets_folder_path: str) -> DLLReturnCode:
     # Check output_file extension
     if not output_file.endswith('.nif'):
@@ -357,12 +393,14 @@ def CreateNifFromJson(json_data_string: str, output_file: str, assets_folder_pat
     rtn = _dll_export_nif(json_data_string.encode('utf-8'), output_file.encode('utf-8'), assets_folder_path.encode('utf-8'))
     return DLLReturnCode(rtn)
 
+@_uses_dll
 def ImportNifAsJson(input_file: str, export_havok_readable: bool = False, readable_path: str = '') -> str:
     return _dll_import_nif(input_file.encode('utf-8'), export_havok_readable, readable_path.encode('utf-8')).decode('utf-8')
 
 def GetTranscriptPath() -> str:
     return os.path.abspath(os.path.join(os.path.dirname(__file__), 'Assets', 'hkTypeTranscript', 'hkTypeTranscript.json'))
 
+@_uses_dll
 def ComposePhysicsDataFromJson(json_data_string: str, platform: Platform, output_binary_path: str, export_readable: bool = False) -> DLLReturnCode:
     transcript_path = GetTranscriptPath()
     rtn = _dll_compose_physics_data(json_data_string.encode('utf-8'), int(platform.value), transcript_path.encode('utf-8'), output_binary_path.encode('utf-8'), export_readable)
@@ -83,6 +83,7 @@ class ExportSFMeshPanel(bpy.types.Panel):
 		layout.label(text="After Export:") 
 		layout.prop(context.scene, "export_sf_mesh_open_folder", text="Open export folder")
 		layout.prop(context.scene, "export_sf_mesh_hash_result", text="Hash file name")
+		layout.prop(context.scene, "export_sf_mesh_collect_garbage", text="Remove unreferenced meshes")
 		# Button to export the selected skeleton
 		layout.operator("object.advanced_morph_edit_create", text = "Advanced Morph Edit")
 		layout.operator("export_scene.sfmesh", text = "Export .mesh")
@@ -126,6 +127,12 @@ __scene_global_attrs__ = {
 		description="Export into [hex1]\\[hex2].mesh instead of [model_name].mesh",
 		default=False,
 	),
+	"export_sf_mesh_collect_garbage": utils.__prop_wrapper(
+		bpy.props.BoolProperty,
+		name="Remove unreferenced meshes",
+		description="After export, delete hash named .mesh files this exporter stored in the export folder that none of its exports reference anymore. Files from older exports are kept",
+		default=False,
+	),
 	"use_secondary_uv": utils.__prop_wrapper(
 		bpy.props.BoolProperty,
 		name="Use Secondary UV",
@@ -13,10 +13,28 @@ import utils_math
 import MeshConverter
 
 import utils_primitive
+import utils_trace
+import utils_mesh_store
 
 import time
 
 def MeshToJson(obj, options, bone_list_filter = None, prune_empty_vertex_groups = False, head_object_mode = 'None', ref_objects = []):
+	rtn, message, variants, matrices = MeshToJsonVariants(obj, options, bone_list_filter, prune_empty_vertex_groups, [head_object_mode], ref_objects)
+	return rtn, message, variants[0] if variants else None, matrices
+
+def _HeadObjectMerge(obj, head_object_mode):
+	# Vertex groups merged into another one for a head object mode, as (source names, target name)
+	if head_object_mode == 'Base':
+		return [vg.name for vg in obj.vertex_groups if vg.name.startswith("faceBone_")], "C_Head"
+	return [], ''
+
+@utils_trace.traced('MeshToJson')
+def MeshToJsonVariants(obj, options, bone_list_filter = None, prune_empty_vertex_groups = False, head_object_modes = ['None'], ref_objects = []):
+	'''
+	MeshToJson for several head object modes at once. The primitive is gathered once with the first mode,
+	the other modes only gather their weights again, the variants share everything else including the matrices.
+	Returns the data of every mode in the order of head_object_modes.
+	'''
 	start_time = time.time()
 	
 	if not (obj and obj.type == 'MESH'):
@@ -49,7 +67,7 @@ def MeshToJson(obj, options, bone_list_filter = None, prune_empty_vertex_groups
 
 		rtn, reason = utils_primitive.CheckForPrimitive(new_obj, gather_tangents=False)
 		if not rtn:
-			return {'CANCELLED'},  f"Object {obj.name} is not a valid object. Reason: {reason}"
+			return {'CANCELLED'},  f"Object {obj.name} is not a valid object. Reason: {reason}", None, None
 		
 		if options.use_secondary_uv:
 			uv_layer = obj.data.uv_layers.active
@@ -58,10 +76,7 @@ def MeshToJson(obj, options, bone_list_filter = None, prune_empty_vertex_groups
 					p_options.secondary_uv_layer_index = obj.data.uv_layers.find(_uv_layer.name)
 					break
 
-		if head_object_mode == 'Base':
-			facebone_vg_names = [vg.name for vg in obj.vertex_groups if vg.name.startswith("faceBone_")]
-			p_options.vertex_group_merge_source = facebone_vg_names
-			p_options.vertex_group_merge_target = "C_Head"
+		p_options.vertex_group_merge_source, p_options.vertex_group_merge_target = _HeadObjectMerge(obj, head_object_modes[0])
 
 		if bone_list_filter is not None:
 			for vg in obj.vertex_groups:
@@ -113,50 +128,93 @@ def MeshToJson(obj, options, bone_list_filter = None, prune_empty_vertex_groups
 		except Exception as e:
 			return {'CANCELLED'}, f"An error occurred on at converting to numpy dict: {e}", None, None
 
+		variants = [data]
+		for head_object_mode in head_object_modes[1:]:
+			variant = dict(data)
+			if utils_primitive.Primitive.GatheredData.WEIGHTS in primitive.gathered:
+				with utils_trace.span('Primitive.regather_weights', mode=head_object_mode):
+					primitive.regather_weights(*_HeadObjectMerge(obj, head_object_mode))
+				variant["vertex_group_names"] = primitive.vertex_weights_data["vertex_group_names"]
+				variant["vertex_weights"] = primitive.vertex_weights_data["vertex_weights"]
+			variants.append(variant)
+
 		print(f"MeshToJson took {time.time() - start_time} seconds")
-		return {'FINISHED'}, "", data, matrices
+		return {'FINISHED'}, "", variants, matrices
 
 def ExportMesh(options, context, filepath: str, operator, bone_list_filter = None, prune_empty_vertex_groups = False, head_object_mode = 'None', ref_objects = []):
-	export_mesh_file_path = filepath
-	export_mesh_folder_path = os.path.dirname(export_mesh_file_path)
+	rtn, verts_count, indices_count, bone_lists = ExportMeshVariants(options, context, [filepath], operator, bone_list_filter, prune_empty_vertex_groups, [head_object_mode], ref_objects)
+	return rtn, verts_count, indices_count, bone_lists[0] if bone_lists else None
+
+@utils_trace.traced('ExportMesh', is_session=True)
+def ExportMeshVariants(options, context, filepaths: list[str], operator, bone_list_filter = None, prune_empty_vertex_groups = False, head_object_modes = ['None'], ref_objects = []):
+	'''
+	Gathers the active object once for all head object modes and writes one mesh file per mode to the matching entry of filepaths,
+	each with the weights of its mode. Returns the vertex group names of every mode.
+	'''
+	export_mesh_folder_path = os.path.dirname(filepaths[0])
 	
 	active_object = utils_blender.GetActiveObject()
 	active_object_name = active_object.name
 
+	mesh_store = None
 	if options.export_sf_mesh_hash_result:
-		hash_folder, hash_name = utils.hash_string(active_object_name)
+		# Named after the written content, see utils_mesh_store
 		object_folder_name = utils.sanitize_filename(active_object_name)
-		result_file_folder = os.path.join(os.path.dirname(export_mesh_file_path), object_folder_name, hash_folder)
-		os.makedirs(result_file_folder, exist_ok = True)
-		result_file_path = os.path.join(result_file_folder, hash_name + ".mesh")
+		mesh_store = utils_mesh_store.MeshStore(os.path.join(export_mesh_folder_path, object_folder_name))
+		result_file_paths = [mesh_store.staging_path() for _ in head_object_modes]
 	else:
-		result_file_path = export_mesh_file_path
+		result_file_paths = filepaths
 	
 	time_start = time.time()
 
-	rtn, message, data, matrices = MeshToJson(active_object, options, bone_list_filter, prune_empty_vertex_groups, head_object_mode, ref_objects=ref_objects)
+	rtn, message, variants, matrices = MeshToJsonVariants(active_object, options, bone_list_filter, prune_empty_vertex_groups, head_object_modes, ref_objects=ref_objects)
 
 	time_end = time.time()
 
 	if rtn != {'FINISHED'}:
+		if mesh_store != None:
+			for result_file_path in result_file_paths:
+				mesh_store.discard(result_file_path)
 		operator.report({'ERROR'}, message)
 		return rtn, 0, 0, None
 
 	#json_data = json.dumps(data)
 	
-	returncode = MeshConverter.ExportMeshFromNumpy({**data, **matrices}, result_file_path)
+	for data, result_file_path in zip(variants, result_file_paths):
+		with utils_trace.span('MeshConverter.ExportMeshFromNumpy'):
+			returncode = MeshConverter.ExportMeshFromNumpy({**data, **matrices}, result_file_path)
+		if not returncode:
+			break
+
+		if utils_trace.is_enabled():
+			utils_trace.count('vertices', data['num_verts'])
+			utils_trace.count('bytes_written', os.path.getsize(result_file_path))
 
 	time_end1 = time.time()
 
 	if returncode:
+		if mesh_store != None:
+			stored_meshes = []
+			for result_file_path in result_file_paths:
+				hash_folder, hash_name, written = mesh_store.put(result_file_path)
+				if not written:
+					print(f"{hash_folder}\\{hash_name}.mesh is unchanged, kept the stored file")
+				stored_meshes.append((hash_folder, hash_name))
+			mesh_store.set_references(active_object_name, stored_meshes)
+			if options.export_sf_mesh_collect_garbage:
+				mesh_store.collect_garbage()
+
 		operator.report({'INFO'}, f"Starfield .mesh exported successfully. Gather:{time_end - time_start} + Dll:{time_end1 - time_end}")
 
 		if options.export_sf_mesh_open_folder == True:
 			utils_blender.open_folder(bpy.path.abspath(export_mesh_folder_path))
 
-		return {'FINISHED'}, data['num_verts'], data['num_indices'], data['vertex_group_names']
+		return {'FINISHED'}, data['num_verts'], data['num_indices'], [variant['vertex_group_names'] for variant in variants]
 		
 	else:
+		if mesh_store != None:
+			for result_file_path in result_file_paths:
+				mesh_store.discard(result_file_path)
 		operator.report({'INFO'}, f"Execution failed with error message: \"{returncode.what()}\". Contact the author for assistance.")
 		return {'CANCELLED'}, 0,0, None
 
@@ -176,11 +234,14 @@ def ImportMesh(file_path, options, context, operator, mesh_name_override = None)
 
 	return MeshFromJson(data, options, context, operator, mesh_name_override)
 
+@utils_trace.traced(is_session=True)
 @utils.timer
 def ImportMesh_Alt(file_path, options, context, operator, mesh_name_override = None):
 	import_path = file_path
 
-	dict = MeshConverter.ImportMeshAsNumpy(import_path)
+	with utils_trace.span('MeshConverter.ImportMeshAsNumpy'):
+		dict = MeshConverter.ImportMeshAsNumpy(import_path)
+	utils_trace.count('vertices', len(dict['positions_raw']))
 
 	name = "ImportedMesh" if mesh_name_override == None else mesh_name_override
 
@@ -232,11 +293,8 @@ def ImportMesh_Alt(file_path, options, context, operator, mesh_name_override = N
 
 		np.add.at(result, (np.arange(num_vertices)[:, None], bone_indices), weights)
 
-		for i in range(num_bones):
-			vg = obj.vertex_groups.new(name=f"bone{i}")
-			v_ids = result[:, i].nonzero()[0]
-			ws = result[:, i][v_ids]
-			[vg.add([int(v_id)], float(w), 'ADD') for v_id, w in zip(v_ids, ws)]
+		v_ids, b_ids = result.nonzero()
+		utils_blender.AddVertexGroupWeights(obj, v_ids, b_ids, result[v_ids, b_ids], [f"bone{i}" for i in range(num_bones)], 'ADD')
 
 	utils_blender.SetActiveObject(obj)
 
@@ -244,6 +302,37 @@ def ImportMesh_Alt(file_path, options, context, operator, mesh_name_override = N
 
 	return {'FINISHED'}
 
+# Mesh data-blocks imported in this session, keyed by resolved mesh path and file digest
+mesh_registry = {}
+mesh_registry_key_prop = 'SGB_Mesh_Registry_Key'
+
+def MeshRegistryKey(file_path):
+	return os.path.normcase(os.path.abspath(file_path)) + '|' + utils.hash_file(file_path)
+
+@utils_trace.traced()
+def ImportMeshShared(file_path, options, context, operator, mesh_name_override = None):
+	# Same as ImportMesh_Alt, but repeated imports of an unchanged .mesh file link the mesh data-block
+	# of the first import instead of decoding it again. The new object shares the data like a linked duplicate.
+	key = MeshRegistryKey(file_path)
+	entry = mesh_registry.get(key)
+	mesh = bpy.data.meshes.get(entry['mesh']) if entry != None else None
+
+	if mesh == None or mesh.get(mesh_registry_key_prop) != key:
+		rtn = ImportMesh_Alt(file_path, options, context, operator, mesh_name_override)
+		if 'FINISHED' in rtn:
+			obj = utils_blender.GetActiveObject()
+			obj.data[mesh_registry_key_prop] = key
+			mesh_registry[key] = {'mesh': obj.data.name}
+		return rtn
+
+	name = "ImportedMesh" if mesh_name_override == None else mesh_name_override
+	obj = bpy.data.objects.new(name, mesh)
+	bpy.context.collection.objects.link(obj)
+
+	# Vertex group names and weights live on the shared mesh, the new object already lists them
+	utils_blender.SetActiveObject(obj)
+	return {'FINISHED'}
+
 def MeshFromJson(json_data, options, context, operator, mesh_name_override = None):
 	data = json_data
 
@@ -1,12 +1,12 @@
 import bpy
 import os
 
-import MeshIO
-import MorphIO
-
 import utils_blender
 import utils_common as utils
 
+MeshIO = utils.LazyModule('MeshIO')
+MorphIO = utils.LazyModule('MorphIO')
+
 # Export operator
 class ExportCustomMesh(bpy.types.Operator):
 	bl_idname = "export_scene.custom_mesh"
@@ -52,6 +52,11 @@ class ExportCustomMesh(bpy.types.Operator):
 		description="Export into [hex1]\\[hex2].mesh instead of [name].mesh",
 		default=False,
 	)
+	export_sf_mesh_collect_garbage: bpy.props.BoolProperty(
+		name="Remove unreferenced meshes",
+		description="After export, delete hash named .mesh files this exporter stored in the export folder that none of its exports reference anymore. Files from older exports are kept",
+		default=False,
+	)
 
 	snapping_enabled: bpy.props.BoolProperty(
 		name="Snap Normals To Selected",
@@ -95,6 +100,7 @@ class ExportCustomMesh(bpy.types.Operator):
 			box.label(text=f"UV Map: {report['first_uv'].name}")
 
 		layout.prop(self, "export_sf_mesh_hash_result")
+		layout.prop(self, "export_sf_mesh_collect_garbage")
 
 		layout.separator()
 		layout.label(text="Snapping data:") 
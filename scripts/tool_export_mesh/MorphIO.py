@@ -11,8 +11,11 @@ import utils_blender
 import utils_math
 import utils_primitive
 import utils_morph_attrs
+import utils_trace
 import MeshConverter
 
+_mesh_index = utils_blender.MeshVertexCountIndex()
+
 def IsMorphExportNode(obj):
 	return obj.name.startswith('[MorphExport]')
 
@@ -28,13 +31,17 @@ def IsMorphObject(obj):
 	j = name.find(']')
 	return j > i
 
+@utils_trace.traced()
 def ImportMorphFromNumpy(filepath, operator, debug_delta_normal = False, force_import_on_active = False, use_colors = False, use_normals = False, base_vertex_bytecolor = 0):
 	import_path = filepath
 	
-	data = MeshConverter.ImportMorphAsNumpy(import_path, base_vert_bytecolor=base_vertex_bytecolor)
+	with utils_trace.span('MeshConverter.ImportMorphAsNumpy'):
+		data = MeshConverter.ImportMorphAsNumpy(import_path, base_vert_bytecolor=base_vertex_bytecolor)
 
 	vert_count = data["numVertices"]
 	shape_keys = list(data["shapeKeys"])
+	utils_trace.count('vertices', vert_count)
+	utils_trace.count('shape_keys', len(shape_keys))
 	delta_pos = data["deltaPositions"]
 	target_colors = data["targetColors"]
 	delta_normals = data["deltaNormals"]
@@ -58,11 +65,7 @@ def ImportMorphFromNumpy(filepath, operator, debug_delta_normal = False, force_i
 		vert_count = target_vert_count
 
 	if target_obj == None or len(target_obj.data.vertices) != vert_count:
-		target_obj = None
-		for _obj in bpy.data.objects:
-			if _obj.type == 'MESH' and utils_blender.read_only_marker not in _obj.name and len(_obj.data.vertices) == vert_count:
-				target_obj = _obj
-				break
+		target_obj = _mesh_index.find(vert_count)
 	
 	if target_obj == None:
 		operator.report({'WARNING'}, f"No matching mesh found for the morph. Expecting {vert_count} vertices in target object.")
@@ -71,24 +74,51 @@ def ImportMorphFromNumpy(filepath, operator, debug_delta_normal = False, force_i
 		if utils_blender.read_only_marker in target_obj.name and target_obj.data.shape_keys != None and len(target_obj.data.shape_keys.key_blocks) != 0:
 			operator.report({'WARNING'}, f"Target mesh is Read Only! Remove {utils_blender.read_only_marker} in the name before continue.")
 			return {"CANCELLED"}
+
+	if target_obj.data.users > 1:
+		# Mesh data shared with other imported objects, clearing its shape keys would wipe their morphs
+		target_obj.data = target_obj.data.copy()
 	
-	basis_positions = np.empty(len(target_obj.data.vertices) * 3, dtype=np.float32)
-	target_obj.data.vertices.foreach_get('co', basis_positions)
+	mesh = target_obj.data
+	basis_positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+	mesh.vertices.foreach_get('co', basis_positions)
 	basis_positions = basis_positions.reshape(-1, 3)
 	if debug_delta_normal:
-		basis_normals = np.empty(len(target_obj.data.vertices) * 3, dtype=np.float32)
-		target_obj.data.vertices.foreach_get('normal', basis_normals)
+		basis_normals = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+		mesh.vertices.foreach_get('normal', basis_normals)
 		basis_normals = basis_normals.reshape(-1, 3)
 
 	target_obj.shape_key_clear()
 	sk_basis = target_obj.shape_key_add(name = 'Basis', from_mix=False)
 	sk_basis.interpolation = 'KEY_LINEAR'
-	target_obj.data.shape_keys.use_relative = True
+	mesh.shape_keys.use_relative = True
 
-	if (use_normals or use_colors):
-		ones_column = np.zeros((data["targetColors"][0].shape[0], 1), dtype=np.float32)
+	# Attributes of the cleared keys would otherwise be picked up by new keys of the same name
+	morph_normals = utils_morph_attrs.MorphNormals()
+	morph_target_colors = utils_morph_attrs.MorphTargetColors()
+	morph_normals.validate_all(mesh)
+	morph_target_colors.validate_all(mesh)
 
-		loop_indices = np.array([loop.vertex_index for loop in target_obj.data.loops], dtype=np.int32)
+	delta_pos = np.asarray(delta_pos, dtype=np.float32)
+	key_positions = np.empty_like(basis_positions)
+
+	if (use_normals or use_colors):
+		with utils_trace.span('expand_loops'):
+			loop_indices = np.empty(len(mesh.loops), dtype=np.int32)
+			mesh.loops.foreach_get('vertex_index', loop_indices)
+
+			# Keys matching the attribute defaults get no attribute: white colors, and zero delta normals on keys that don't move.
+			# Decided for all keys at once in the vertex domain, only the kept keys are expanded to loops.
+			write_colors = use_colors & np.any(target_colors < 255, axis=(1, 2))
+			write_normals = use_normals & (np.any(np.abs(delta_normals) >= 0.5 / 511, axis=(1, 2)) | np.any(delta_pos != 0, axis=(1, 2)))
+			utils_trace.count('color_attributes', int(np.count_nonzero(write_colors)))
+			utils_trace.count('normal_attributes', int(np.count_nonzero(write_normals)))
+
+			# Reused for every key. Alpha stays 0.
+			vertex_colors = np.zeros((len(mesh.vertices), 4), dtype=np.float32)
+			loop_colors = np.empty((len(mesh.loops), 4), dtype=np.float32)
+			delta_normals = np.asarray(delta_normals, dtype=np.float32)
+			loop_normals = np.empty((len(mesh.loops), 3), dtype=np.float32)
 
 	for n, key_name in enumerate(shape_keys):
 		sk = target_obj.shape_key_add(name = key_name, from_mix=False)
@@ -97,16 +127,29 @@ def ImportMorphFromNumpy(filepath, operator, debug_delta_normal = False, force_i
 		sk.slider_min = 0
 		sk.slider_max = 1
 
-		sk.data.foreach_set('co', (basis_positions + delta_pos[n]).ravel())
+		np.add(basis_positions, delta_pos[n], out=key_positions)
+		sk.data.foreach_set('co', key_positions.ravel())
 
 		if debug_delta_normal:
-			utils_blender.VisualizeVectors(target_obj.data, delta_pos[n], basis_normals + delta_normals[n], key_name)
+			utils_blender.VisualizeVectors(mesh, delta_pos[n], basis_normals + delta_normals[n], key_name)
 		
-		if use_colors:
-			utils_morph_attrs.MorphTargetColors().set_data(target_obj.data, key_name, np.hstack((target_colors[n] / 255.0, ones_column))[loop_indices].ravel(), create_if_not_exist=True)
-
-		if use_normals:
-			utils_morph_attrs.MorphNormals().set_data(target_obj.data, key_name, delta_normals[n][loop_indices].ravel(), create_if_not_exist=True)
+		# Blender renames duplicate and over long key names, the attributes follow the name the key got
+		if use_colors and write_colors[n]:
+			attr = morph_target_colors.create(mesh, sk.name)
+			if attr == None:
+				print(f"Morph {key_name}: no target color attribute for shape key {sk.name}, skipping its colors")
+			else:
+				np.divide(target_colors[n], 255.0, out=vertex_colors[:, :3])
+				np.take(vertex_colors, loop_indices, axis=0, out=loop_colors)
+				morph_target_colors.write(attr, loop_colors)
+
+		if use_normals and write_normals[n]:
+			attr = morph_normals.create(mesh, sk.name)
+			if attr == None:
+				print(f"Morph {key_name}: no normal attribute for shape key {sk.name}, skipping its normals")
+			else:
+				np.take(delta_normals[n], loop_indices, axis=0, out=loop_normals)
+				morph_normals.write(attr, loop_normals)
 
 	operator.report({'INFO'}, f"Import Morph Successful.")
 	return {'FINISHED'}
@@ -184,14 +227,15 @@ def ExportMorphFromSet(options, context, export_file_path, morph_node, operator)
 			return {'CANCELLED'}, None
 
 		sk_normals, sk_tangents, _ = utils_blender.GetNormalTangents(sk_obj.data, True, True, vid_lid_list)
-		sk_v_colors, has_color = utils_blender.GetVertColorPerVert(sk_obj)
+		sk_v_colors, has_color = utils_blender.GetVertColorArray(sk_obj.data)
+		sk_rgb = (sk_v_colors[:, :3] * 255).astype(np.int64).tolist()
 		if has_color == False:
 			no_color_objs_in_group.append(sk_obj.name)
 
 		d_P = (sk_positions - basis_positions).tolist()
 		d_N = utils_math.bounded_vector_substraction(basis_normals, sk_normals).tolist()
 		d_T = (basis_tangentsigns[:, np.newaxis] * utils_math.bounded_vector_substraction(basis_tangents, sk_tangents)).tolist()
-		morphData[n] = [[d_p[0], d_p[1], d_p[2], utils_blender.ColorToRGB888(sk_v_colors[i]), d_n, d_t] for i, d_p, d_n, d_t in zip(range(verts_count), d_P, d_N, d_T)]
+		morphData[n] = [[d_p[0], d_p[1], d_p[2], rgb, d_n, d_t] for d_p, rgb, d_n, d_t in zip(d_P, sk_rgb, d_N, d_T)]
 
 	if len(no_color_objs_in_group) != 0 and len(no_color_objs_in_group) != len(morph_objs):
 		operator.report({'WARNING'}, f'No vertex color found in {len(no_color_objs_in_group)} morph objects: {", ".join(no_color_objs_in_group)}, target vertex colors of corresponding morph keys will be set to 1.')
@@ -214,6 +258,7 @@ def ExportMorphFromSet(options, context, export_file_path, morph_node, operator)
 	operator.report({'INFO'}, f"Export morph successful.")
 	return {"FINISHED"}, verts_count
 
+@utils_trace.traced(is_session=True)
 def ExportMorph_alt(options, context, export_file_path, operator, snapping_range = 0.0, snap_delta_positions = False, snap_lerp_coeff = 1.0, snap_lerp_coeff_delta_pos = 1.0):
 	export_path = export_file_path
 
@@ -290,7 +335,8 @@ def ExportMorph_alt(options, context, export_file_path, operator, snapping_range
 		#	with open(export_path + ".json", 'w') as f:
 		#		f.write(debug_json_data)
 
-		returncode = MeshConverter.ExportMorphFromNumpy(jsondata, export_path)
+		with utils_trace.span('MeshConverter.ExportMorphFromNumpy'):
+			returncode = MeshConverter.ExportMorphFromNumpy(jsondata, export_path)
 
 		time_end2 = time.time()
 
@@ -298,6 +344,9 @@ def ExportMorph_alt(options, context, export_file_path, operator, snapping_range
 			operator.report({'INFO'}, f"Execution failed with error message: \"{returncode.what()}\". Contact the author for assistance.")
 			return {"CANCELLED"}, None
 
+		if utils_trace.is_enabled() and os.path.isfile(export_path):
+			utils_trace.count('bytes_written', os.path.getsize(export_path))
+
 		operator.report({'INFO'}, f"Export morph successful. Vertex count: {jsondata['numVertices']}. Time taken: Gather: {time_end - time_start:.2f}  + Dll: {time_end2 - time_end1:.2} seconds.")
 		return {"FINISHED"}, jsondata['numVertices']
 
@@ -1,11 +1,11 @@
 import bpy
 
-import MorphIO
-
 import os
 
 import utils_common as utils
 
+MorphIO = utils.LazyModule('MorphIO')
+
 import utils_blender	
 
 class ImportCustomMorph(bpy.types.Operator):
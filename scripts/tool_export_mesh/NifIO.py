@@ -1,7 +1,9 @@
 import os
 import json
+import shutil
 import bpy
 import mathutils
+import numpy as np
 
 import MeshIO
 import MorphIO
@@ -10,6 +12,8 @@ import utils_material
 import nif_armature
 import nif_template
 import utils_common as utils
+import utils_trace
+import utils_mesh_store
 import MeshConverter
 import PhysicsConverter
 import MaterialConverter
@@ -22,7 +26,43 @@ def ResetSkeletonObjDict():
 def GetSkeletonObjDict():
 	return skeleton_obj_dict
 
-def TraverseNodeRecursive(armature_dict:dict, parent_node, collection, root_dict, options, additional_assets_folder, context, operator, nif_name = '', connect_pts = {}):
+class NodeTransforms:
+	'''
+	Node matrices of a nif json decoded in one pass. The json matrices are world transforms, they are stacked
+	as (N, 4, 4) in depth first order, parents before children, and each node's matrix relative to its parent node
+	is taken from the stack, so objects get their matrix_basis without depending on the parent's evaluated matrix_world.
+	'''
+	def __init__(self, root_dict:dict):
+		nodes = []
+		parents = []
+		stack = [(root_dict, -1)]
+		while stack:
+			node, parent = stack.pop()
+			parents.append(parent)
+			stack.extend((child, len(nodes)) for child in reversed(node['children']))
+			nodes.append(node)
+
+		self.index = {id(node): i for i, node in enumerate(nodes)}
+		self.parents = np.array(parents, dtype=np.int64)
+		self.world = np.array([node['matrix'] for node in nodes], dtype=np.float64).reshape(-1, 4, 4)
+
+		has_parent = self.parents >= 0
+		self.parent_inverse = np.tile(np.identity(4), (len(nodes), 1, 1))
+		self.parent_inverse[has_parent] = np.linalg.pinv(self.world)[self.parents[has_parent]]
+		self.local = self.parent_inverse @ self.world
+
+	def local_matrix(self, node_dict:dict) -> mathutils.Matrix:
+		return mathutils.Matrix(self.local[self.index[id(node_dict)]].tolist())
+
+	def basis_from_world(self, node_dict:dict, world:np.ndarray) -> mathutils.Matrix:
+		# Matrix basis giving world for an object parented like the node's own objects
+		return mathutils.Matrix((self.parent_inverse[self.index[id(node_dict)]] @ world).tolist())
+
+@utils_trace.traced()
+def TraverseNodeRecursive(armature_dict:dict, parent_node, collection, root_dict, options, additional_assets_folder, context, operator, nif_name = '', connect_pts = {}, node_transforms:NodeTransforms = None):
+	if node_transforms is None:
+		node_transforms = NodeTransforms(armature_dict)
+
 	_objects = []
 	is_node = False
 	is_rigged = False
@@ -58,6 +98,8 @@ def TraverseNodeRecursive(armature_dict:dict, parent_node, collection, root_dict
 
 			if use_internal_geom_data:
 				rtn = MeshIO.MeshFromJson(mesh_info['mesh_data'], options, context, operator)
+			elif options.share_mesh_data:
+				rtn = MeshIO.ImportMeshShared(mesh_filepath, options, context, operator, factory_path)
 			else:
 				rtn = MeshIO.ImportMesh_Alt(mesh_filepath, options, context, operator, factory_path)
 			
@@ -73,7 +115,12 @@ def TraverseNodeRecursive(armature_dict:dict, parent_node, collection, root_dict
 			if options.max_lod > 1:
 				_objects[-1].name += f'_lod{lod}'
 				utils_blender.SetBSGeometryName(_objects[-1], geo_name + f'_lod{lod}')
-			imported_obj.data.materials.append(material)
+			if imported_obj.data.users > 1 and len(imported_obj.material_slots) > 0:
+				# Mesh data shared with an earlier import, its slot holds that nif's material, link this one to the object
+				imported_obj.material_slots[0].link = 'OBJECT'
+				imported_obj.material_slots[0].material = material
+			else:
+				imported_obj.data.materials.append(material)
 			loaded = True
 		
 		if options.geo_bounding_debug:
@@ -148,19 +195,16 @@ def TraverseNodeRecursive(armature_dict:dict, parent_node, collection, root_dict
 		utils_blender.move_object_to_collection(connect_point_nodes, collection.children['ConnectPoint:Parents'])
 
 	utils_blender.move_object_to_collection(_objects, collection)
+	T = node_transforms.local_matrix(armature_dict)
+	scale = armature_dict['scale']
 	for obj in _objects:
 		if parent_node != None:
 			obj.parent = parent_node
-		T = mathutils.Matrix()
-		for i in range(4):
-			for j in range(4):
-				T[i][j] = armature_dict['matrix'][i][j]
 		
-		obj.matrix_world = T
-		scale = armature_dict['scale']
+		obj.matrix_basis = T
 		obj.scale = tuple([scale,scale,scale])
 
-		for cp_obj in connect_point_nodes:
+		for cp, cp_obj in zip(connect_pts.get(armature_dict['name'], []), connect_point_nodes):
 			cp_obj.location = cp['translation']
 			cp_obj.rotation_quaternion = cp['rot_quat']
 			cp_scale = cp['scale']
@@ -170,29 +214,20 @@ def TraverseNodeRecursive(armature_dict:dict, parent_node, collection, root_dict
 	if is_node == False and is_rigged and skeleton != None:
 		skeleton_info = nif_armature.SkeletonLookup(skeleton)
 
-		for mesh_obj in _objects:
-			
-			correction = None
-
-			for _bonename, _boneinfo in zip(data['bone_names'], data['bone_infos']):
-				if _bonename in matched_bones:
-					B_inv = mathutils.Matrix()
-					for i in range(4):
-						for j in range(4):
-							B_inv[i][j] = _boneinfo['matrix'][i][j]
-					
-					B = mathutils.Matrix()
-					for i in range(4):
-						for j in range(4):
-							B[i][j] = skeleton_info[_bonename]['matrix'][i][j]
+		correction = None
+		# The first matched bone decides the correction, it is the same for all lods
+		for _bonename, _boneinfo in zip(data['bone_names'], data['bone_infos']):
+			if _bonename in matched_bones:
+				B_inv = np.array(_boneinfo['matrix'], dtype=np.float64)
+				B = np.array(skeleton_info[_bonename]['matrix'], dtype=np.float64)
+				correction = node_transforms.basis_from_world(armature_dict, B @ B_inv)
+				break
 
-					correction = B @ B_inv
-					break
-			
+		for mesh_obj in _objects:
 			if correction == None:
 				operator.report({'WARNING'}, f'Failed to correct mesh for {geo_name}')
 			else:
-				mesh_obj.matrix_world = correction
+				mesh_obj.matrix_basis = correction
 			#axis, angle = correction.to_quaternion().to_axis_angle()
 			#angle_integer = angle * 2 / math.pi
 			#corrected = mathutils.Quaternion([round(axis[0]), round(axis[1]), round(axis[2])], round(angle_integer) * math.pi * 0.5).to_matrix()
@@ -206,10 +241,11 @@ def TraverseNodeRecursive(armature_dict:dict, parent_node, collection, root_dict
 			#	mesh_obj.matrix_world[j][3] = pivot['matrix'][j][3]
 
 	for child_dict in armature_dict['children']:
-		TraverseNodeRecursive(child_dict, Axis, collection, root_dict, options, additional_assets_folder, context, operator, nif_name, connect_pts)
+		TraverseNodeRecursive(child_dict, Axis, collection, root_dict, options, additional_assets_folder, context, operator, nif_name, connect_pts, node_transforms)
 
 	return _objects
 
+@utils_trace.traced(is_session=True)
 def ImportNif(file_path, options, context, operator):
 	nif_armature.LoadAllSkeletonLookup()
 	ResetSkeletonObjDict()
@@ -222,7 +258,9 @@ def ImportNif(file_path, options, context, operator):
 		operator.report({'WARNING'}, 'Setup your assets folder before importing!')
 		return {'CANCELLED'}, None, None
 	
-	json_str = MeshConverter.ImportNifAsJson(file_path, utils_blender.is_plugin_debug_mode(), os.path.join(utils.export_mesh_folder_path, 'havok_debug.txt'))
+	with utils_trace.span('MeshConverter.ImportNifAsJson'):
+		json_str = MeshConverter.ImportNifAsJson(file_path, utils_blender.is_plugin_debug_mode(), os.path.join(utils.export_mesh_folder_path, 'havok_debug.txt'))
+	utils_trace.count('json_bytes', len(json_str))
 	
 	if len(json_str) == 0:
 		operator.report({'WARNING'}, f'Nif failed to load.')
@@ -265,8 +303,13 @@ def ImportNif(file_path, options, context, operator):
 		operator.report({'INFO'}, f'Nif has no geometry. Loaded as Armature.')
 		return {'FINISHED'}, None, None
 	else:
-		root_objs = TraverseNodeRecursive(_data, None, prev_coll, _data, options, additional_assets_folders, context, operator, nifname + ' ' + nif_folder_name, connect_pts)
+		with utils_trace.span('NodeTransforms'):
+			node_transforms = NodeTransforms(_data)
+		utils_trace.count('nodes', len(node_transforms.world))
+		root_objs = TraverseNodeRecursive(_data, None, prev_coll, _data, options, additional_assets_folders, context, operator, nifname + ' ' + nif_folder_name, connect_pts, node_transforms)
 		root_objs[0]['Import_Nif_Path'] = file_path
+		# Objects only got their basis matrices, one update evaluates matrix_world for all of them
+		bpy.context.view_layer.update()
 
 
 	operator.report({'INFO'}, f'Meshes loaded for {nifname}.')
@@ -319,14 +362,28 @@ def ImportNif(file_path, options, context, operator):
 	return {'FINISHED'}, best_skel, obj_list
 
 def ExportNif(options, context, operator, head_object_mode = 'None'):
+	return ExportNifVariants(options, context, operator, [(head_object_mode, options.filepath)])
+
+@utils_trace.traced('ExportNif', is_session=True)
+def ExportNifVariants(options, context, operator, variants:list[tuple[str, str]]):
+	'''
+	Exports one nif per (head_object_mode, nif_filepath) in variants. Geometry is gathered once, every variant gets
+	its own mesh file with the weights its skin data indexes into. Morphs and materials are written once, to the folder of the first variant.
+	'''
 	nif_armature.LoadAllSkeletonLookup()
 	original_selected = utils_blender.GetSelectedObjs(True)
-	nif_filepath = options.filepath
+	head_object_modes = [head_object_mode for head_object_mode, _ in variants]
+	nif_filepath = variants[0][1]
 	export_folder = os.path.dirname(nif_filepath)
 	nif_filename = os.path.basename(nif_filepath)
 	nif_name = os.path.splitext(nif_filename)[0]
 	hash_filepath = options.export_sf_mesh_hash_result
 	options.export_sf_mesh_hash_result = False
+	# External meshes are named after their content when hashing, see utils_mesh_store
+	mesh_store = None
+	if hash_filepath and not options.use_internal_geom_data:
+		mesh_store = utils_mesh_store.MeshStore(os.path.join(export_folder, 'geometries'), os.path.join(export_folder, 'meshes', 'morphs'))
+	stored_meshes = [[] for _ in variants]
 	options.use_world_origin = False
 	has_physics_graph = options.physics_tree != "None" and options.physics_tree in bpy.data.node_groups
 	if has_physics_graph:
@@ -376,7 +433,7 @@ def ExportNif(options, context, operator, head_object_mode = 'None'):
 			return {'CANCELLED'}
 		_data['sub_template'] = 2
 
-	_data['geometries'] = []
+	variant_geometries = [[] for _ in variants]
 
 	for mesh_obj in geometries:
 		if mesh_obj.data == None:
@@ -412,7 +469,6 @@ def ExportNif(options, context, operator, head_object_mode = 'None'):
 		mesh_data["geo_bounding_center"] = bbox_center
 		mesh_data["geo_bounding_expand"] = bbox_expand
 
-		mesh_lod_info = {}
 		utils_blender.SetActiveObject(mesh_obj)
 
 		vertex_groups = mesh_obj.vertex_groups
@@ -448,21 +504,31 @@ def ExportNif(options, context, operator, head_object_mode = 'None'):
 						physics_armature_attached = True
 			#bone_list_filter = list(set(bone_list_filter) | set(cloth_bones))
 
-		if hash_filepath:
-			mesh_folder, mesh_name = utils.hash_string(mesh_obj.name)
-			factory_name = mesh_folder + '\\' + mesh_name
+		# One mesh file per variant, each holds the weights its nif's skin indexes into
+		if mesh_store != None:
+			# Named once the content is written
+			result_file_paths = [mesh_store.staging_path() for _ in variants]
 		else:
-			mesh_folder = utils.sanitize_filename(mesh_obj.name)
-			if mesh_obj.data.name.endswith('.mesh'):
-				mesh_name = utils.sanitize_filename(mesh_obj.data.name[:-5])
-			else:
-				mesh_name = utils.sanitize_filename(mesh_obj.data.name)
-			factory_name = mesh_folder + '\\' + mesh_name + ".mesh"
+			mesh_files = []
+			for variant_suffix in [''] + [f'_{head_object_mode.lower()}' for head_object_mode in head_object_modes[1:]]:
+				if hash_filepath:
+					variant_folder, variant_name = utils.hash_string(mesh_obj.name + variant_suffix)
+					variant_factory_name = utils_mesh_store.factory_path(variant_folder, variant_name)
+				else:
+					variant_folder = utils.sanitize_filename(mesh_obj.name)
+					if mesh_obj.data.name.endswith('.mesh'):
+						variant_name = utils.sanitize_filename(mesh_obj.data.name[:-5]) + variant_suffix
+					else:
+						variant_name = utils.sanitize_filename(mesh_obj.data.name) + variant_suffix
+					variant_factory_name = variant_folder + '\\' + variant_name + ".mesh"
+				mesh_files.append((variant_folder, variant_name, variant_factory_name))
 
-		result_file_folder = os.path.join(export_folder, 'geometries', mesh_folder)
-		if not options.use_internal_geom_data:
-			os.makedirs(result_file_folder, exist_ok = True)
-		result_file_path = os.path.join(result_file_folder, mesh_name + ".mesh")
+			variant_mesh_names = [(variant_folder, variant_name) for variant_folder, variant_name, _ in mesh_files]
+			mesh_folder = variant_mesh_names[0][0]
+			factory_names = [variant_factory_name for _, _, variant_factory_name in mesh_files]
+			result_file_paths = [os.path.join(export_folder, 'geometries', variant_folder, variant_name + ".mesh") for variant_folder, variant_name, _ in mesh_files]
+			if not options.use_internal_geom_data:
+				os.makedirs(os.path.join(export_folder, 'geometries', mesh_folder), exist_ok = True)
 
 		if mode == "SINGLE_MESH":
 			utils_blender.SetSelectObjects(original_selected)
@@ -471,77 +537,107 @@ def ExportNif(options, context, operator, head_object_mode = 'None'):
 			utils_blender.SetSelectObjects([])
 			utils_blender.SetActiveObject(mesh_obj)
 
-		geom_data = None
+		geom_variants = [None] * len(variants)
 		if options.use_internal_geom_data:
-			rtn, message, geom_data, matrices = MeshIO.MeshToJson(mesh_obj, options, bone_list_filter, True, head_object_mode, ref_objects=ref_objs)
+			rtn, message, geom_variants, matrices = MeshIO.MeshToJsonVariants(mesh_obj, options, bone_list_filter, True, head_object_modes, ref_objects=ref_objs)
 			if 'FINISHED' not in rtn:
 				operator.report({'WARNING'}, f'Failed exporting {mesh_obj.name}. Message: {message}. Skipping...')
 				continue
-			verts_count = geom_data['num_verts']
-			indices_count = geom_data['num_indices']
-			bone_list = geom_data['vertex_group_names']
+			verts_count = geom_variants[0]['num_verts']
+			indices_count = geom_variants[0]['num_indices']
+			bone_lists = [geom_data['vertex_group_names'] for geom_data in geom_variants]
 			_matrices_cache.append(matrices)
 		else:
-			rtn, verts_count, indices_count, bone_list = MeshIO.ExportMesh(options, context, result_file_path, operator, bone_list_filter, True, head_object_mode, ref_objects=ref_objs)
+			rtn, verts_count, indices_count, bone_lists = MeshIO.ExportMeshVariants(options, context, result_file_paths, operator, bone_list_filter, True, head_object_modes, ref_objects=ref_objs)
 			if 'FINISHED' not in rtn:
+				if mesh_store != None:
+					for result_file_path in result_file_paths:
+						mesh_store.discard(result_file_path)
 				operator.report({'WARNING'}, f'Failed exporting {mesh_obj.name}. Skipping...')
 				continue
 
-		print("Bone list: ", bone_list)
+		print("Bone list: ", bone_lists)
 
 		has_skinned_geometry = True
 		
+		staged_morph_path = None
 		if options.export_morph:
 			if mode == "SINGLE_MESH":
-				result_morph_folder = os.path.join(export_folder, 'meshes', 'morphs', mesh_folder, mesh_name)
-				os.makedirs(result_morph_folder, exist_ok = True)
-				result_morph_path = os.path.join(result_morph_folder, "morph.dat")
+				if mesh_store != None:
+					# Part of the content names, the store copies it next to every variant's mesh
+					staged_morph_path = mesh_store.staging_path('.dat')
+					result_morph_paths = [staged_morph_path]
+				else:
+					# Every variant's mesh needs a morph.dat next to its own path, written once and copied to the others
+					result_morph_paths = [os.path.join(export_folder, 'meshes', 'morphs', variant_folder, variant_name, "morph.dat") for variant_folder, variant_name in variant_mesh_names]
+					for result_morph_path in result_morph_paths:
+						os.makedirs(os.path.dirname(result_morph_path), exist_ok = True)
 
 				utils_blender.SetSelectObjects(original_selected)
 				utils_blender.SetActiveObject(mesh_obj)
 
-				morph_success, num_vertices_in_morph = MorphIO.ExportMorph_alt(options, context, result_morph_path, operator)
+				morph_success, num_vertices_in_morph = MorphIO.ExportMorph_alt(options, context, result_morph_paths[0], operator)
 
 				if 'FINISHED' in morph_success:
+					for result_morph_path in result_morph_paths[1:]:
+						shutil.copyfile(result_morph_paths[0], result_morph_path)
 					if verts_count != num_vertices_in_morph:
 						operator.report({'WARNING'}, f"Number of vertices in morph doesn't match with the base mesh for {mesh_obj.name}. Please report to the author.")
 					else:
 						operator.report({'INFO'}, f"Morph export for {mesh_obj.name} successful.")
 				else:
 					operator.report({'WARNING'}, f"Morph export for {mesh_obj.name} failed.")
+					if staged_morph_path != None:
+						mesh_store.discard(staged_morph_path)
+						staged_morph_path = None
 			else:
 				operator.report({'WARNING'}, f'Morph export for multiple geometries in one nif is not supported!')
 
+		if mesh_store != None:
+			factory_names = []
+			for result_file_path, variant_stored_meshes in zip(result_file_paths, stored_meshes):
+				variant_folder, variant_name, written = mesh_store.put(result_file_path, staged_morph_path)
+				if not written:
+					print(f"{mesh_obj.name}: {variant_folder}\\{variant_name}.mesh is unchanged, kept the stored file")
+				factory_names.append(utils_mesh_store.factory_path(variant_folder, variant_name))
+				variant_stored_meshes.append((variant_folder, variant_name))
+			if staged_morph_path != None:
+				mesh_store.discard(staged_morph_path)
+
 		mesh_data['use_internal_geom_data'] = 1 if options.use_internal_geom_data else 0
 		mesh_data['scale_factor'] = 1
-		mesh_lod_info['mesh_data'] = geom_data
-		mesh_lod_info['factory_path'] = factory_name
-		mesh_lod_info['num_indices'] = indices_count
-		mesh_lod_info['num_vertices'] = verts_count
 
-		mesh_data['geo_mesh_lod'].append(mesh_lod_info)
+		# Everything above is shared, the variants differ in their weights and skin
+		for geometries_data, geom_data, bone_list, factory_name in zip(variant_geometries, geom_variants, bone_lists, factory_names):
+			variant_mesh_data = dict(mesh_data)
+			mesh_lod_info = {}
+			mesh_lod_info['mesh_data'] = geom_data
+			mesh_lod_info['factory_path'] = factory_name
+			mesh_lod_info['num_indices'] = indices_count
+			mesh_lod_info['num_vertices'] = verts_count
 
-		if bone_list != None and len(bone_list) > 0 and skeleton_info != None:
-			mesh_data['has_skin'] = 1
-			mesh_data['bone_names'] = utils_blender.RevertRenamingBoneList(bone_list)
-			mesh_data['bone_infos'] = []
+			variant_mesh_data['geo_mesh_lod'] = mesh_data['geo_mesh_lod'] + [mesh_lod_info]
 
-			#pivot = mathutils.Matrix.Identity(4)
-			#for j in range(3):
-			#	pivot[j][3] = mesh_obj.matrix_local[j][3]
+			if bone_list != None and len(bone_list) > 0 and skeleton_info != None:
+				variant_mesh_data['has_skin'] = 1
+				variant_mesh_data['bone_names'] = utils_blender.RevertRenamingBoneList(bone_list)
+				variant_mesh_data['bone_infos'] = []
 
-			for bone_name in bone_list:
-				bone_info = {}
-				B_inv = skeleton_info[bone_name]['matrix'].inverted()
+				#pivot = mathutils.Matrix.Identity(4)
+				#for j in range(3):
+				#	pivot[j][3] = mesh_obj.matrix_local[j][3]
 
-				V = B_inv @ mesh_obj.matrix_local # Or 'matrix_world' idk
+				for bone_name in bone_list:
+					bone_info = {}
+					B_inv = skeleton_info[bone_name]['matrix'].inverted()
 
-				bone_info['matrix'] = [[V[i][j] for j in range(4)]for i in range(4)]
-				bone_info['scale'] = 1 / skeleton_info[bone_name]['scale']
-				mesh_data['bone_infos'].append(bone_info)
+					V = B_inv @ mesh_obj.matrix_local # Or 'matrix_world' idk
 
+					bone_info['matrix'] = [[V[i][j] for j in range(4)]for i in range(4)]
+					bone_info['scale'] = 1 / skeleton_info[bone_name]['scale']
+					variant_mesh_data['bone_infos'].append(bone_info)
 
-		_data["geometries"].append(mesh_data)
+			geometries_data.append(variant_mesh_data)
 
 	_data['skeleton_mode'] = False
 	_data['auto_detect'] = True
@@ -557,42 +653,55 @@ def ExportNif(options, context, operator, head_object_mode = 'None'):
 		if not has_skinned_geometry or not physics_armature_attached:
 			operator.report({'WARNING'}, f'Nif export doesn\'t have a skinned mesh that is weighted to the very same skeleton in Physics Editor. Physics data will be ignored.')
 		else:
-			physics_data, error_msg = PhysicsConverter.get_physics_data(physics_graph)
-			if physics_data != None:
-				_data['physics_data'] = physics_data
+			physics_binary_path, error_msg = PhysicsConverter.get_composed_physics_data(physics_graph, MeshConverter.Platform.HCL_PLATFORM_X64)
+			if physics_binary_path != None:
+				_data['physics_binary_path'] = physics_binary_path
 			else:
 				operator.report({'WARNING'}, error_msg)
 	#print(_data)
-	json_data = json.dumps(_data)
-
-	# Write the JSON data to a file
-	if utils_blender.is_plugin_debug_mode():
-		with open(nif_filepath + '.json', 'w') as json_file:
-			json_file.write(json_data)
-
-	if options.additive_export == 'Root':
-		if import_nif_path == None:
-			operator.report({'WARNING'}, f'Either the root node is not from Nif Import or the Import_Nif_Path property is missing. Skipping...')
-			return {'CANCELLED'}
+	for (_, nif_filepath), geometries_data, variant_stored_meshes in zip(variants, variant_geometries, stored_meshes):
+		nif_name = os.path.splitext(os.path.basename(nif_filepath))[0]
+		_data['geometries'] = geometries_data
+		json_data = json.dumps(_data)
+
+		# Write the JSON data to a file
+		if utils_blender.is_plugin_debug_mode():
+			with open(nif_filepath + '.json', 'w') as json_file:
+				json_file.write(json_data)
+
+		if options.additive_export == 'Root':
+			if import_nif_path == None:
+				operator.report({'WARNING'}, f'Either the root node is not from Nif Import or the Import_Nif_Path property is missing. Skipping...')
+				return {'CANCELLED'}
 		
-		# If import_nif_path is not a nif file or doesn't exist, return with error
-		if not import_nif_path.endswith('.nif') or not os.path.isfile(import_nif_path):
-			operator.report({'WARNING'}, f'Import_Nif_Path property from root node is not a valid nif file. Skipping...')
-			return {'CANCELLED'}
+			# If import_nif_path is not a nif file or doesn't exist, return with error
+			if not import_nif_path.endswith('.nif') or not os.path.isfile(import_nif_path):
+				operator.report({'WARNING'}, f'Import_Nif_Path property from root node is not a valid nif file. Skipping...')
+				return {'CANCELLED'}
+
+			returncode = MeshConverter.EditNifBSGeometries(import_nif_path, json_data, nif_filepath, export_folder, options.overwrite_material_paths)
+		elif options.additive_export == 'Selected':
+			if not os.path.isfile(nif_filepath) or not nif_filepath.endswith('.nif'):
+				operator.report({'WARNING'}, f'You must select a nif file to enable Additive Export. Skipping...')
+				return {'CANCELLED'}
+			additive_nif_path = os.path.join(export_folder, nif_name + '_additive.nif')
+			returncode = MeshConverter.EditNifBSGeometries(nif_filepath, json_data, additive_nif_path, export_folder, options.overwrite_material_paths)
+		else:
+			returncode = MeshConverter.CreateNifFromJson(json_data, nif_filepath, export_folder)
 
-		returncode = MeshConverter.EditNifBSGeometries(import_nif_path, json_data, nif_filepath, export_folder, options.overwrite_material_paths)
-	elif options.additive_export == 'Selected':
-		if not os.path.isfile(nif_filepath) or not nif_filepath.endswith('.nif'):
-			operator.report({'WARNING'}, f'You must select a nif file to enable Additive Export. Skipping...')
+		if not returncode:
+			operator.report({'INFO'}, f"Execution failed with error message: \"{returncode.what()}\". Contact the author for assistance.")
 			return {'CANCELLED'}
-		additive_nif_path = os.path.join(export_folder, nif_name + '_additive.nif')
-		returncode = MeshConverter.EditNifBSGeometries(nif_filepath, json_data, additive_nif_path, export_folder, options.overwrite_material_paths)
-	else:
-		returncode = MeshConverter.CreateNifFromJson(json_data, nif_filepath, export_folder)
 
-	if not returncode:
-		operator.report({'INFO'}, f"Execution failed with error message: \"{returncode.what()}\". Contact the author for assistance.")
-		return {'CANCELLED'}
+		if utils_trace.is_enabled() and os.path.isfile(nif_filepath):
+			utils_trace.count('bytes_written', os.path.getsize(nif_filepath))
+
+		if mesh_store != None:
+			written_nif_path = additive_nif_path if options.additive_export == 'Selected' else nif_filepath
+			mesh_store.set_references(os.path.basename(written_nif_path), variant_stored_meshes, written_nif_path)
+
+	if mesh_store != None and options.export_sf_mesh_collect_garbage:
+		mesh_store.collect_garbage()
 
 	operator.report({'INFO'},f'Export Nif successful.')
 	return {'FINISHED'}
@@ -1,7 +1,5 @@
 import bpy
 
-import NifIO
-
 import nif_armature
 
 import re
@@ -14,6 +12,8 @@ from utils_material import is_mat
 
 import utils_common as utils
 
+NifIO = utils.LazyModule('NifIO')
+
 def re_filter_update(self, context):
 	self.re_nif_file_list.clear()
 	self.re_nif_file_list_index = 0
@@ -89,7 +89,7 @@ class ImportCustomNif(bpy.types.Operator, ImportHelper):
 
 	def get_skeleton_names(default_display_value="None", default_display_name="None"):
 		def get_skeleton_names_impl(self, context):
-			nif_armature.LoadAllSkeletonLookup()
+			nif_armature.EnsureSkeletonLookup()
 			skel_names = nif_armature.GetAvailableSkeletonNames()
 			items = [(' ', default_display_value, default_display_name)]
 			for name in skel_names:
@@ -111,6 +111,11 @@ class ImportCustomNif(bpy.types.Operator, ImportHelper):
 		description="Maximum Loaded LoD, 0 for loading all LoDs.",
 		default=1,
 	)
+	share_mesh_data: bpy.props.BoolProperty(
+		name="Share Mesh Data",
+		description="Meshes already imported in this session from the same unchanged .mesh file are reused as linked duplicates instead of being imported again",
+		default=False,
+	)
 	skeleton_name: bpy.props.EnumProperty(
 		name="Skeleton Template",
 		description="",
@@ -279,6 +284,7 @@ class ImportCustomNif(bpy.types.Operator, ImportHelper):
 		layout.label(text="Import Options:")
 		layout.prop(self, "skeleton_name")
 		layout.prop(self, "max_lod")
+		layout.prop(self, "share_mesh_data")
 		layout.prop(self, "load_havok_skeleten")
 
 		layout.label(text="Register Skeleton To Database:")
@@ -465,6 +471,11 @@ class ExportCustomNif(bpy.types.Operator):
 		description="Export into [hex1]\\[hex2].mesh instead of [name].mesh",
 		default=True,
 	)
+	export_sf_mesh_collect_garbage: bpy.props.BoolProperty(
+		name="Remove unreferenced meshes",
+		description="After export, delete hash named .mesh files this exporter stored in the export folder that none of its exports reference anymore. Files from older exports are kept",
+		default=False,
+	)
 
 	use_internal_geom_data: bpy.props.BoolProperty(
 		name="Use Internal Geometry Data",
@@ -530,6 +541,7 @@ class ExportCustomNif(bpy.types.Operator):
 		layout.prop(self, "use_internal_geom_data")
 		layout.prop(self, "is_head_object")
 		layout.prop(self, "export_sf_mesh_hash_result")
+		layout.prop(self, "export_sf_mesh_collect_garbage")
 
 		layout.separator()
 		layout.label(text="Snapping data:") 
@@ -572,17 +584,16 @@ class ExportCustomNif(bpy.types.Operator):
 				facebone_groups = [group for group in root.vertex_groups if group.name.startswith('faceBone_')]
 
 				if len(facebone_groups) > 0:
-					rtn = NifIO.ExportNif(self, context, self, head_object_mode='Base')
+					nif_filepath = self.filepath
+					export_folder = os.path.dirname(nif_filepath)
+					nif_name = os.path.splitext(os.path.basename(nif_filepath))[0]
+					facebone_marker = "_facebones"
+					facebone_filepath = os.path.join(export_folder, nif_name + facebone_marker + '.nif')
+					# Both nifs come from one gather of the head
+					rtn = NifIO.ExportNifVariants(self, context, self, [('Base', nif_filepath), ('FaceBone', facebone_filepath)])
 					if 'FINISHED' in rtn:
 						self.report({'INFO'}, "Operation successful.")
-						nif_filepath = self.filepath
-						export_folder = os.path.dirname(nif_filepath)
-						nif_name = os.path.splitext(os.path.basename(nif_filepath))[0]
-						facebone_marker = "_facebones"
-						self.filepath = os.path.join(export_folder, nif_name + facebone_marker + '.nif')
-						return NifIO.ExportNif(self, context, self, head_object_mode='FaceBone')
-					else:
-						return rtn
+					return rtn
 				else:
 					self.report({'INFO'}, "The selected object does not have facebone vertex groups. Exporting as-is.")
 					return NifIO.ExportNif(self, context, self)
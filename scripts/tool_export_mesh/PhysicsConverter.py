@@ -1,12 +1,20 @@
 import bpy
 import os
 import json
+import hashlib
+import numpy as np
 
 import nif_armature
 import utils_blender
 import utils_common as utils
+import MeshConverter
 
-def get_physics_data(tree: bpy.types.NodeTree):
+# Bump when the layout of the composed physics data changes on the python side
+_physics_cache_version = 1
+_physics_cache_max_entries = 32
+_transcript_digest_cache = {}
+
+def _evaluate_tree(tree: bpy.types.NodeTree):
     out_nodes: list[bpy.types.Node] = tree.get_output_nodes()
 
     if tree.bl_idname != 'hclPhysicsTreeType':
@@ -22,6 +30,16 @@ def get_physics_data(tree: bpy.types.NodeTree):
     if physics_data_dict is None:
         return None, "Output node must have a valid output"
 
+    return physics_data_dict, "Success"
+
+def get_physics_data(tree: bpy.types.NodeTree):
+    physics_data_dict, error_msg = _evaluate_tree(tree)
+    if physics_data_dict is None:
+        return None, error_msg
+
+    return _build_physics_data(tree, physics_data_dict)
+
+def _build_physics_data(tree: bpy.types.NodeTree, physics_data_dict: dict):
     if physics_data_dict['target'] == 'GenericClothSim':
         particles_dict = physics_data_dict['cloth_data']['particles']
         particles_list = utils.FlattenDictToList(particles_dict, replace_none=True, replace_none_with={})
@@ -33,11 +51,13 @@ def get_physics_data(tree: bpy.types.NodeTree):
 
         colliders = physics_data_dict['cloth_data']['colliders']
         exclude_collision = physics_data_dict['cloth_data']['exclude_collision']
+        num_particles = len(particles_list)
         for collider in colliders:
-            exclude = []
+            collide = np.ones(num_particles, dtype=bool)
             if collider['name'] in exclude_collision:
-                exclude = exclude_collision[collider['name']]
-            collider['collision_mask'] = [i for i in range(len(particles_list)) if i not in exclude]
+                exclude = np.asarray(exclude_collision[collider['name']], dtype=np.int64).ravel()
+                collide[exclude[(exclude >= 0) & (exclude < num_particles)]] = False
+            collider['collision_mask'] = np.flatnonzero(collide).tolist()
 
         armature = tree.skeleton
 
@@ -59,11 +79,9 @@ def get_physics_data(tree: bpy.types.NodeTree):
         utils_blender.ApplyTransform(tri_mesh)
 
         # Collect triangle indices
-        tri_indices = []
-        for poly in tri_mesh.data.polygons:
-            tri_indices.append(poly.vertices[0])
-            tri_indices.append(poly.vertices[1])
-            tri_indices.append(poly.vertices[2])
+        tri_indices = np.empty(len(tri_mesh.data.loops), dtype=np.int32)
+        tri_mesh.data.loops.foreach_get('vertex_index', tri_indices)
+        tri_indices = tri_indices.tolist()
 
         # Collect weights
         utils_blender.RemoveNonBoneVG(tri_mesh, armature)
@@ -112,4 +130,129 @@ def get_physics_data(tree: bpy.types.NodeTree):
 
         return physics_data, "Success"
     
-    return None, "Invalid target type"
\ No newline at end of file
+    return None, "Invalid target type"
+
+def PhysicsCacheFolderPath():
+    cache_path = os.path.join(utils_blender.TempFolderPath(), 'PhysicsCache')
+    os.makedirs(cache_path, exist_ok=True)
+    return cache_path
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    if hasattr(obj, 'name'):
+        return obj.name
+    return str(obj)
+
+def _transcript_digest():
+    transcript_path = MeshConverter.GetTranscriptPath()
+    try:
+        stat = os.stat(transcript_path)
+    except OSError:
+        return 'NO_TRANSCRIPT'
+
+    key = (transcript_path, stat.st_mtime_ns, stat.st_size)
+    if key not in _transcript_digest_cache:
+        sha1 = hashlib.sha1()
+        with open(transcript_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(chunk)
+        _transcript_digest_cache.clear()
+        _transcript_digest_cache[key] = sha1.hexdigest()
+    return _transcript_digest_cache[key]
+
+def _hash_mesh(sha1, mesh_obj: bpy.types.Object):
+    mesh = mesh_obj.data
+    sha1.update(np.array(mesh_obj.matrix_world, dtype=np.float32).tobytes())
+
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    sha1.update(co.tobytes())
+
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+    sha1.update(loop_verts.tobytes())
+
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    sha1.update(loop_totals.tobytes())
+
+    sha1.update('\0'.join(vg.name for vg in mesh_obj.vertex_groups).encode('utf-8'))
+    weights = [(v.index, g.group, g.weight) for v in mesh.vertices for g in v.groups]
+    sha1.update(np.array(weights, dtype=np.float64).tobytes())
+
+def _hash_armature(sha1, armature: bpy.types.Object):
+    bones = armature.data.bones
+    sha1.update(np.array(armature.matrix_world, dtype=np.float32).tobytes())
+    sha1.update('\0'.join(f'{b.name}:{b.parent.name if b.parent else ""}' for b in bones).encode('utf-8'))
+    matrices = np.empty(len(bones) * 16, dtype=np.float32)
+    bones.foreach_get('matrix_local', matrices)
+    sha1.update(matrices.tobytes())
+
+def physics_data_digest(tree: bpy.types.NodeTree, physics_data_dict: dict, platform: MeshConverter.Platform) -> str:
+    '''
+    Digest of everything the composed physics data depends on: the evaluated graph output,
+    the simulation mesh and skeleton it is built against, the target platform and the type transcript.
+    '''
+    sha1 = hashlib.sha1()
+    sha1.update(f'{_physics_cache_version}:{platform.value}:{_transcript_digest()}'.encode('utf-8'))
+    sha1.update(json.dumps(physics_data_dict, sort_keys=True, default=_json_default).encode('utf-8'))
+    _hash_mesh(sha1, tree.mesh)
+    _hash_armature(sha1, tree.skeleton)
+    return sha1.hexdigest()
+
+def _prune_physics_cache(cache_folder: str, keep: int = _physics_cache_max_entries):
+    entries = [os.path.join(cache_folder, f) for f in os.listdir(cache_folder) if f.endswith('.bin')]
+    if len(entries) <= keep:
+        return
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def get_composed_physics_data(tree: bpy.types.NodeTree, platform: MeshConverter.Platform = MeshConverter.Platform.HCL_PLATFORM_X64, use_cache = True):
+    '''
+    Compose the havok binary of a physics tree, reusing the cached blob when nothing it depends on has changed.
+    return: (path to the composed binary or None, message)
+    '''
+    physics_data_dict, error_msg = _evaluate_tree(tree)
+    if physics_data_dict is None:
+        return None, error_msg
+
+    if tree.mesh is None or tree.skeleton is None:
+        return None, "Tree must have a simulation mesh and a skeleton"
+
+    cache_folder = PhysicsCacheFolderPath()
+    digest = physics_data_digest(tree, physics_data_dict, platform)
+    cached_path = os.path.join(cache_folder, digest + '.bin')
+
+    if use_cache and os.path.isfile(cached_path):
+        os.utime(cached_path)
+        print(f'Reusing cached physics data {digest}.')
+        return cached_path, "Success"
+
+    physics_data, error_msg = _build_physics_data(tree, physics_data_dict)
+    if physics_data is None:
+        return None, error_msg
+
+    json_data = json.dumps(physics_data)
+    if utils_blender.is_plugin_debug_mode():
+        with open(os.path.join(cache_folder, digest + '_debug.json'), 'w') as f:
+            f.write(json_data)
+
+    temp_path = cached_path + '.tmp'
+    rtn = MeshConverter.ComposePhysicsDataFromJson(json_data, platform, temp_path)
+    if not rtn:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+        return None, f"Dll failed to compose physics data. Error message: \"{rtn.what()}\"."
+
+    os.replace(temp_path, cached_path)
+    _prune_physics_cache(cache_folder)
+    return cached_path, "Success"
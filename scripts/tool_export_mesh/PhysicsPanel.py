@@ -1,18 +1,18 @@
 import bpy
 import os
 import json
-
-import PhysicsConverter as PhysicsConverter
+import shutil
 
 import utils_common as utils
 import utils_blender as utils_blender
 
 import addon_utils
 
-import MeshConverter
-
 import version
 
+PhysicsConverter = utils.LazyModule('PhysicsConverter')
+MeshConverter = utils.LazyModule('MeshConverter')
+
 class ExportPhysicsDataOperator(bpy.types.Operator):
 	bl_idname = "object.physics_data_export"
 	bl_label = "Export As Portable"
@@ -30,6 +30,17 @@ class ExportPhysicsDataOperator(bpy.types.Operator):
 
 		output_file = os.path.join(context.scene.physics_file_path, f"{utils.sanitize_filename(physics_node_tree.name)}.bin")
 
+		if not utils_blender.is_plugin_debug_mode():
+			composed_path, error_msg = PhysicsConverter.get_composed_physics_data(physics_node_tree, MeshConverter.Platform.HCL_PLATFORM_X64)
+			if composed_path is None:
+				self.report({'ERROR'}, error_msg)
+				physics_node_tree.update_tree(context)
+				return {'CANCELLED'}
+
+			shutil.copyfile(composed_path, output_file)
+			self.report({'INFO'}, "Physics data exported successfully.")
+			return {'FINISHED'}
+
 		data_dict, error_msg = PhysicsConverter.get_physics_data(physics_node_tree)
 
 		if data_dict is None:
@@ -40,12 +51,11 @@ class ExportPhysicsDataOperator(bpy.types.Operator):
 		json_data = json.dumps(data_dict)
 
         # Save the physics data to a json file
-		if utils_blender.is_plugin_debug_mode():
-			physics_data_path = os.path.join(os.path.dirname(output_file), 'physics_data_debug.json')
-			with open(physics_data_path, 'w') as f:
-				json.dump(data_dict, f)
+		physics_data_path = os.path.join(os.path.dirname(output_file), 'physics_data_debug.json')
+		with open(physics_data_path, 'w') as f:
+			json.dump(data_dict, f)
 
-		rtn = MeshConverter.ComposePhysicsDataFromJson(json_data, MeshConverter.Platform.HCL_PLATFORM_X64, output_file, utils_blender.is_plugin_debug_mode())
+		rtn = MeshConverter.ComposePhysicsDataFromJson(json_data, MeshConverter.Platform.HCL_PLATFORM_X64, output_file, True)
 
 		if not rtn:
 			self.report({'ERROR'}, f"Dll failed to compose physics data. Error message: \"{rtn.what()}\".")
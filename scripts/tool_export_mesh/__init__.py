@@ -1,6 +1,9 @@
 import bpy
 import os
 import sys
+import time
+
+_import_start = time.perf_counter()
 
 dir = os.path.dirname(os.path.realpath(__file__))
 if dir not in sys.path:
@@ -20,6 +23,9 @@ import NifIOOperators
 import MorphIOOperators
 import MeshIOOperators
 
+# The IO modules, the dll and BoneRegionsReader are deferred through utils.LazyModule until first use
+utils.startup_times['import'] = time.perf_counter() - _import_start
+
 bl_info = {
 	"name": "Starfield Geometry Bridge",
 	"author": "SesamePaste & Deveris",
@@ -81,6 +87,7 @@ __modules__ = [
 
 # Register the operators and menu entries
 def register():
+	register_start = time.perf_counter()
 
 	for attr in __scene_global_attrs__:
 		setattr(bpy.types.Scene, attr, __scene_global_attrs__[attr]())
@@ -90,6 +97,9 @@ def register():
 	
 	bpy.utils.register_preset_path(os.path.dirname(__file__))
 
+	utils.startup_times['register'] = time.perf_counter() - register_start
+	print(f"Starfield Geometry Bridge registered in {utils.startup_times['register'] * 1000:.1f} ms, module imports took {utils.startup_times['import'] * 1000:.1f} ms")
+
 def unregister():
 
 	for attr in __scene_global_attrs__:
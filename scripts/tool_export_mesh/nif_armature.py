@@ -17,9 +17,12 @@ bone_axis_correction_inv = mathutils.Matrix.Rotation(math.radians(90.0), 4, 'Z')
 skeleton_names = ['skeleton']
 skeleton_pivots = {'skeleton':'C_Head'}
 skeleton_lookup = {}
+skeleton_bone_index = {}
 
 _possible_pivots = ['C_Head', 'COM', 'Root']
 
+_skeleton_list_loaded = False
+
 def GetPivotInfo(skeleton_name):
 	return skeleton_lookup[skeleton_name][skeleton_pivots[skeleton_name]]
 
@@ -35,6 +38,15 @@ def BoneAxisCorrectionRevert(T):
 def SkeletonLookup(skeleton_name:str):
 	return skeleton_lookup[skeleton_name]
 
+def SkeletonBoneIndex(skeleton_name:str) -> utils.BoneIndex:
+	# Rebuilt whenever the skeleton lookup was replaced by (re)registering the skeleton
+	lookup = skeleton_lookup[skeleton_name]
+	cached = skeleton_bone_index.get(skeleton_name)
+	if cached == None or cached[0] is not lookup:
+		cached = (lookup, utils.BoneIndex(lookup.keys()))
+		skeleton_bone_index[skeleton_name] = cached
+	return cached[1]
+
 def SkeletonRegistered(skeleton_name:str):
 	return skeleton_name in skeleton_lookup.keys()
 
@@ -87,6 +99,7 @@ def UnregisterSkeleton(skeleton_name:str):
 
 	skeleton_names.remove(skeleton_name)
 	del skeleton_lookup[skeleton_name]
+	skeleton_bone_index.pop(skeleton_name, None)
 	del skeleton_pivots[skeleton_name]
 
 	skeleton_dict = {}
@@ -128,9 +141,16 @@ def LoadSkeletonLookup(skeleton_name):
 
 	LoadLookupRecursive(data, skeleton_lookup[skeleton_name])
 
+def EnsureSkeletonLookup():
+	# Enum callbacks run on every redraw, only the first one scans the assets folder.
+	# Register/UnregisterSkeleton keep the loaded lists in sync afterwards.
+	if not _skeleton_list_loaded:
+		LoadAllSkeletonLookup()
+
 def LoadAllSkeletonLookup():
 	global skeleton_names
 	global skeleton_pivots
+	global _skeleton_list_loaded
 
 	skeleton_meta_data = os.path.join(utils_blender.PluginAssetsFolderPath(), "_skeleton_list_.meta")
 
@@ -174,6 +194,8 @@ def LoadAllSkeletonLookup():
 		with open(os.path.join(skeleton_folder, "_skeleton_list_.meta"), 'w') as file:
 			file.write(json.dumps(skeleton_dict, indent=4))
 
+	_skeleton_list_loaded = True
+
 
 def MatchSkeleton(bone_list):
 	global skeleton_lookup
@@ -181,8 +203,8 @@ def MatchSkeleton(bone_list):
 	max_count = 1
 	matched_name = None
 	bones = None
-	for name, skele in skeleton_lookup.items():
-		skele_bone_set = set(skele.keys())
+	for name in skeleton_lookup.keys():
+		skele_bone_set = SkeletonBoneIndex(name).name_set
 		common_elements = skele_bone_set & bone_set
 		common_count = len(common_elements)
 		if common_count > max_count:
@@ -202,8 +224,7 @@ def MatchSkeletonAdvanced(bone_list:list, obj_name:str, name_first = False):
 	if name_first:
 		if obj_name in skeleton_lookup.keys():
 			skele_name = obj_name
-			skele = skeleton_lookup[skele_name]
-			skele_bone_set = set(skele.keys())
+			skele_bone_set = SkeletonBoneIndex(skele_name).name_set
 			common_elements = skele_bone_set & bone_set
 			return skele_name, list(common_elements)
 		else:
@@ -219,15 +240,14 @@ def MatchSkeletonAdvanced(bone_list:list, obj_name:str, name_first = False):
 					highest_score = score
 			if best_id != -1:
 				skele_name = skeleton_names[best_id]
-				skele = skeleton_lookup[skele_name]
-				skele_bone_set = set(skele.keys())
+				skele_bone_set = SkeletonBoneIndex(skele_name).name_set
 				common_elements = skele_bone_set & bone_set
 				return skele_name, list(common_elements)
 			else:
 				return None, None
 
-	for name, skele in skeleton_lookup.items():
-		skele_bone_set = set(skele.keys())
+	for name in skeleton_lookup.keys():
+		skele_bone_set = SkeletonBoneIndex(name).name_set
 		common_elements = skele_bone_set & bone_set
 		common_count = len(common_elements)
 		if common_count > max_count:
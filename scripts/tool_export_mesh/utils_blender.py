@@ -138,71 +138,167 @@ def TriangulateMesh(mesh_obj:bpy.types.Object, make_copy = True) -> bpy.types.Ob
 
 	return mesh_obj
 
+class VertexWeightMatrix:
+	'''
+	Dense [n_vertices x n_groups] weights of all vertex groups of a mesh object.
+	Read once, edited as numpy arrays and written back in bulk, one vertex_groups.add call per distinct weight.
+	Unassigned vertices have weight 0, assigned tracks group membership.
+	'''
+	def __init__(self, obj:bpy.types.Object):
+		self.obj = obj
+		self.group_names = [vg.name for vg in obj.vertex_groups]
+		self.num_verts = len(obj.data.vertices)
+		self.weights = np.zeros((self.num_verts, len(self.group_names)), dtype=np.float32)
+		self.assigned = np.zeros((self.num_verts, len(self.group_names)), dtype=bool)
+		self._dirty = set()
+
+		entries = [(v.index, g.group, g.weight) for v in obj.data.vertices for g in v.groups]
+		if len(entries) != 0:
+			entries = np.array(entries, dtype=np.float64)
+			v_ids = entries[:, 0].astype(np.int64)
+			g_ids = entries[:, 1].astype(np.int64)
+			self.weights[v_ids, g_ids] = entries[:, 2]
+			self.assigned[v_ids, g_ids] = True
+
+	def group_index(self, name:str):
+		return self.obj.vertex_groups[name].index if name in self.obj.vertex_groups else None
+
+	def group_indices(self, names:list[str]) -> list[int]:
+		return [self.obj.vertex_groups[name].index for name in names]
+
+	def set_group(self, name:str, values:np.ndarray, assigned:np.ndarray = None):
+		# Creates the vertex group if needed, assigned defaults to every vertex
+		index = self.group_index(name)
+		if index == None:
+			index = self.obj.vertex_groups.new(name = name).index
+			self.group_names.append(name)
+			self.weights = np.hstack((self.weights, np.zeros((self.num_verts, 1), dtype=np.float32)))
+			self.assigned = np.hstack((self.assigned, np.zeros((self.num_verts, 1), dtype=bool)))
+		self.weights[:, index] = values
+		self.assigned[:, index] = True if assigned is None else assigned
+		self._dirty.add(index)
+
+	def combine(self, indices:list[int], combine_mode = 'ADD') -> np.ndarray:
+		if combine_mode == 'MAX':
+			return self.weights[:, indices].max(axis=1)
+		return self.weights[:, indices].sum(axis=1)
+
+	def nonempty_groups(self) -> np.ndarray:
+		return (self.weights != 0).any(axis=0)
+
+	def average(self, vert_mask:np.ndarray, indices:list[int]):
+		# Every masked vertex gets the average weight of the masked vertices, for each group
+		avg = self.weights[np.ix_(vert_mask, indices)].mean(axis=0)
+		self.weights[np.ix_(vert_mask, indices)] = avg
+		self.assigned[np.ix_(vert_mask, indices)] = True
+		self._dirty.update(indices)
+
+	def write(self):
+		all_verts = list(range(self.num_verts))
+		for index in sorted(self._dirty):
+			vg = self.obj.vertex_groups[index]
+			vg.remove(all_verts)
+			v_ids = np.flatnonzero(self.assigned[:, index])
+			values, inverse = np.unique(self.weights[v_ids, index], return_inverse=True)
+			for i, value in enumerate(values):
+				vg.add(v_ids[inverse == i].tolist(), float(value), 'REPLACE')
+		self._dirty.clear()
+
+	def gather(self, min_weight:float, max_blend_entries:int, prune_empty_vertex_groups = True):
+		'''
+		Per vertex [[group_id, weight], ...] of the heaviest weights above min_weight, [[0, 0]] for unweighted vertices.
+		With pruning, group ids are renumbered over the groups that are used.
+		'''
+		mask = self.weights > min_weight
+		if prune_empty_vertex_groups:
+			used = np.flatnonzero(mask.any(axis=0))
+		else:
+			used = np.arange(len(self.group_names))
+		names = [self.group_names[i] for i in used]
+
+		k = min(max_blend_entries, len(used))
+		if k == 0:
+			return [[[0, 0]] for _ in range(self.num_verts)], names
+
+		masked = np.where(mask[:, used], self.weights[:, used], -1)
+		order = np.argsort(-masked, axis=1, kind='stable')[:, :k]
+		values = np.take_along_axis(masked, order, axis=1)
+
+		weights = []
+		for ids, ws in zip(order.tolist(), values.tolist()):
+			entries = [[i, w] for i, w in zip(ids, ws) if w > 0]
+			weights.append(entries if len(entries) != 0 else [[0, 0]])
+		return weights, names
+
+class MeshVertexCountIndex:
+	'''
+	Names of the writable mesh objects by vertex count, so repeated lookups don't scan bpy.data.objects.
+	Rebuilt when the number of objects changes. Entries are checked on lookup, a lookup
+	that finds no valid entry rebuilds once to catch edited or renamed meshes.
+	'''
+	def __init__(self):
+		self.by_vertex_count = {}
+		self._object_count = None
+
+	def rebuild(self):
+		self.by_vertex_count = {}
+		for obj in bpy.data.objects:
+			if obj.type == 'MESH' and read_only_marker not in obj.name:
+				self.by_vertex_count.setdefault(len(obj.data.vertices), []).append(obj.name)
+		self._object_count = len(bpy.data.objects)
+
+	def _find(self, vert_count:int) -> bpy.types.Object|None:
+		for name in self.by_vertex_count.get(vert_count, []):
+			obj = bpy.data.objects.get(name)
+			if obj is not None and obj.type == 'MESH' and read_only_marker not in obj.name and len(obj.data.vertices) == vert_count:
+				return obj
+		return None
+
+	def find(self, vert_count:int) -> bpy.types.Object|None:
+		if self._object_count != len(bpy.data.objects):
+			self.rebuild()
+			return self._find(vert_count)
+
+		obj = self._find(vert_count)
+		if obj is None:
+			self.rebuild()
+			obj = self._find(vert_count)
+		return obj
+
 def ClearEmptyVertexGroups(obj:bpy.types.Object, vertex_groups:list[str] = None):
     '''
     Removes all vertex groups that have no vertices assigned to them.
     :param obj: The object to remove empty vertex groups from.
     :param vertex_groups: A list of vertex group names to remove. If None, all empty vertex groups will be removed.
     '''
-    bm = bmesh.new()
-    bm.from_mesh(obj.data)
-
-    deform_layer = bm.verts.layers.deform.active
+    weight_matrix = VertexWeightMatrix(obj)
 
     if vertex_groups == None:
-        orig_vg_indices = [vg.index for vg in obj.vertex_groups]
+        orig_vg_indices = list(range(len(obj.vertex_groups)))
     else:
-        orig_vg_indices = [obj.vertex_groups[vg_name].index for vg_name in vertex_groups]
-
-    vg_indices = set()
-    for v in bm.verts:
-        d_vert = v[deform_layer]
-        vert_vg_indices = set()
-        for vg_index in orig_vg_indices:
-            rtn = d_vert.get(vg_index)
-            if rtn is not None and rtn != 0:
-                vert_vg_indices.add(vg_index)
-        vg_indices = vg_indices.union(vert_vg_indices)
-
-    vg_to_remove = [obj.vertex_groups[vg_index] for vg_index in orig_vg_indices if vg_index not in vg_indices]
+        orig_vg_indices = weight_matrix.group_indices(vertex_groups)
+
+    nonempty = weight_matrix.nonempty_groups()
+    vg_to_remove = [obj.vertex_groups[vg_index] for vg_index in orig_vg_indices if not nonempty[vg_index]]
     
     for vg in vg_to_remove:
         obj.vertex_groups.remove(vg)
 
-    bm.free()
-
 def AverageSelectedVertWeight(obj:bpy.types.Object, vertex_groups:list[str] = None):
-    bm = bmesh.new()
-    bm.from_mesh(obj.data)
-
-    deform_layer = bm.verts.layers.deform.active
+    weight_matrix = VertexWeightMatrix(obj)
 
     if vertex_groups == None:
-        weight_dict = {vg.index: 0 for vg in obj.vertex_groups}
+        vg_indices = list(range(len(obj.vertex_groups)))
     else:
-        weight_dict = {obj.vertex_groups[vg_name].index:0 for vg_name in vertex_groups}
-    
-    count = 0
-    for v in bm.verts:
-        if not v.select:
-            continue
-        count += 1
-        d_vert = v[deform_layer]
-        for vg_index, weight in d_vert.items():
-            if vg_index in weight_dict:
-                weight_dict[vg_index] += weight
-                
-    weight_dict = {key: value/count for key, value in weight_dict.items()}
-    
-    for v in bm.verts:
-        if not v.select:
-            continue
-        d_vert = v[deform_layer]
-        for vg_index, weight in weight_dict.items():
-            d_vert[vg_index] = weight
+        vg_indices = weight_matrix.group_indices(vertex_groups)
+
+    selected = np.zeros(len(obj.data.vertices), dtype=bool)
+    obj.data.vertices.foreach_get('select', selected)
+    if not selected.any() or len(vg_indices) == 0:
+        return
 
-    bm.to_mesh(obj.data)
-    bm.free()
+    weight_matrix.average(selected, vg_indices)
+    weight_matrix.write()
 
 def HomographyWarp(mesh_obj:bpy.types.Object, source_pts, target_pts, mask_vg_name = None, invert_mask = False, as_shape_key = False, shape_key_name = 'HOMOGRAPHY_WARP'):
 	'''
@@ -318,24 +414,11 @@ def CombineVertexGroups(obj:bpy.types.Object, vertex_groups:list[str], new_name:
         print("No vertex groups to combine.")
         return
 
-    combine_vg_index = combined_vg.index
-    vg_indices = [obj.vertex_groups[vg_name].index for vg_name in vertex_groups if vg_name not in skip_list]
-        
-    bm = bmesh.new()
-    bm.from_mesh(obj.data)
-    
-    deform_layer = bm.verts.layers.deform.active
-
-    for v in bm.verts:
-        d_vert = v[deform_layer]
-        weights = [d_vert[vg_index] for vg_index in vg_indices if vg_index in d_vert]
-        if combine_mode == 'ADD':
-            new_weight = sum(weights)
-        elif combine_mode == 'MAX':
-            new_weight = max(weights)
-        combined_vg.add([v.index], new_weight, 'REPLACE')
+    weight_matrix = VertexWeightMatrix(obj)
+    vg_indices = weight_matrix.group_indices([vg_name for vg_name in vertex_groups if vg_name not in skip_list])
 
-    bm.free()
+    weight_matrix.set_group(new_name, weight_matrix.combine(vg_indices, combine_mode))
+    weight_matrix.write()
 
     if delete_old:
         for vg_name in vertex_groups:
@@ -371,20 +454,12 @@ def SubtractVertexGroups(obj:bpy.types.Object, vertex_groups:list[str], target_v
 		return
 
 	combine_vg_index = combined_vg.index
-	vg_indices = [obj.vertex_groups[vg_name].index for vg_name in vertex_groups if vg_name not in skip_list]
-		
-	bm = bmesh.new()
-	bm.from_mesh(obj.data)
-
-	deform_layer = bm.verts.layers.deform.active
+	weight_matrix = VertexWeightMatrix(obj)
+	vg_indices = weight_matrix.group_indices([vg_name for vg_name in vertex_groups if vg_name not in skip_list])
 
-	for v in bm.verts:
-		d_vert = v[deform_layer]
-		base_weight = d_vert[combine_vg_index] if combine_vg_index in d_vert else 0
-		weights = [d_vert[vg_index] for vg_index in vg_indices if vg_index in d_vert]
-		combined_vg.add([v.index], max(0, base_weight-sum(weights)), 'REPLACE')
-
-	bm.free()
+	base_weight = weight_matrix.weights[:, combine_vg_index]
+	weight_matrix.set_group(target_vg_name, np.maximum(0, base_weight - weight_matrix.combine(vg_indices, 'ADD')))
+	weight_matrix.write()
 
 def ApplyTransform(mesh_obj:bpy.types.Object):
 	prev_active = SetActiveObject(mesh_obj)
@@ -408,133 +483,167 @@ def PreprocessAndProxy(old_obj, use_world_origin, convert_to_mesh = True, do_tri
 			old_obj.active_shape_key_index = shape_key_index
 
 	new_obj = old_obj.copy()
-	new_obj.data = old_obj.data.copy()
 	new_obj.animation_data_clear()
+	if convert_to_mesh:
+		# Bake the modifier stack from the evaluated object, same as converting to mesh
+		depsgraph = bpy.context.evaluated_depsgraph_get()
+		new_obj.data = bpy.data.meshes.new_from_object(old_obj.evaluated_get(depsgraph), preserve_all_data_layers=True, depsgraph=depsgraph)
+		new_obj.modifiers.clear()
+	else:
+		new_obj.data = old_obj.data.copy()
 	bpy.context.collection.objects.link(new_obj)
-	bpy.context.view_layer.objects.active = new_obj
 
-	SetActiveObject(new_obj, True)
-	if convert_to_mesh:
-		bpy.ops.object.convert(target='MESH', merge_customdata=False) # A rare bug causing inconsistence between model and morph
+	mesh:bpy.types.Mesh = new_obj.data
+	mesh.validate()
 
-	new_obj.data.validate()
+	# Mesh clean up, remove loose vertices and edges
+	bm = bmesh.new()
+	bm.from_mesh(mesh)
+	# Edges first, deleting them leaves their vertices behind for the loose vertex pass
+	bmesh.ops.delete(bm, geom=[e for e in bm.edges if len(e.link_faces) == 0], context='EDGES_FACES')
+	bmesh.ops.delete(bm, geom=[v for v in bm.verts if len(v.link_edges) == 0], context='VERTS')
+	bm.to_mesh(mesh)
+	bm.free()
 
-	# Mesh clean up
-	if new_obj.mode != 'EDIT':
-		bpy.ops.object.mode_set(mode='EDIT')
+	if use_world_origin:
+		mesh.transform(new_obj.matrix_world, shape_keys=True)
+		new_obj.matrix_world = mathutils.Matrix.Identity(4)
 
-	# Select all
-	bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='VERT')
-	bpy.ops.mesh.select_all(action='SELECT')
-	bpy.ops.mesh.delete_loose()
-	bpy.ops.mesh.select_all(action='DESELECT')
+	# Seams from UV islands
+	uv_coords = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+	mesh.uv_layers.active.data.foreach_get('uv', uv_coords)
+	seams = _EdgeCornerDiscontinuity(mesh, uv_coords.reshape(-1, 2), 1e-4)
+	mesh.edges.foreach_set('use_seam', seams)
 
-	bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='EDGE')
-	
-	# Select all edges
-	bpy.ops.mesh.select_all(action='SELECT')
-	
-	# Switch to Edge Select mode in UV Editor
-	bpy.ops.uv.select_all(action='SELECT')
-	
-	bpy.ops.uv.seams_from_islands()
-	
-	bpy.ops.object.mode_set(mode='OBJECT')
+	# Normals come from a copy with coincident boundary vertices welded, so normals are continuous across splits
+	base_mesh = mesh.copy()
+	bm = bmesh.new()
+	bm.from_mesh(base_mesh)
+	boundary_verts = list({v for e in bm.edges if e.is_boundary for v in e.verts})
+	bmesh.ops.remove_doubles(bm, verts=boundary_verts, dist=0.0001)
+	bm.to_mesh(base_mesh)
+	bm.free()
 
-	base_obj = new_obj.copy()
-	base_obj.data = new_obj.data.copy()
-	base_obj.animation_data_clear()
-	bpy.context.collection.objects.link(base_obj)
-	bpy.context.view_layer.objects.active = base_obj
+	corner_normals = _TransferCornerNormals(mesh, base_mesh, 0.001)
+	bpy.data.meshes.remove(base_mesh)
 
-	SetActiveObject(base_obj, True)
-	bpy.ops.object.mode_set(mode='EDIT')
-	bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='EDGE')
-	bpy.ops.mesh.select_all(action='DESELECT')
-	bpy.ops.mesh.select_non_manifold(extend=False, use_boundary=True, use_multi_face = False,use_non_contiguous = False, use_verts = False)
-	bpy.ops.mesh.remove_doubles(use_sharp_edge_from_normals=True)
-	bpy.ops.object.mode_set(mode='OBJECT')
+	if auto_add_sharp:
+		sharp = _EdgeCornerDiscontinuity(mesh, corner_normals, 1e-4)
+		edge_sharp = np.zeros(len(mesh.edges), dtype=bool)
+		mesh.edges.foreach_get('use_edge_sharp', edge_sharp)
+		mesh.edges.foreach_set('use_edge_sharp', edge_sharp | sharp)
 
-	SetActiveObject(new_obj, True)
-	bpy.ops.object.mode_set(mode='EDIT')
-	bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='EDGE')
-	bpy.ops.mesh.select_all(action='DESELECT')
-	bpy.ops.mesh.select_non_manifold(extend=False, use_boundary=True, use_multi_face = False,use_non_contiguous = False, use_verts = False)
+	# Carry the normals through splitting and triangulation as a corner attribute
+	normal_attr = mesh.attributes.new('_proxy_normal', 'FLOAT_VECTOR', 'CORNER')
+	normal_attr.data.foreach_set('vector', corner_normals.ravel())
 
-	__obj = bpy.context.edit_object
-	__me = __obj.data
+	bm = bmesh.new()
+	bm.from_mesh(mesh)
 
-	__bm = bmesh.from_edit_mesh(__me)
-	for __e in __bm.edges:
-		if __e.select:
-			__e.smooth = False
+	for e in bm.edges:
+		if e.is_boundary:
+			e.smooth = False
 
+	# split on seams and sharp edges
+	seams = [e for e in bm.edges if e.seam or not e.smooth]
+	bmesh.ops.split_edges(bm, edges=seams)
 
-	bmesh.update_edit_mesh(__me)
-	
-	__bm.free()
+	if do_triangulation:
+		bmesh.ops.triangulate(bm, faces=bm.faces)
 
-	bpy.ops.mesh.edge_split(type='EDGE')
-	
-	bpy.ops.mesh.select_all(action='DESELECT')
-	
-	bpy.ops.object.mode_set(mode='OBJECT')
+	bm.to_mesh(mesh)
+	bm.free()
 
-	if use_world_origin:
-		bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
-	
-	selected_obj = new_obj
-	
-	
-	bpy.ops.object.select_all(action='DESELECT')
-	selected_obj.select_set(True)
+	mesh.polygons.foreach_set('use_smooth', np.ones(len(mesh.polygons), dtype=bool))
 
-	bpy.ops.object.shade_auto_smooth(use_auto_smooth=True)
+	corner_normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+	mesh.attributes['_proxy_normal'].data.foreach_get('vector', corner_normals)
+	mesh.attributes.remove(mesh.attributes['_proxy_normal'])
+	mesh.normals_split_custom_set(corner_normals.reshape(-1, 3))
 
-	if auto_add_sharp:
-		modifier2 = selected_obj.modifiers.new(name = selected_obj.name, type='DATA_TRANSFER')
-		modifier2.object = base_obj
-		#modifier2.vertex_group = double_faces_vg.name
-		#modifier2.invert_vertex_group = True
-		modifier2.use_loop_data = True
-		modifier2.data_types_loops = {'CUSTOM_NORMAL'}
-		modifier2.use_max_distance = True
-		modifier2.max_distance = 0.001
-		modifier2.loop_mapping = "NEAREST_POLYNOR"
-
-		#modifier3 = selected_obj.modifiers.new(name = selected_obj.name, type='DATA_TRANSFER')
-		bpy.ops.object.modifier_apply(modifier=modifier2.name)
-
-	# Create a BMesh from the selected object
-	bm = bmesh.new()
-	bm.from_mesh(selected_obj.data)
-	
-	seams = [e for e in bm.edges if e.seam or not e.smooth]
+	for obj in bpy.context.selected_objects:
+		obj.select_set(False)
+	new_obj.select_set(True)
+	bpy.context.view_layer.objects.active = new_obj
 
-	# split on seams
-	bmesh.ops.split_edges(bm, edges=seams)
+	return old_obj, new_obj
 
-	if do_triangulation:
-		bmesh.ops.triangulate(bm, faces=bm.faces)
+def _NextLoopIndices(mesh:bpy.types.Mesh) -> np.ndarray:
+	loop_start = np.empty(len(mesh.polygons), dtype=np.int64)
+	loop_total = np.empty(len(mesh.polygons), dtype=np.int64)
+	mesh.polygons.foreach_get('loop_start', loop_start)
+	mesh.polygons.foreach_get('loop_total', loop_total)
 
-	bm.to_mesh(selected_obj.data)
-	bm.free()
+	next_loop = np.arange(1, len(mesh.loops) + 1, dtype=np.int64)
+	next_loop[loop_start + loop_total - 1] = loop_start
+	return next_loop
 
-	modifier2 = selected_obj.modifiers.new(name = selected_obj.name, type='DATA_TRANSFER')
-	modifier2.object = base_obj
-	modifier2.use_loop_data = True
-	modifier2.data_types_loops = {'CUSTOM_NORMAL'}
-	modifier2.use_max_distance = True
-	modifier2.max_distance = 0.001
-	modifier2.loop_mapping = "NEAREST_POLYNOR"
+def _EdgeCornerDiscontinuity(mesh:bpy.types.Mesh, corner_values:np.ndarray, tolerance:float) -> np.ndarray:
+	'''
+	Edges whose faces disagree on a per-corner value at either end of the edge, e.g. UV island borders.
+	'''
+	loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+	loop_edges = np.empty(len(mesh.loops), dtype=np.int64)
+	mesh.loops.foreach_get('vertex_index', loop_verts)
+	mesh.loops.foreach_get('edge_index', loop_edges)
+	next_loop = _NextLoopIndices(mesh)
+
+	# Every corner covers both ends of its edge: its own vertex and the vertex of the next corner
+	edges = np.concatenate((loop_edges, loop_edges))
+	keys = edges * len(mesh.vertices) + np.concatenate((loop_verts, loop_verts[next_loop]))
+	values = np.concatenate((corner_values, corner_values[next_loop]))
+
+	order = np.argsort(keys, kind='stable')
+	keys = keys[order]
+	values = values[order]
+	differ = (keys[1:] == keys[:-1]) & (np.abs(values[1:] - values[:-1]).max(axis=1) > tolerance)
+
+	result = np.zeros(len(mesh.edges), dtype=bool)
+	result[edges[order][1:][differ]] = True
+	return result
+
+def _TransferCornerNormals(target_mesh:bpy.types.Mesh, source_mesh:bpy.types.Mesh, max_distance:float) -> np.ndarray:
+	'''
+	Corner normals of source_mesh for every corner of target_mesh. Corners match by index when both meshes
+	still share their topology, otherwise by the nearest source corner, corners farther than max_distance keep their own.
+	'''
+	source_normals = np.empty(len(source_mesh.loops) * 3, dtype=np.float32)
+	source_mesh.corner_normals.foreach_get('vector', source_normals)
+	source_normals = source_normals.reshape(-1, 3)
+	if len(source_mesh.loops) == len(target_mesh.loops) and len(source_mesh.polygons) == len(target_mesh.polygons):
+		return source_normals
+
+	def corner_points(mesh):
+		# Corner position pulled slightly toward its face center, to tell apart corners sharing a vertex
+		co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+		mesh.vertices.foreach_get('co', co)
+		centers = np.empty(len(mesh.polygons) * 3, dtype=np.float32)
+		mesh.polygons.foreach_get('center', centers)
+		loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+		mesh.loops.foreach_get('vertex_index', loop_verts)
+		loop_total = np.empty(len(mesh.polygons), dtype=np.int64)
+		mesh.polygons.foreach_get('loop_total', loop_total)
+		loop_faces = np.repeat(np.arange(len(mesh.polygons)), loop_total)
+		co = co.reshape(-1, 3)[loop_verts]
+		return co + (centers.reshape(-1, 3)[loop_faces] - co) * 1e-3
+
+	source_points = corner_points(source_mesh)
+	target_points = corner_points(target_mesh)
+
+	kd = mathutils.kdtree.KDTree(len(source_points))
+	for i, p in enumerate(source_points):
+		kd.insert(p, i)
+	kd.balance()
+
+	target_normals = np.empty(len(target_mesh.loops) * 3, dtype=np.float32)
+	target_mesh.corner_normals.foreach_get('vector', target_normals)
+	target_normals = target_normals.reshape(-1, 3)
+	for i, p in enumerate(target_points):
+		_, index, dist = kd.find(p)
+		if dist <= max_distance:
+			target_normals[i] = source_normals[index]
+	return target_normals
 
-	#modifier3 = selected_obj.modifiers.new(name = selected_obj.name, type='DATA_TRANSFER')
-	bpy.ops.object.modifier_apply(modifier=modifier2.name)
-	
-	bpy.data.meshes.remove(base_obj.data)
-	
-	return old_obj, selected_obj
-	
 def IsReadOnly(obj):
 	return read_only_marker in obj.name
 
@@ -576,88 +685,190 @@ def move_object_to_parent(objs, parent):
 			obj.parent = parent
 
 
-def SmoothPerimeterNormal(active_obj, selected_obj_list, apply_as_mesh = False, base_obj = None, loop_mapping_base = "TOPOLOGY"):
+def SmoothPerimeterNormal(active_obj, selected_obj_list, apply_as_mesh = False, base_obj = None, loop_mapping_base = "TOPOLOGY", max_distance = 0.001):
+	'''
+	Copy custom normals from base_obj and then from every selected object onto the corners of active_obj,
+	so seams between separately exported parts shade continuously.
+	Corners are matched by index for TOPOLOGY, regardless of distance like Blender's mapping, otherwise by the nearest corner
+	within max_distance whose face faces the same way.
+	Without apply_as_mesh, DATA_TRANSFER modifiers are left on active_obj instead.
+	'''
 	if active_obj in selected_obj_list:
 		selected_obj_list.remove(active_obj)
-	
-	if apply_as_mesh:
-		original_active = SetActiveObject(active_obj)
 
-	if base_obj:
-		modifier = active_obj.modifiers.new(name = base_obj.name, type='DATA_TRANSFER')
-		modifier.object = base_obj
+	if not apply_as_mesh:
+		_AddNormalTransferModifiers(active_obj, selected_obj_list, base_obj, loop_mapping_base, max_distance)
+		return
+
+	_BakeModifiers(active_obj)
+	mesh:bpy.types.Mesh = active_obj.data
+	depsgraph = bpy.context.evaluated_depsgraph_get()
+
+	points, face_normals, normals = _CornerData(active_obj, active_obj.matrix_world)
+	to_local = np.array(active_obj.matrix_world.inverted().to_3x3(), dtype=np.float32)
+
+	# Vertices in the mask group keep their own normals, with blending for partial weights
+	factor = np.ones(len(mesh.loops), dtype=np.float32)
+	if 'DOUBLE_FACES_VERTS' in active_obj.vertex_groups:
+		vg_index = active_obj.vertex_groups['DOUBLE_FACES_VERTS'].index
+		vert_factor = np.ones(len(mesh.vertices), dtype=np.float32)
+		for v in mesh.vertices:
+			for g in v.groups:
+				if g.group == vg_index:
+					vert_factor[v.index] = 1 - g.weight
+		loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+		mesh.loops.foreach_get('vertex_index', loop_verts)
+		factor = vert_factor[loop_verts]
+
+	sources = [(base_obj, loop_mapping_base)] if base_obj else []
+	sources += [(target_obj, 'NEAREST_POLYNOR') for target_obj in selected_obj_list if target_obj is not None]
+	for source_obj, loop_mapping in sources:
+		source_eval = source_obj.evaluated_get(depsgraph)
+		s_points, s_face_normals, s_normals = _CornerData(source_eval, source_obj.matrix_world)
+
+		if loop_mapping == 'TOPOLOGY' and len(s_points) == len(points):
+			matched = indices = np.arange(len(points))
+		else:
+			matched, indices = _MatchCornersByPolyNormal(points, face_normals, s_points, s_face_normals, max_distance)
+
+		rotation = to_local @ np.array(source_obj.matrix_world.to_3x3(), dtype=np.float32)
+		transferred = s_normals[indices] @ rotation.T
+		if mix_normal:
+			transferred = transferred + normals[matched]
+		blend = factor[matched, None]
+		normals[matched] = normals[matched] * (1 - blend) + transferred * blend
+
+	normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-8)[:, None]
+	mesh.normals_split_custom_set(normals)
+
+def _BakeModifiers(obj:bpy.types.Object):
+	# Evaluated mesh written back into the same data-block, callers hold on to obj.data
+	if len(obj.modifiers) == 0 or obj.data.shape_keys is not None:
+		return
+	depsgraph = bpy.context.evaluated_depsgraph_get()
+	bm = bmesh.new()
+	bm.from_object(obj, depsgraph)
+	bm.to_mesh(obj.data)
+	bm.free()
+	obj.modifiers.clear()
+
+def _CornerData(obj:bpy.types.Object, matrix_world:mathutils.Matrix):
+	'''
+	World space position and face normal of every corner, and its corner normal in object space.
+	'''
+	mesh:bpy.types.Mesh = obj.data
+	co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+	mesh.vertices.foreach_get('co', co)
+	loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+	mesh.loops.foreach_get('vertex_index', loop_verts)
+	loop_total = np.empty(len(mesh.polygons), dtype=np.int64)
+	mesh.polygons.foreach_get('loop_total', loop_total)
+	face_normals = np.empty(len(mesh.polygons) * 3, dtype=np.float32)
+	mesh.polygons.foreach_get('normal', face_normals)
+	normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+	mesh.corner_normals.foreach_get('vector', normals)
+
+	matrix = np.array(matrix_world, dtype=np.float32)
+	points = co.reshape(-1, 3)[loop_verts] @ matrix[:3, :3].T + matrix[:3, 3]
+	loop_faces = np.repeat(np.arange(len(mesh.polygons)), loop_total)
+	face_normals = face_normals.reshape(-1, 3)[loop_faces] @ matrix[:3, :3].T
+	face_normals /= np.maximum(np.linalg.norm(face_normals, axis=1), 1e-8)[:, None]
+	return points, face_normals, normals.reshape(-1, 3)
+
+def _MatchCornersByPolyNormal(points, face_normals, s_points, s_face_normals, max_distance, k = 8):
+	'''
+	For every corner, the source corner within max_distance whose face normal is closest to its own.
+	Returns the indices of the matched corners and of their source corners.
+	'''
+	from scipy.spatial import cKDTree
+	k = min(k, len(s_points))
+	if k == 0:
+		return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+	dists, indices = cKDTree(s_points).query(points, k=k, distance_upper_bound=max_distance)
+	dists = dists.reshape(len(points), k)
+	indices = indices.reshape(len(points), k)
+	valid = np.isfinite(dists)
+
+	# Missing neighbours are reported with index len(s_points)
+	safe_indices = np.where(valid, indices, 0)
+	alignment = np.einsum('ij,ikj->ik', face_normals, s_face_normals[safe_indices])
+	alignment[~valid] = -np.inf
+	best = np.argmax(alignment, axis=1)
+
+	matched = np.flatnonzero(valid.any(axis=1))
+	return matched, safe_indices[matched, best[matched]]
+
+def _AddNormalTransferModifiers(active_obj, selected_obj_list, base_obj, loop_mapping_base, max_distance):
+	sources = [(base_obj, loop_mapping_base)] if base_obj else []
+	sources += [(target_obj, None) for target_obj in selected_obj_list if target_obj is not None]
+	for source_obj, loop_mapping in sources:
+		modifier = active_obj.modifiers.new(name = source_obj.name, type='DATA_TRANSFER')
+		modifier.object = source_obj
 		if 'DOUBLE_FACES_VERTS' in active_obj.vertex_groups:
 			modifier.vertex_group = 'DOUBLE_FACES_VERTS'
 			modifier.invert_vertex_group = True
 		modifier.use_loop_data = True
 		modifier.data_types_loops = {'CUSTOM_NORMAL'}
 		modifier.use_max_distance = True
-		modifier.max_distance = 0.001
-		modifier.loop_mapping = loop_mapping_base
-		if apply_as_mesh:
-			bpy.ops.object.modifier_apply(modifier=modifier.name)
-
-	for target_obj in selected_obj_list:
-		if target_obj is not None:
-			modifier = active_obj.modifiers.new(name = target_obj.name, type='DATA_TRANSFER')
-			modifier.object = target_obj
-			if 'DOUBLE_FACES_VERTS' in active_obj.vertex_groups:
-				modifier.vertex_group = 'DOUBLE_FACES_VERTS'
-				modifier.invert_vertex_group = True
-			modifier.use_loop_data = True
-			modifier.data_types_loops = {'CUSTOM_NORMAL'}
-			modifier.use_max_distance = True
-			modifier.max_distance = 0.001
-			if mix_normal:
-				modifier.mix_mode = 'ADD'
-			if apply_as_mesh:
-				bpy.ops.object.modifier_apply(modifier=modifier.name)
-
-	if apply_as_mesh:
-		SetActiveObject(original_active)
+		modifier.max_distance = max_distance
+		if loop_mapping:
+			modifier.loop_mapping = loop_mapping
+		elif mix_normal:
+			modifier.mix_mode = 'ADD'
 
 def CalcVIdLIdlist(mesh):
-	vid_lid_list = [0 for _ in range(len(mesh.vertices))]
-	for face in mesh.polygons:
-		for l_id in face.loop_indices:
-			vid_lid_list[mesh.loops[l_id].vertex_index] = l_id
+	# Last loop of every vertex, 0 for vertices without faces
+	loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+	mesh.loops.foreach_get('vertex_index', loop_verts)
+	vid_lid_list = np.zeros(len(mesh.vertices), dtype=np.int64)
+	np.maximum.at(vid_lid_list, loop_verts, np.arange(len(mesh.loops), dtype=np.int64))
 	return vid_lid_list
 
 def GetNormalTangents(mesh, with_tangent = True, fast_mode = False, fast_mode_list = None):
-	if fast_mode and fast_mode_list != None:
-		if with_tangent:
-			mesh.calc_tangents()		
-			Normals = [np.array(mesh.corner_normals[loop_idx]) for loop_idx in fast_mode_list]
-			
-			if with_tangent:
-				Bitangent_sign = [mesh.loops[loop_idx].bitangent_sign for loop_idx in fast_mode_list]
-				Tangents = [utils_math.GramSchmidtOrthogonalize(np.array(mesh.loops[loop_idx].tangent), n) for loop_idx, n in zip(fast_mode_list, Normals)]
-				return np.array(Normals), np.array(Tangents), np.array(Bitangent_sign)
-	
-			return np.array(Normals), None, None
-	else:
-		verts_count = len(mesh.vertices)
-		Normals = [np.array([0,0,0]) for i in range(verts_count)]
-		if with_tangent:
-			Bitangent_sign = [1 for i in range(verts_count)]
-			Tangents = [np.array([0,0,0]) for i in range(verts_count)]
-			mesh.calc_tangents()
-		for face in mesh.polygons:
-			for vert_idx, loop_idx in zip(face.vertices, face.loop_indices):
-				Normals[vert_idx] = Normals[vert_idx] + np.array(mesh.corner_normals[loop_idx])
-				if with_tangent:
-					Bitangent_sign[vert_idx] = mesh.loops[loop_idx].bitangent_sign
-					Tangents[vert_idx] = Tangents[vert_idx] + np.array(mesh.loops[loop_idx].tangent)
-
-		_Normals = [utils_math.NormalizeVec(n) for n in Normals]
-
-		if with_tangent:
-			_Tangents = [utils_math.GramSchmidtOrthogonalize(t, np.array(n)) for t, n in zip(Tangents, _Normals)]
-			return np.array(_Normals), np.array(_Tangents), np.array(Bitangent_sign)
-		else:
-			_Tangents = None
-			Bitangent_sign = None
-			return np.array(_Normals), None, None
+	'''
+	Per vertex normals, tangents and bitangent signs as numpy arrays.
+	Fast mode reads the loops in fast_mode_list (see CalcVIdLIdlist), otherwise the loops of each vertex are averaged.
+	'''
+	corner_normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+	mesh.corner_normals.foreach_get('vector', corner_normals)
+	corner_normals = corner_normals.reshape(-1, 3)
+
+	if with_tangent:
+		mesh.calc_tangents()
+		corner_tangents = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+		mesh.loops.foreach_get('tangent', corner_tangents)
+		corner_tangents = corner_tangents.reshape(-1, 3)
+		corner_signs = np.empty(len(mesh.loops), dtype=np.float32)
+		mesh.loops.foreach_get('bitangent_sign', corner_signs)
+
+	if fast_mode and fast_mode_list is not None:
+		loop_ids = np.asarray(fast_mode_list, dtype=np.int64)
+		normals = corner_normals[loop_ids]
+		if not with_tangent:
+			return normals, None, None
+		tangents = utils_math.GramSchmidtOrthogonalizeRows(corner_tangents[loop_ids], normals)
+		return normals, tangents, corner_signs[loop_ids]
+
+	verts_count = len(mesh.vertices)
+	loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+	mesh.loops.foreach_get('vertex_index', loop_verts)
+
+	normals = np.zeros((verts_count, 3), dtype=np.float32)
+	np.add.at(normals, loop_verts, corner_normals)
+	utils_math.NormalizeRows(normals)
+	if not with_tangent:
+		return normals, None, None
+
+	tangents = np.zeros((verts_count, 3), dtype=np.float32)
+	np.add.at(tangents, loop_verts, corner_tangents)
+	tangents = utils_math.GramSchmidtOrthogonalizeRows(tangents, normals)
+
+	# Sign of the last loop of each vertex
+	bitangent_signs = np.ones(verts_count, dtype=np.float32)
+	has_loops = np.bincount(loop_verts, minlength=verts_count) != 0
+	bitangent_signs[has_loops] = corner_signs[CalcVIdLIdlist(mesh)[has_loops]]
+	return normals, tangents, bitangent_signs
 
 def VisualizeVectors(obj_mesh, offsets, vectors, name = "Vectors"):
 	vis_obj = None
@@ -750,26 +961,38 @@ def ApplyAllModifiers(obj):
 	SetSelectObjects(selected)
 	SetActiveObject(active)
 
-def GetVertColorPerVert(obj):
-    vert_number = len(obj.data.vertices)
-    v_colors = [(1,1,1,1) for i in range(vert_number)]
-    mesh = obj.data
-    try:
-        color_layer = mesh.vertex_colors[0]
-    except:
-        return v_colors, False
-    mesh_loops = {li: loop.vertex_index for li, loop in enumerate(mesh.loops)}
-    vtx_colors = {mesh_loops[li]: data.color for li, data in color_layer.data.items()}
-    for idx, color in vtx_colors.items():
-        v_colors[idx] = color
+def GetVertColorArray(mesh:bpy.types.Mesh) -> tuple[np.ndarray, bool]:
+	'''
+	[n_vertices x 4] colors of the first color layer averaged over the loops of each vertex, white when the mesh has no colors.
+	'''
+	verts_count = len(mesh.vertices)
+	if len(mesh.vertex_colors) == 0:
+		return np.ones((verts_count, 4), dtype=np.float32), False
+
+	loop_colors = np.empty(len(mesh.loops) * 4, dtype=np.float32)
+	mesh.vertex_colors[0].data.foreach_get('color', loop_colors)
+	loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+	mesh.loops.foreach_get('vertex_index', loop_verts)
+
+	counts = np.bincount(loop_verts, minlength=verts_count)
+	colors = np.stack([np.bincount(loop_verts, weights=channel, minlength=verts_count) for channel in loop_colors.reshape(-1, 4).T], axis=1)
+	v_colors = np.ones((verts_count, 4), dtype=np.float32)
+	has_loops = counts != 0
+	v_colors[has_loops] = colors[has_loops] / counts[has_loops, None]
+	return v_colors, True
+
+def SetVertColorArray(mesh:bpy.types.Mesh, v_colors:np.ndarray):
+	loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+	mesh.loops.foreach_get('vertex_index', loop_verts)
+	v_colors = np.asarray(v_colors, dtype=np.float32).reshape(-1, 4)
+	mesh.vertex_colors.active.data.foreach_set('color', v_colors[loop_verts].ravel())
 
-    return v_colors, True
+def GetVertColorPerVert(obj):
+	v_colors, has_color = GetVertColorArray(obj.data)
+	return [tuple(color) for color in v_colors.tolist()], has_color
 
 def SetVertColorPerVert(obj, v_colors):
-	col = obj.data.vertex_colors.active
-	for poly in obj.data.polygons:
-		for v_ix, l_ix in zip(poly.vertices, poly.loop_indices):
-			col.data[l_ix].color = v_colors[v_ix]
+	SetVertColorArray(obj.data, v_colors)
 
 def ColorToRGB888(color):
 	rgb = list(color)[:-1]
@@ -819,6 +1042,44 @@ def RevertRenamingBone(name:str):
 def RevertRenamingBoneList(names:list):
 	return [RevertRenamingBone(name) for name in names]
 
+def MeshFromTriangles(name:str, positions, triangles) -> bpy.types.Mesh:
+	positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+	triangles = np.asarray(triangles, dtype=np.int32).reshape(-1, 3)
+	bl_mesh = bpy.data.meshes.new(name = name)
+	bl_mesh.vertices.add(len(positions))
+	bl_mesh.vertices.foreach_set('co', positions.ravel())
+	bl_mesh.loops.add(triangles.size)
+	bl_mesh.loops.foreach_set('vertex_index', triangles.ravel())
+	bl_mesh.polygons.add(len(triangles))
+	bl_mesh.polygons.foreach_set('loop_start', np.arange(0, triangles.size, 3, dtype=np.int32))
+	bl_mesh.update(calc_edges=True)
+	return bl_mesh
+
+def AddVertexGroupWeights(obj:bpy.types.Object, vertex_ids, group_ids, weights, group_names:list[str], type = 'REPLACE') -> list[bpy.types.VertexGroup]:
+	'''
+	Bulk vertex group population from flat (vertex_ids, group_ids, weights) arrays, group_ids index into group_names.
+	Groups are created when missing, and each group gets one add call per distinct weight.
+	'''
+	vertex_ids = np.asarray(vertex_ids, dtype=np.int64)
+	group_ids = np.asarray(group_ids, dtype=np.int64)
+	weights = np.asarray(weights, dtype=np.float32)
+
+	vgs = [obj.vertex_groups[name] if name in obj.vertex_groups else obj.vertex_groups.new(name = name) for name in group_names]
+	if len(vertex_ids) == 0:
+		return vgs
+
+	order = np.lexsort((weights, group_ids))
+	vertex_ids = vertex_ids[order]
+	group_ids = group_ids[order]
+	weights = weights[order]
+
+	# Runs of the same group and weight
+	run_starts = np.flatnonzero(np.concatenate(([True], (group_ids[1:] != group_ids[:-1]) | (weights[1:] != weights[:-1]))))
+	run_ends = np.append(run_starts[1:], len(order))
+	for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+		vgs[group_ids[start]].add(vertex_ids[start:end].tolist(), float(weights[start]), type)
+	return vgs
+
 def BuildhkBufferedMesh(mesh: dict, hkaSkeleton_obj: bpy.types.Object):
 	mesh_objs = []
 	mesh_type = mesh['type']
@@ -836,21 +1097,30 @@ def BuildhkBufferedMesh(mesh: dict, hkaSkeleton_obj: bpy.types.Object):
 		mesh_obj.matrix_world = T
 		mesh_objs.append(mesh_obj)
 	elif mesh_type == 0:
-		positions = mesh['positions']
 		normals = mesh['normals']
-		triangles = mesh['triangleIndices']
-		boneWeights = utils.TransformWeightData(mesh['boneWeights'], do_normalize=True)
-		bl_mesh = bpy.data.meshes.new(name = name)
-		bl_mesh.from_pydata(positions, [], triangles)
+		bl_mesh = MeshFromTriangles(name, mesh['positions'], mesh['triangleIndices'])
 		mesh_obj = bpy.data.objects.new(name, bl_mesh)
 		bpy.context.scene.collection.objects.link(mesh_obj)
 		mesh_obj.matrix_world = T
 
-		for b_id, b_entry in boneWeights.items():
-			vg = mesh_obj.vertex_groups.new(name = hkaSkeleton_obj.data.bones[b_id].name)
-			for v_id, weight in b_entry:
-				vg.add([v_id], weight, 'REPLACE')
-
+		entries = [(v_id, b_id, weight) for v_id, v_entries in enumerate(mesh['boneWeights']) for b_id, weight in v_entries]
+		if len(entries) != 0:
+			entries = np.array(entries, dtype=np.float64)
+			v_ids = entries[:, 0].astype(np.int64)
+			b_ids = entries[:, 1].astype(np.int64)
+			weights = entries[:, 2]
+			totals = np.bincount(v_ids, weights=weights, minlength=len(bl_mesh.vertices))
+			weights = np.divide(weights, totals[v_ids], out=np.zeros_like(weights), where=totals[v_ids] != 0)
+			positive = weights > 0
+			v_ids, b_ids, weights = v_ids[positive], b_ids[positive], weights[positive]
+
+			# Groups in order of first use, as bones appear in the weight data
+			used_bones, first_use, group_ids = np.unique(b_ids, return_index=True, return_inverse=True)
+			order = np.argsort(first_use, kind='stable')
+			rank = np.empty_like(order)
+			rank[order] = np.arange(len(order))
+			group_names = [hkaSkeleton_obj.data.bones[int(b_id)].name for b_id in used_bones[order]]
+			AddVertexGroupWeights(mesh_obj, v_ids, rank[group_ids], weights, group_names)
 
 		vis_obj = VisualizeVectors(bl_mesh, [], normals, 'normals')
 		mesh_objs.append(mesh_obj)
@@ -1048,94 +1318,87 @@ def RemoveNonBoneVG(obj:bpy.types.Object, skeleton:bpy.types.Object):
 			obj.vertex_groups.remove(vg)
 
 def GatherWeights(obj:bpy.types.Object, quantize_bytes = 2, max_blend_entries = 8, prune_empty_vertex_groups = True):
-	vertex_groups = obj.vertex_groups
-	if prune_empty_vertex_groups:
-		vgrp_markers = [[vg.name, -1] for vg in vertex_groups]
-	else:
-		vgrp_markers = [[vg.name, i] for vg, i in zip(vertex_groups, range(len(vertex_groups)))]
-	new_id = 0
-
-	bm = bmesh.new()
-	bm.from_mesh(obj.data)
-	bm.verts.layers.deform.verify()
-
-	deform = bm.verts.layers.deform.active
-	
-	weights = []
 	_min_weight = 1 / (256 ** quantize_bytes - 2)
-	for v in bm.verts:
-		g = v[deform]
-		
-		weights.append([])
-		for vg_id, weight in g.items():
-			if weight > _min_weight:
-				if vgrp_markers[vg_id][1] == -1:
-					vgrp_markers[vg_id][1] = new_id
-					new_id += 1
-				weights[-1].append([vgrp_markers[vg_id][1], weight])
-		
-		if len(weights[-1]) > max_blend_entries:
-			index_list = sorted(range(len(weights[-1])), key=lambda k: weights[-1][k], reverse=True)
-			weights[-1] = [weights[-1][i] for i in index_list[:max_blend_entries]]
-		
-		if len(weights[-1]) == 0:
-			weights[-1].append([0, 0])
+	return VertexWeightMatrix(obj).gather(_min_weight, max_blend_entries, prune_empty_vertex_groups)
 
-	vgrp_markers = sorted(vgrp_markers, key=lambda x: x[1])
-	vgrp_names = [vg[0] for vg in vgrp_markers if vg[1] != -1]
-
-	bm.free()
+def _RemapWeightIds(weights, lookup:np.ndarray, missing_msg:str):
+	'''
+	Remap the bone ids of [vertex: [entry: [bone_id, weight]]] in place through a lookup array.
+	Entries mapping to -1 (or out of range) are reported and make the remap fail.
+	'''
+	ids = np.fromiter((v[0] for w in weights for v in w), dtype=np.int64)
+	valid = (ids >= 0) & (ids < len(lookup))
+	mapped = np.take(np.append(lookup, -1), np.where(valid, ids, len(lookup)))
+	missing = mapped < 0
+	if missing.any():
+		print(missing_msg.format(ids[np.argmax(missing)]))
+		return None
 
-	return weights, vgrp_names
+	mapped = mapped.tolist()
+	k = 0
+	for w in weights:
+		for v in w:
+			v[0] = mapped[k]
+			k += 1
+	return np.unique(mapped) if len(mapped) else np.empty(0, dtype=np.int64)
 
 def RemapBoneIdToSkeleton(weights, vgrp_names, skeleton:bpy.types.Object):
-	remap = {}
-	used_indices = set()
-	skele_bones = [bone.name for bone in skeleton.data.bones]
-	for i, bone in enumerate(vgrp_names):
-		if bone in skele_bones:
-			remap[i] = skele_bones.index(bone)
-			used_indices.add(skele_bones.index(bone))
-
-	for i, w in enumerate(weights):
-		for j, v in enumerate(w):
-			if v[0] in remap:
-				weights[i][j][0] = remap[v[0]]
-			else:
-				print(f"Bone {v[0]} not found in skeleton.")
-				return None, None
-			
-	return weights, list(used_indices)
+	skele_index = utils.BoneIndex([bone.name for bone in skeleton.data.bones])
+	lookup = skele_index.lookup(vgrp_names)
+
+	used_indices = _RemapWeightIds(weights, lookup, "Bone {} not found in skeleton.")
+	if used_indices is None:
+		return None, None
+
+	return weights, used_indices.tolist()
 
 def RemapBoneIdToSubset(weights, subset:list, order_subset = True):
-	remap = {}
 	if order_subset:
 		subset = sorted(subset)
-	for i, bone_id in enumerate(subset):
-		remap[bone_id] = i
 
-	for i, w in enumerate(weights):
-		for j, v in enumerate(w):
-			if v[0] in remap:
-				weights[i][j][0] = remap[v[0]]
-			else:
-				print(f"Bone {v[0]} not found in subset.")
-				return None, None
-			
+	lookup = np.full(max(subset) + 1 if len(subset) else 0, -1, dtype=np.int64)
+	lookup[np.asarray(subset, dtype=np.int64)] = np.arange(len(subset))
+
+	if _RemapWeightIds(weights, lookup, "Bone {} not found in subset.") is None:
+		return None, None
+
 	return weights, subset
 
 def NormalizeAndQuantizeWeights(weights, quantize_bytes = 2):
+	'''
+	Normalize [vertex: [entry: [bone_id, weight]]] to integers summing up to 256 ** quantize_bytes - 1, entries sorted by weight.
+	'''
+	if len(weights) == 0:
+		return weights
+
 	max_value = 256 ** quantize_bytes - 1
-	for i, w in enumerate(weights):
-		_sum = sum([v[1] for v in w])
-		weights[i] = [[v[0], int(max_value * v[1] / _sum)] for v in w]
-		# Sort by weight
-		weights[i] = sorted(weights[i], key=lambda x: x[1], reverse=True)
-		# Make sure weights sum up to max_value
-		if len(weights[i]) > 1:
-			weights[i][0][1] = max_value - sum([v[1] for v in weights[i][1:]])
-		else:
-			weights[i][0][1] = max_value
+	lengths = np.fromiter((len(w) for w in weights), dtype=np.int64, count=len(weights))
+
+	# Pad to [n_vertices x max_entries], padding has weight -1 so it sorts last
+	width = lengths.max()
+	valid = np.arange(width)[np.newaxis, :] < lengths[:, np.newaxis]
+	flat = np.array([v for w in weights for v in w], dtype=np.float64).reshape(-1, 2)
+	ids = np.zeros((len(weights), width), dtype=np.int64)
+	values = np.full((len(weights), width), -1, dtype=np.float64)
+	ids[valid] = flat[:, 0]
+	values[valid] = flat[:, 1]
+
+	_sum = np.where(valid, values, 0).sum(axis=1, keepdims=True)
+	_sum[_sum == 0] = 1
+	quantized = np.where(valid, np.floor(max_value * values / _sum), -1).astype(np.int64)
+
+	# Sort by weight
+	order = np.argsort(-quantized, axis=1, kind='stable')
+	ids = np.take_along_axis(ids, order, axis=1)
+	quantized = np.take_along_axis(quantized, order, axis=1)
+
+	# Make sure weights sum up to max_value
+	quantized[:, 0] = max_value - np.where(valid[:, 1:], quantized[:, 1:], 0).sum(axis=1)
+
+	ids = ids.tolist()
+	quantized = quantized.tolist()
+	for i, length in enumerate(lengths.tolist()):
+		weights[i] = [[ids[i][j], quantized[i][j]] for j in range(length)]
 	return weights
 
 def RemoveMeshObj(mesh_obj):
@@ -1144,20 +1407,68 @@ def RemoveMeshObj(mesh_obj):
 def is_plugin_debug_mode() -> bool:
 	return bpy.context.scene.sgb_debug_mode == True
 
-def TransferWeightByDistance(target_obj: bpy.types.Object, reference_obj: bpy.types.Object):
+def TransferWeightByDistance(target_obj: bpy.types.Object, reference_obj: bpy.types.Object, vert_mapping = 'NEAREST'):
+	'''
+	Copy every vertex group of reference_obj onto target_obj, in world space.
+		NEAREST: weights of the nearest reference vertex
+		POLYINTERP_NEAREST: weights interpolated over the nearest reference triangle
+	'''
 	if target_obj == None or reference_obj == None:
 		return
-	for r_vg in reference_obj.vertex_groups:
-		if r_vg.name not in target_obj.vertex_groups:
-			target_obj.vertex_groups.new(name = r_vg.name)
-	original_active = SetActiveObject(target_obj)
-	modifier = target_obj.modifiers.new(name = 'WeightTransfer', type='DATA_TRANSFER')
-	modifier.object = reference_obj
-	modifier.use_vert_data = True
-	modifier.data_types_verts = {'VGROUP_WEIGHTS'}
-	bpy.ops.object.modifier_apply(modifier=modifier.name)
-
-	SetActiveObject(original_active)
+	from scipy.spatial import cKDTree
+
+	ref_mesh:bpy.types.Mesh = reference_obj.data
+	if len(ref_mesh.vertices) == 0:
+		return
+	ref_weights = VertexWeightMatrix(reference_obj)
+	target_weights = VertexWeightMatrix(target_obj)
+
+	points = _WorldVertexPositions(target_obj)
+	ref_points = _WorldVertexPositions(reference_obj)
+
+	if vert_mapping == 'POLYINTERP_NEAREST':
+		ref_mesh.calc_loop_triangles()
+	if vert_mapping == 'POLYINTERP_NEAREST' and len(ref_mesh.loop_triangles) != 0:
+		tris = np.empty(len(ref_mesh.loop_triangles) * 3, dtype=np.int64)
+		ref_mesh.loop_triangles.foreach_get('vertices', tris)
+		tris = tris.reshape(-1, 3)
+		_, tri_ids = cKDTree(ref_points[tris].mean(axis=1)).query(points, k=1)
+		corner_ids = tris[tri_ids]
+		bary = _ClampedBarycentric(points, ref_points[corner_ids])
+		values = np.einsum('ij,ijk->ik', bary, ref_weights.weights[corner_ids])
+		assigned = ref_weights.assigned[corner_ids].any(axis=1)
+	else:
+		_, nearest = cKDTree(ref_points).query(points, k=1)
+		values = ref_weights.weights[nearest]
+		assigned = ref_weights.assigned[nearest]
+
+	for i, name in enumerate(ref_weights.group_names):
+		target_weights.set_group(name, values[:, i], assigned[:, i])
+	target_weights.write()
+
+def _WorldVertexPositions(obj:bpy.types.Object) -> np.ndarray:
+	co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+	obj.data.vertices.foreach_get('co', co)
+	matrix = np.array(obj.matrix_world, dtype=np.float32)
+	return co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+def _ClampedBarycentric(points:np.ndarray, triangles:np.ndarray) -> np.ndarray:
+	# Barycentric coordinates of points projected onto their triangles, clamped inside the triangle
+	a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+	v0, v1, v2 = b - a, c - a, points - a
+	d00 = np.einsum('ij,ij->i', v0, v0)
+	d01 = np.einsum('ij,ij->i', v0, v1)
+	d11 = np.einsum('ij,ij->i', v1, v1)
+	d20 = np.einsum('ij,ij->i', v2, v0)
+	d21 = np.einsum('ij,ij->i', v2, v1)
+	denom = d00 * d11 - d01 * d01
+	denom[np.abs(denom) < 1e-12] = np.inf
+	v = (d11 * d20 - d01 * d21) / denom
+	w = (d00 * d21 - d01 * d20) / denom
+	bary = np.clip(np.stack((1 - v - w, v, w), axis=1), 0, None)
+	total = bary.sum(axis=1)
+	bary[total == 0] = (1, 0, 0)
+	return bary / bary.sum(axis=1)[:, None]
 
 def get_preferences():
     return bpy.context.preferences.addons["tool_export_mesh"].preferences
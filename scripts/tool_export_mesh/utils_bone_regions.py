@@ -1,5 +1,4 @@
 import bpy
-import BoneRegionsReader
 import numpy as np
 import mathutils
 import functools
@@ -7,6 +6,10 @@ import math
 
 from nif_armature import BoneAxisCorrection, BoneAxisCorrectionRevert, bone_axis_correction, bone_axis_correction_inv
 
+from utils_common import LazyModule
+
+BoneRegionsReader = LazyModule('BoneRegionsReader')
+
 def br_data():
     return BoneRegionsReader.__bone_regions_data__
 
@@ -9,6 +9,10 @@ from time import time
 
 import random
 
+import numpy as np
+
+import utils_trace
+
 def _try_import(import_str, exception_str = None, silent = False, raise_exception = True):
 	try:
 		exec(import_str)
@@ -35,6 +39,45 @@ def __prop_wrapper(prop_func, *args, **kwargs):
 		return prop_func(*args, **kwargs, **kwargs_inner)
 	return _wrapper_inner
 
+# Seconds spent importing each lazy module on first use, and the add-on startup phases
+lazy_import_times = {}
+startup_times = {}
+
+class LazyModule:
+	'''
+	Module imported on first attribute access, so registering operators and panels doesn't pay for
+	the numpy/scipy heavy modules, the dll or the asset scans they trigger until they're actually used.
+	Only plain attribute access is deferred, `from x import y` still imports eagerly.
+	'''
+	def __init__(self, name:str):
+		self.__dict__['_name'] = name
+		self.__dict__['_module'] = None
+
+	def _load(self):
+		module = self.__dict__['_module']
+		if module is None:
+			import importlib
+			name = self.__dict__['_name']
+			ts = time()
+			with utils_trace.span(f'import {name}'):
+				module = importlib.import_module(name)
+			lazy_import_times.setdefault(name, time() - ts)
+			self.__dict__['_module'] = module
+		return module
+
+	def is_loaded(self) -> bool:
+		return self.__dict__['_module'] is not None
+
+	def __getattr__(self, attr):
+		return getattr(self._load(), attr)
+
+	def __setattr__(self, attr, value):
+		setattr(self._load(), attr, value)
+
+	def __repr__(self):
+		state = 'loaded' if self.is_loaded() else 'not loaded'
+		return f"<LazyModule '{self.__dict__['_name']}' ({state})>"
+
 __timer_indent__ = 0
 
 def indented_timer(f, indent = 2):
@@ -49,7 +92,8 @@ def indented_timer(f, indent = 2):
         __timer_indent__ += 1
         
         try:
-            result = f(*args, **kw)
+            with utils_trace.span(f.__qualname__):
+                result = f(*args, **kw)
         except Exception as e:
             raise e
         finally:
@@ -66,7 +110,8 @@ def timer(f):
 	@wraps(f)
 	def wrap(*args, _suppress_timer_print_ = False, **kw):
 		ts = time()
-		result = f(*args, **kw)
+		with utils_trace.span(f.__qualname__):
+			result = f(*args, **kw)
 		te = time()
 		if not _suppress_timer_print_:
 			print(f'func:{f.__name__} took: {te-ts:.4f} secs')
@@ -80,12 +125,15 @@ class TimerCell:
 		self.te = None
 
 	def __enter__(self):
+		self.span = utils_trace.span(self.name or 'Code_block')
+		self.span.__enter__()
 		self.ts = time()
 		if self.name:
 			print(f'{self.name} timer start.')
 		return self
 
 	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.span.__exit__(exc_type, exc_val, exc_tb)
 		self.te = time()
 		if self.name:
 			print(f'{self.name} took: {self.te - self.ts:.4f} secs')
@@ -192,6 +240,27 @@ def hash_string_2(input_string):
 	# Combine the two hexadecimal results
 	return hex_result_datetime, hex_result_input
 
+_file_digest_cache = {}
+
+def digest_file(file_path, chunk_size = 1 << 20):
+	# SHA-1 of the file content, uncached
+	sha1 = hashlib.sha1()
+	with open(file_path, 'rb') as f:
+		for chunk in iter(lambda: f.read(chunk_size), b''):
+			sha1.update(chunk)
+	return sha1.hexdigest()
+
+def hash_file(file_path, chunk_size = 1 << 20):
+	# SHA-1 of the file content, only recomputed when the size or modification time changed
+	file_path = os.path.normcase(os.path.abspath(file_path))
+	stat = os.stat(file_path)
+	cached = _file_digest_cache.get(file_path)
+	if cached != None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+		return cached[2]
+
+	_file_digest_cache[file_path] = (stat.st_size, stat.st_mtime_ns, digest_file(file_path, chunk_size))
+	return _file_digest_cache[file_path][2]
+
 def copy_and_rename_file(source_file, destination_folder, new_file_name):
 	# Extract the file name and extension
 	file_name, file_extension = os.path.splitext(source_file)
@@ -239,6 +308,32 @@ def edit_distance_similarity(word1, word2):
 
     return 1 - pow(dp[m][n] / max(len(word1), len(word2)), 0.5)
 
+class BoneIndex:
+	# Bone name <-> id lookups, shared by skeleton matching, weight remapping and bone regions.
+	def __init__(self, names):
+		self.names = list(names)
+		self.ids = {}
+		for i, name in enumerate(self.names):
+			self.ids.setdefault(name, i)
+		self.name_set = frozenset(self.ids.keys())
+		self.names_array = np.array(self.names, dtype=object)
+
+	def __len__(self):
+		return len(self.names)
+
+	def __contains__(self, name):
+		return name in self.ids
+
+	def id(self, name, default = -1):
+		return self.ids.get(name, default)
+
+	def lookup(self, names) -> np.ndarray:
+		# Ids of the names, -1 for names that are not in the index
+		return np.fromiter((self.ids.get(name, -1) for name in names), dtype=np.int64, count=len(names))
+
+	def names_of(self, ids) -> np.ndarray:
+		return np.take(self.names_array, ids)
+
 def _tag(name:str):
 	tags = re.findall(r'\w+', name)
 	final_tags = []
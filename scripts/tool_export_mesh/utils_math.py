@@ -19,6 +19,17 @@ def GramSchmidtOrthogonalize(tangent, normal):
 
 	return normalized_orthogonal_tangent
 
+def GramSchmidtOrthogonalizeRows(tangents:np.ndarray, normals:np.ndarray) -> np.ndarray:
+	'''
+	Row-wise GramSchmidtOrthogonalize over [n x 3] arrays, with the same fallback for degenerated tangents.
+	'''
+	orthogonal = tangents - np.einsum('ij,ij->i', tangents, normals)[:, None] * normals
+	norms = np.linalg.norm(orthogonal, axis=1)
+	degenerated = norms == 0
+	orthogonal[~degenerated] /= norms[~degenerated, None]
+	orthogonal[degenerated] = np.roll(normals[degenerated], -1, axis=1)
+	return orthogonal
+
 def NormalizeVec(vec):
 	vectors = np.array(vec)
 	norms = np.linalg.norm(vectors)
@@ -165,6 +176,17 @@ def sqrt_prec_round(data:np.ndarray, precision:float) -> np.ndarray:
 	_data = np.around(np.sqrt(data)/precision, 0)*precision
 	return _data**2
 
+def pack_snorm10(vectors:np.ndarray) -> np.ndarray:
+	"""Packs [x,y,z] rows clipped to [-1, 1] into one int32 each, 10 bit signed normalized per component"""
+	quantized = np.rint(np.clip(vectors.reshape(-1, 3), -1, 1) * 511).astype(np.int32) & 0x3FF
+	return quantized[:, 0] | (quantized[:, 1] << 10) | (quantized[:, 2] << 20)
+
+def unpack_snorm10(packed:np.ndarray) -> np.ndarray:
+	"""Inverse of pack_snorm10, returns n_row * [x,y,z]"""
+	quantized = (packed.astype(np.int32).reshape(-1, 1) >> np.array([0, 10, 20], dtype=np.int32)) & 0x3FF
+	quantized = np.where(quantized >= 512, quantized - 1024, quantized)
+	return quantized / 511.0
+
 def min_max_dist(points):
 	'''
 		Subtract max value and min value for each dimension
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+import utils_common as utils
+
+'''
+Content addressed store for exported .mesh files.
+A mesh is named after the SHA-1 of its serialized bytes, [hex1]\\[hex2].mesh with the digest split in two 20 character halves,
+so identical geometry always lands on the same path and re-exports don't write a new file.
+A morph stored with a mesh goes to [morph_root]\\[hex1]\\[hex2]\\morph.dat and is part of the digest, so meshes with the same
+geometry but different morphs don't share a morph.dat.
+Exporters write into a staging file under the store root and put() moves it into place. An index json in the store root records
+every mesh put() stored and which exported files point at which meshes. collect_garbage() only deletes meshes the index recorded
+as stored that no entry references anymore, with their morphs, so files the store didn't create, like older hash named exports, are never touched.
+'''
+
+index_filename = 'mesh_store.json'
+_staging_prefix = '.staging_'
+# Staging files untouched this long before a run started are taken as left over by a crashed export
+staging_max_age = 3600
+
+def _content_digest(mesh_path, morph_path = None):
+	if morph_path == None:
+		return utils.digest_file(mesh_path)
+	sha1 = hashlib.sha1()
+	for path in (mesh_path, morph_path):
+		sha1.update(bytes.fromhex(utils.digest_file(path)))
+	return sha1.hexdigest()
+
+def factory_path(folder, name):
+	return folder + '\\' + name
+
+class MeshStore:
+	def __init__(self, root, morph_root = None):
+		self.root = root
+		self.morph_root = morph_root
+		self._index = None
+		self._stored = None
+		self._run_start = time.time()
+
+	def _index_path(self):
+		return os.path.join(self.root, index_filename)
+
+	def _load_index(self):
+		if self._index == None:
+			self._index = {}
+			self._stored = set()
+			if os.path.isfile(self._index_path()):
+				try:
+					with open(self._index_path(), 'r') as f:
+						index_data = json.load(f)
+					self._index = index_data.get('references', {})
+					self._stored = set(index_data.get('stored', []))
+				except (OSError, ValueError) as e:
+					print(f"Mesh store index {self._index_path()} is unreadable, starting a new one: {e}")
+		return self._index
+
+	def _save_index(self):
+		os.makedirs(self.root, exist_ok = True)
+		tmp_path = self._index_path() + '.tmp'
+		with open(tmp_path, 'w') as f:
+			json.dump({'references': self._index, 'stored': sorted(self._stored)}, f, indent = 1, sort_keys = True)
+		os.replace(tmp_path, self._index_path())
+
+	def morph_path(self, folder, name):
+		return os.path.join(self.morph_root, folder, name, 'morph.dat')
+
+	def staging_path(self, suffix = '.mesh'):
+		'''
+		Empty file under the store root for the converter to write into, hand it to put() or discard() afterwards.
+		'''
+		os.makedirs(self.root, exist_ok = True)
+		fd, path = tempfile.mkstemp(prefix = _staging_prefix, suffix = suffix, dir = self.root)
+		os.close(fd)
+		return path
+
+	def discard(self, staged_path):
+		if os.path.isfile(staged_path):
+			os.remove(staged_path)
+
+	def put(self, staged_path, morph_path = None):
+		'''
+		Moves a staged mesh to its content path, with a copy of morph_path next to it in morph_root if given, the caller keeps morph_path.
+		If identical files are already stored the staged mesh is dropped and the stored files are left untouched.
+		Returns the folder and name of the mesh and whether it was written.
+		'''
+		digest = _content_digest(staged_path, morph_path)
+		folder, name = digest[:20], digest[20:40]
+		target_path = os.path.join(self.root, folder, name + '.mesh')
+		target_morph_path = self.morph_path(folder, name) if morph_path != None else None
+
+		written = True
+		if os.path.isfile(target_path) and os.path.getsize(target_path) == os.path.getsize(staged_path) \
+			and (target_morph_path == None or os.path.isfile(target_morph_path)) \
+			and (utils.hash_file(target_path) if target_morph_path == None else _content_digest(target_path, target_morph_path)) == digest:
+			os.remove(staged_path)
+			written = False
+		else:
+			os.makedirs(os.path.dirname(target_path), exist_ok = True)
+			os.replace(staged_path, target_path)
+			if target_morph_path != None:
+				os.makedirs(os.path.dirname(target_morph_path), exist_ok = True)
+				shutil.copyfile(morph_path, target_morph_path)
+
+		self._load_index()
+		if folder + '/' + name not in self._stored:
+			self._stored.add(folder + '/' + name)
+			self._save_index()
+		return folder, name, written
+
+	def set_references(self, referrer, meshes, referrer_path = None):
+		'''
+		Replaces the meshes referenced by referrer, a list of (folder, name).
+		With referrer_path, the entry is dropped by collect_garbage() once that file no longer exists.
+		'''
+		index = self._load_index()
+		index[referrer] = {
+			'path': os.path.relpath(referrer_path, self.root) if referrer_path != None else None,
+			'meshes': sorted(set(folder + '/' + name for folder, name in meshes)),
+		}
+		self._save_index()
+
+	def collect_garbage(self):
+		'''
+		Deletes the meshes put() stored that no index entry references anymore with their morph folders, the emptied folders
+		and staging files a crashed export left behind. Meshes the store didn't create are never touched, even if they are named like content.
+		Returns the deleted paths.
+		'''
+		index = self._load_index()
+		for referrer in [referrer for referrer, entry in index.items() \
+			if entry['path'] != None and not os.path.isfile(os.path.join(self.root, entry['path']))]:
+			del index[referrer]
+
+		referenced = set(mesh for entry in index.values() for mesh in entry['meshes'])
+		removed = []
+		if not os.path.isdir(self.root):
+			return removed
+
+		# Staging files of exports running next to this one are still being written, only old ones are collected
+		for entry in os.scandir(self.root):
+			if entry.is_file() and entry.name.startswith(_staging_prefix) and entry.stat().st_mtime < self._run_start - staging_max_age:
+				os.remove(entry.path)
+				removed.append(entry.path)
+
+		for mesh in sorted(self._stored - referenced):
+			folder, name = mesh.split('/')
+			mesh_path = os.path.join(self.root, folder, name + '.mesh')
+			if os.path.isfile(mesh_path):
+				os.remove(mesh_path)
+				removed.append(mesh_path)
+			self._stored.discard(mesh)
+			if os.path.isdir(os.path.join(self.root, folder)) and not os.listdir(os.path.join(self.root, folder)):
+				os.rmdir(os.path.join(self.root, folder))
+
+			if self.morph_root != None and os.path.isdir(os.path.join(self.morph_root, folder, name)):
+				shutil.rmtree(os.path.join(self.morph_root, folder, name))
+				removed.append(os.path.join(self.morph_root, folder, name))
+				if not os.listdir(os.path.join(self.morph_root, folder)):
+					os.rmdir(os.path.join(self.morph_root, folder))
+
+		self._save_index()
+		print(f"Mesh store {self.root}: removed {len(removed)} unreferenced files, {len(referenced)} meshes referenced")
+		return removed
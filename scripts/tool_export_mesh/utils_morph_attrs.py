@@ -1,19 +1,47 @@
 import bpy
 
 import utils_common as utils
+import utils_math
 
 import numpy as np
 
 _data_type_element_prop_ = {
     "FLOAT_VECTOR": (3, np.float64, "vector"),
     "FLOAT_COLOR": (4, np.float32, "color"),
+    "INT": (1, np.int32, "value"),
+    # Byte colors hold data here, not display colors. color_srgb stores the values without the linear conversion.
+    "BYTE_COLOR": (4, np.float32, "color_srgb"),
 }
 
 class MorphAttrFactory:
-	def __init__(self, abbr:str, domain:str, type:str, from_mesh_data_fn=None, to_mesh_data_fn=None, name_fn=None, sk_name_fn=None, abbr_name_fn=None):
+	'''
+	Per shape-key attributes named {abbr}_{shapekey_name}.
+	Data is stored as type through encode_fn/decode_fn, attributes of one of the legacy_types are still read
+	and get converted to type on the next write. Data equal to default_value (judged by is_default_fn) doesn't get
+	an attribute, readers fall back to their own defaults when it is missing.
+	'''
+	def __init__(self, abbr:str, domain:str, type:str, from_mesh_data_fn=None, to_mesh_data_fn=None, name_fn=None, sk_name_fn=None, abbr_name_fn=None, 
+			  encode_fn=None, decode_fn=None, legacy_types:tuple=(), default_value=None, is_default_fn=None):
 		self.abbr = abbr
 		self.domain = domain
 		self.type = type
+		self.legacy_types = legacy_types
+		self.default_value = default_value
+
+		if not encode_fn:
+			self.encode_fn = lambda data: data
+		else:
+			self.encode_fn = encode_fn
+
+		if not decode_fn:
+			self.decode_fn = lambda data: data
+		else:
+			self.decode_fn = decode_fn
+
+		if not is_default_fn:
+			self.is_default_fn = lambda data, shapekey_name, mesh: False
+		else:
+			self.is_default_fn = is_default_fn
 
 		if not name_fn:
 			self.name_fn = lambda shapekey_name: f"{self.abbr}_{shapekey_name}"
@@ -62,7 +90,7 @@ class MorphAttrFactory:
 					return None
 		
 			attr = mesh.attributes[self.name_fn(shapekey_name)]
-			if attr.domain == self.domain and attr.data_type == self.type:
+			if self.is_valid(attr):
 				return attr
 			elif remove_invalid and not create_if_invalid:
 				mesh.attributes.remove(attr)
@@ -79,23 +107,83 @@ class MorphAttrFactory:
 	def get(self, mesh:bpy.types.Mesh, shapekey_name:str, create_if_not_exist = False) -> bpy.types.Attribute:
 		return self.validate(mesh, shapekey_name, remove_invalid=False, create_if_invalid=create_if_not_exist)
 	
+	def is_valid(self, attr:bpy.types.Attribute) -> bool:
+		return attr.domain == self.domain and (attr.data_type == self.type or attr.data_type in self.legacy_types)
+
 	def validate_all(self, mesh:bpy.types.Mesh, remove_invalid = True):
-		for attr in mesh.attributes:
-			if self.abbr == self.abbr_name_fn(attr.name):
-				sk_name = self.sk_name_fn(attr.name)
-				if sk_name not in mesh.shape_keys.key_blocks:
-					if remove_invalid:
-						mesh.attributes.remove(attr)
-						print(f"Shapekey {sk_name} not found. Removing attribute {attr.name}")
-					else:
-						print(f"Shapekey {sk_name} not found.")
+		'''
+		Removes attributes without a shape-key or of a wrong type, and converts the legacy ones when remove_invalid is True.
+		'''
+		# Collect the names first, the loop removes and recreates attributes
+		attr_names = [attr.name for attr in mesh.attributes if self.abbr == self.abbr_name_fn(attr.name)]
+		for attr_name in attr_names:
+			attr = mesh.attributes[attr_name]
+			sk_name = self.sk_name_fn(attr_name)
+			if sk_name not in mesh.shape_keys.key_blocks:
+				if remove_invalid:
+					mesh.attributes.remove(attr)
+					print(f"Shapekey {sk_name} not found. Removing attribute {attr_name}")
 				else:
-					if attr.domain != self.domain or attr.data_type != self.type:
-						if remove_invalid:
-							mesh.attributes.remove(attr)
-							print(f"Attribute {attr.name} is invalid. Removing.")
-						else:
-							print(f"Attribute {attr.name} is invalid.")
+					print(f"Shapekey {sk_name} not found.")
+			elif not self.is_valid(attr):
+				if remove_invalid:
+					mesh.attributes.remove(attr)
+					print(f"Attribute {attr_name} is invalid. Removing.")
+				else:
+					print(f"Attribute {attr_name} is invalid.")
+			elif attr.data_type != self.type:
+				if remove_invalid:
+					legacy_type = attr.data_type
+					self.compact(mesh, sk_name)
+					print(f"Attribute {attr_name} converted from {legacy_type} to {self.type}.")
+				else:
+					print(f"Attribute {attr_name} uses the legacy type.")
+
+	def compact(self, mesh:bpy.types.Mesh, shapekey_name:str) -> bpy.types.Attribute:
+		'''
+		Rewrites a legacy attribute as self.type.
+		'''
+		attr = mesh.attributes[self.name_fn(shapekey_name)]
+		if attr.data_type == self.type:
+			return attr
+		data = self.read(attr, mesh)
+		attr = self.create(mesh, shapekey_name, replace=True)
+		self.write(attr, data)
+		return attr
+
+	def num_elements(self, mesh:bpy.types.Mesh) -> int:
+		if self.domain == "CORNER":
+			return len(mesh.loops)
+		elif self.domain == "POINT":
+			return len(mesh.vertices)
+		else:
+			raise ValueError(f"MorphAttrFactory: Unimplemented domain {self.domain}")
+
+	def read(self, attr:bpy.types.Attribute, mesh:bpy.types.Mesh) -> np.ndarray:
+		'''
+		Decoded, flattened data of attr.
+		'''
+		if _prop := _data_type_element_prop_.get(attr.data_type):
+			data_size, np_type, data_entry = _prop
+		else:
+			raise ValueError(f"MorphAttrFactory.read(): Unimplemented data type {attr.data_type}")
+
+		raw = np.empty(self.num_elements(mesh) * data_size, dtype = np_type)
+		attr.data.foreach_get(data_entry, raw)
+
+		if attr.data_type == self.type:
+			return self.decode_fn(raw)
+		return raw
+
+	def write(self, attr:bpy.types.Attribute, data:np.ndarray) -> None:
+		if _prop := _data_type_element_prop_.get(attr.data_type):
+			data_size, np_type, data_entry = _prop
+		else:
+			raise ValueError(f"MorphAttrFactory.write(): Unimplemented data type {attr.data_type}")
+
+		if attr.data_type == self.type:
+			data = self.encode_fn(data)
+		attr.data.foreach_set(data_entry, np.asarray(data, dtype = np_type).ravel())
 	
 	@utils.timer
 	def from_mesh_data(self, mesh:bpy.types.Mesh, shapekey_name:str) -> None:
@@ -115,60 +203,41 @@ class MorphAttrFactory:
 		return self.to_mesh_data_fn(attr, shapekey_name, mesh)
 
 	def gather(self, mesh:bpy.types.Mesh, shapekey_name:str) -> np.ndarray:
-		attr = self.validate(mesh, shapekey_name, remove_invalid=True, create_if_invalid=True)
+		'''
+		Decoded, flattened data of the attribute, default_value for every element when the shape-key has no attribute.
+		'''
+		attr = self.validate(mesh, shapekey_name, remove_invalid=True, create_if_invalid=False)
 		if not attr:
-			print(f"Attribute {self.name_fn(shapekey_name)} not found or invalid.")
-			return
-		
-		data_size = None
-		np_type = None
-		data_entry = None
-
-		if _prop := _data_type_element_prop_[self.type]:
-			data_size, np_type, data_entry = _prop
-		else:
-			raise ValueError(f"MorphAttrFactory.gather(): Unimplemented data type {self.type}")
-
-		if self.domain == "CORNER":
-			data = np.empty(len(mesh.loops) * data_size, dtype = np_type)
-			attr.data.foreach_get(data_entry, data)
-		elif self.domain == "POINT":
-			data = np.empty(len(mesh.vertices) * data_size, dtype = np_type)
-			attr.data.foreach_get(data_entry, data)
-		else:
-			raise ValueError(f"MorphAttrFactory.gather(): Unimplemented domain {self.domain}")
+			if shapekey_name not in mesh.shape_keys.key_blocks:
+				print(f"Attribute {self.name_fn(shapekey_name)} not found or invalid.")
+				return
+			return np.tile(self.default_value, self.num_elements(mesh))
 
-		return data
+		return self.read(attr, mesh)
 
 	def set_data(self, mesh:bpy.types.Mesh, shapekey_name:str, data:np.ndarray, create_if_not_exist = True) -> bool:
 		'''
 		Set the data of the attribute. If the attribute does not exist, create it if create_if_not_exist is True
+		and the data differs from the default. Legacy attributes are rewritten as the compact type.
 
 		:param mesh: bpy.types.Mesh
 		:param shapekey_name: str
 		:param data: np.ndarray. Data must be a num_elem * data_size matrix
 		:param create_if_not_exist: bool. If True, create the attribute if it does not exist
 		'''
-		attr = self.validate(mesh, shapekey_name, remove_invalid=True, create_if_invalid=create_if_not_exist)
+		attr = self.validate(mesh, shapekey_name, remove_invalid=True, create_if_invalid=False)
+		if attr is not None and attr.data_type != self.type:
+			attr = self.create(mesh, shapekey_name, replace=True)
+		elif attr is None and create_if_not_exist and shapekey_name in mesh.shape_keys.key_blocks:
+			if self.is_default_fn(data, shapekey_name, mesh):
+				return True
+			attr = self.create(mesh, shapekey_name)
+
 		if not attr:
 			print(f"Attribute {self.name_fn(shapekey_name)} not found or invalid.")
 			return False
 
-		data_size = None
-		np_type = None
-		data_entry = None
-
-		if _prop := _data_type_element_prop_[self.type]:
-			data_size, np_type, data_entry = _prop
-		else:
-			raise ValueError(f"MorphAttrFactory.set_data(): Unimplemented data type {self.type}")
-
-		if self.domain == "CORNER":
-			attr.data.foreach_set(data_entry, data.ravel())
-		elif self.domain == "POINT":
-			attr.data.foreach_set(data_entry, data.ravel())
-		else:
-			raise ValueError(f"MorphAttrFactory.set_data(): Unimplemented domain {self.domain}")
+		self.write(attr, data)
 		
 		return True
 
@@ -186,30 +255,43 @@ class MorphAttrFactory:
 			print(f"Attribute {self.name_fn(shapekey_name)} not found or invalid.")
 			return False
 		
-		num_elements = None
-		data_size = None
-		np_type = None
-		data_entry = None
-		
-		if _prop := _data_type_element_prop_[self.type]:
-			data_size, np_type, data_entry = _prop
-		else:
-			raise ValueError(f"MorphAttrFactory.gather(): Unimplemented data type {self.type}")
+		data_size = len(self.default_value)
 		
 		assert len(data.ravel()) == data_size, f"Data size mismatch. Expected {data_size}, got {len(data.ravel())}"
 
-		if self.domain == "CORNER":
-			num_elements = len(mesh.loops)
-		elif self.domain == "POINT":
-			num_elements = len(mesh.vertices)
-		else:
-			raise ValueError(f"MorphAttrFactory.gather(): Unimplemented domain {self.domain}")
-
-		populated_data = np.tile(data, (num_elements, 1))
+		populated_data = np.tile(data, (self.num_elements(mesh), 1))
 
 		return self.set_data(mesh, shapekey_name, populated_data, create_if_not_exist)
 
 
+def _encode_morph_normals(deltas:np.ndarray) -> np.ndarray:
+	# Delta normals are kept within [-1, 1] per component (see utils_math.bounded_vector_substraction),
+	# 10 bits per component is finer than the export rounding of Primitive.Options.normal_tangent_round_precision
+	return utils_math.pack_snorm10(deltas)
+
+def _decode_morph_normals(packed:np.ndarray) -> np.ndarray:
+	return utils_math.unpack_snorm10(packed).ravel()
+
+def _morph_normals_is_default(deltas:np.ndarray, shapekey_name:str, mesh:bpy.types.Mesh) -> bool:
+	# Zero deltas on a key that doesn't move anything match the normals computed without the attribute
+	if np.any(np.abs(deltas) >= 0.5 / 511):
+		return False
+
+	key_block = mesh.shape_keys.key_blocks[shapekey_name]
+	relative_key = key_block.relative_key
+	if relative_key is None or relative_key == key_block:
+		return True
+
+	positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+	key_block.data.foreach_get('co', positions)
+	relative_positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+	relative_key.data.foreach_get('co', relative_positions)
+	return np.array_equal(positions, relative_positions)
+
+def _morph_target_colors_is_default(colors:np.ndarray, shapekey_name:str, mesh:bpy.types.Mesh) -> bool:
+	# Primitive.gather_morphs() uses white when there is no attribute, alpha is not exported
+	return bool(np.all(np.asarray(colors).reshape(-1, 4)[:, :3] >= 1.0 - 0.5 / 255))
+
 def _morph_normals_from_mesh_data(attr:bpy.types.Attribute, shapekey_name:str, mesh:bpy.types.Mesh):
 	data_size, np_type, data_entry = _data_type_element_prop_["FLOAT_VECTOR"]
 
@@ -217,18 +299,12 @@ def _morph_normals_from_mesh_data(attr:bpy.types.Attribute, shapekey_name:str, m
 
 	mesh.corner_normals.foreach_get('vector', raw_normals.ravel())
 
-	attr.data.foreach_set(data_entry, raw_normals.ravel())
+	MorphNormals().write(attr, raw_normals)
 
 	return raw_normals
 
 def _morph_normals_to_mesh_data(attr:bpy.types.Attribute, shapekey_name:str, mesh:bpy.types.Mesh):
-	data_size, np_type, data_entry = _data_type_element_prop_["FLOAT_VECTOR"]
-
-	raw_normals = np.empty((len(mesh.loops) * data_size), dtype=np_type)
-
-	attr.data.foreach_get(data_entry, raw_normals.ravel())
-
-	raw_normals = raw_normals.astype(np.float64)
+	raw_normals = MorphNormals().read(attr, mesh).astype(np.float64).reshape(-1, 3)
 
 	raw_normals = raw_normals / np.linalg.norm(raw_normals, axis=1)[:, np.newaxis]
 
@@ -255,7 +331,7 @@ def _morph_target_colors_from_mesh_data(attr:bpy.types.Attribute, shapekey_name:
 	if color_domain == 'POINT':
 		colors = colors[vertex_indices]
 
-	attr.data.foreach_set(data_entry, colors.ravel())
+	MorphTargetColors().write(attr, colors)
 
 	return colors
 
@@ -272,9 +348,7 @@ def _morph_target_colors_to_mesh_data(attr:bpy.types.Attribute, shapekey_name:st
 
 	color_domain = mesh_color_attr.domain
 
-	raw_colors = np.empty((len(mesh.loops), data_size), dtype = np_type)
-
-	attr.data.foreach_get(data_entry, raw_colors.ravel())
+	raw_colors = MorphTargetColors().read(attr, mesh).astype(np_type).reshape(-1, data_size)
 
 	colors = np.empty((len(mesh.vertices), data_size), dtype = np_type)
 	if color_domain == 'POINT':
@@ -288,16 +362,24 @@ _morph_attr_factory_list_ = {
 	"morph_normals": MorphAttrFactory(
 		"NRM", 
 		"CORNER", 
-		"FLOAT_VECTOR", 
+		"INT", 
 		from_mesh_data_fn=_morph_normals_from_mesh_data, 
-		to_mesh_data_fn=_morph_normals_to_mesh_data
+		to_mesh_data_fn=_morph_normals_to_mesh_data,
+		encode_fn=_encode_morph_normals,
+		decode_fn=_decode_morph_normals,
+		legacy_types=("FLOAT_VECTOR",),
+		default_value=(0.0, 0.0, 0.0),
+		is_default_fn=_morph_normals_is_default
 	),
 	"morph_target_colors": MorphAttrFactory(
 		"COL", 
 		"CORNER", 
-		"FLOAT_COLOR",
+		"BYTE_COLOR",
 		from_mesh_data_fn=_morph_target_colors_from_mesh_data,
-		to_mesh_data_fn=_morph_target_colors_to_mesh_data
+		to_mesh_data_fn=_morph_target_colors_to_mesh_data,
+		legacy_types=("FLOAT_COLOR",),
+		default_value=(1.0, 1.0, 1.0, 1.0),
+		is_default_fn=_morph_target_colors_is_default
 	),
 }
 
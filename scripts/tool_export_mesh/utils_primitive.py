@@ -9,6 +9,8 @@ from enum import Enum, unique
 import utils_math
 import utils_morph_attrs
 
+import utils_trace
+
 from utils_common import timer
 
 class AtomicException(Exception):
@@ -189,25 +191,32 @@ class Primitive():
         return cKDTree(self.positions)
 
     def gather(self):
-        if not self.scan_object_for_data():
-            print("Primitive.gather() failed to scan object for data")
+        with utils_trace.span('Primitive.gather', object=self.blender_object.name) as span:
+            span.count('vertices', len(self.blender_mesh.vertices))
+            span.count('loops', len(self.blender_mesh.loops))
 
-        self.gather_atomics()
+            if not self.scan_object_for_data():
+                print("Primitive.gather() failed to scan object for data")
 
-        #self._test_deduplication()
+            self.gather_atomics()
 
-        self.deduplicate_atomics()
+            #self._test_deduplication()
 
-        self.gather_positions()
+            self.deduplicate_atomics()
 
-        # Execution order doesn't matter for the following three functions
-        if self.options.gather_weights_data:
-            self.gather_weights()
+            self.gather_positions()
 
-        if self.options.gather_morph_data:
-            self.gather_morphs()
+            # Execution order doesn't matter for the following three functions
+            if self.options.gather_weights_data:
+                self.gather_weights()
 
-        self.gather_triangles()
+            if self.options.gather_morph_data:
+                self.gather_morphs()
+                if self.blender_mesh.shape_keys:
+                    span.count('shape_keys', len(self.blender_mesh.shape_keys.key_blocks) - 1)
+
+            self.gather_triangles()
+            span.count('triangles', len(self.triangles) // 3)
     
     @timer
     def scan_object_for_data(self):
@@ -268,8 +277,18 @@ class Primitive():
                 print("No shape keys found on mesh")
                 self.options.gather_morph_data = False
 
+        self.scan_vertex_group_merge()
+
+        self.vertex_group_ignore_indices = set()
+        if self.options.vertex_group_ignore:
+            ignore_indices = [self.blender_object.vertex_groups.find(vg_name) for vg_name in self.options.vertex_group_ignore]
+            self.vertex_group_ignore_indices = set([i for i in ignore_indices if i != -1])
+
+        return True
+    
+    def scan_vertex_group_merge(self):
         if self.options.vertex_group_merge_target != '' and self.options.vertex_group_merge_source:
-            if not any([vg.name in self.blender_object.vertex_groups for vg in self.options.vertex_group_merge_source]):
+            if not any([vg_name in self.blender_object.vertex_groups for vg_name in self.options.vertex_group_merge_source]):
                 print("All source vertex groups not found on object")
                 self.options.vertex_group_merge_source = []
                 self.options.vertex_group_merge_target = ''
@@ -282,15 +301,17 @@ class Primitive():
                 source_indices = np.array([i for i in source_indices if i != -1])
                 target_index = self.blender_object.vertex_groups.find(self.options.vertex_group_merge_target)
                 self.vertex_group_indices_mapping = np.array(range(len(self.blender_object.vertex_groups)))
-                self.vertex_group_indices_mapping[source_indices] = target_index                           
+                self.vertex_group_indices_mapping[source_indices] = target_index
 
-        self.vertex_group_ignore_indices = set()
-        if self.options.vertex_group_ignore:
-            ignore_indices = [self.blender_object.vertex_groups.find(vg_name) for vg_name in self.options.vertex_group_ignore]
-            self.vertex_group_ignore_indices = set([i for i in ignore_indices if i != -1])
+    def regather_weights(self, merge_source:list[str], merge_target:str):
+        '''
+        Gathers the weights again with another vertex group merge, everything else gathered is kept.
+        '''
+        self.options.vertex_group_merge_source = list(merge_source)
+        self.options.vertex_group_merge_target = merge_target
+        self.scan_vertex_group_merge()
+        self.gather_weights()
 
-        return True
-    
     @timer
     def gather_atomics(self):
         # Gather vertex index data
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import threading
+import tracemalloc
+from functools import wraps
+
+'''
+Nested spans, counters and peak memory samples for import/export runs.
+Disabled unless a session is started, spans and counters are then shared no-ops.
+Sessions write a Chrome trace json (chrome://tracing, Perfetto) and a summary table to output_folder,
+which defaults to the SGB_TRACE_DIR environment variable. SGB_TRACE_MEMORY=1 also samples tracemalloc peaks.
+'''
+
+output_folder = os.environ.get('SGB_TRACE_DIR') or None
+trace_memory = os.environ.get('SGB_TRACE_MEMORY', '0') == '1'
+
+_tracer = None
+
+class _NullSpan:
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		return False
+
+	def count(self, name, value = 1):
+		pass
+
+_null_span = _NullSpan()
+
+class _SpanStats:
+	def __init__(self):
+		self.calls = 0
+		self.total = 0
+		self.self_time = 0
+		self.max = 0
+		self.peak_memory = 0
+
+class Span:
+	def __init__(self, tracer, name:str, args:dict):
+		self.tracer = tracer
+		self.name = name
+		self.args = args
+		self.counters = {}
+		self.start = 0
+		self.child_time = 0
+		self.peak_memory = 0
+
+	def __enter__(self):
+		self.tracer._enter(self)
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.tracer._exit(self, exc_type)
+		return False
+
+	def count(self, name:str, value = 1):
+		self.counters[name] = self.counters.get(name, 0) + value
+		self.tracer.counters[name] = self.tracer.counters.get(name, 0) + value
+
+class Tracer:
+	def __init__(self, name:str, memory = False):
+		self.name = name
+		self.memory = memory
+		self.events = []
+		self.counters = {}
+		self.stats:dict[str, _SpanStats] = {}
+		self.stack:list[Span] = []
+		self.pid = os.getpid()
+		self.origin = time.perf_counter_ns()
+		self._own_tracemalloc = False
+		if memory and not tracemalloc.is_tracing():
+			tracemalloc.start()
+			self._own_tracemalloc = True
+
+	def close(self):
+		if self._own_tracemalloc:
+			tracemalloc.stop()
+
+	def _now_us(self):
+		return (time.perf_counter_ns() - self.origin) / 1000
+
+	def _enter(self, span:Span):
+		if self.memory:
+			# The parent keeps the peak reached so far, the span measures its own from here
+			peak = tracemalloc.get_traced_memory()[1]
+			if self.stack:
+				self.stack[-1].peak_memory = max(self.stack[-1].peak_memory, peak)
+			tracemalloc.reset_peak()
+		self.stack.append(span)
+		span.start = self._now_us()
+
+	def _exit(self, span:Span, exc_type):
+		end = self._now_us()
+		duration = end - span.start
+		self.stack.pop()
+		if self.stack:
+			self.stack[-1].child_time += duration
+
+		args = dict(span.args)
+		args.update(span.counters)
+		if exc_type is not None:
+			args['exception'] = exc_type.__name__
+
+		if self.memory:
+			current, peak = tracemalloc.get_traced_memory()
+			span.peak_memory = max(span.peak_memory, peak)
+			if self.stack:
+				self.stack[-1].peak_memory = max(self.stack[-1].peak_memory, span.peak_memory)
+			tracemalloc.reset_peak()
+			args['peak_memory'] = span.peak_memory
+			self.events.append({'name': 'memory', 'ph': 'C', 'ts': end, 'pid': self.pid, 'tid': 0, 'args': {'current': current, 'peak': span.peak_memory}})
+
+		self.events.append({'name': span.name, 'cat': 'sgb', 'ph': 'X', 'ts': span.start, 'dur': duration, 'pid': self.pid, 'tid': threading.get_ident(), 'args': args})
+
+		stats = self.stats.get(span.name)
+		if stats is None:
+			stats = self.stats[span.name] = _SpanStats()
+		stats.calls += 1
+		stats.total += duration
+		stats.self_time += duration - span.child_time
+		stats.max = max(stats.max, duration)
+		stats.peak_memory = max(stats.peak_memory, span.peak_memory)
+
+	def chrome_trace(self) -> dict:
+		return {
+			'traceEvents': self.events,
+			'displayTimeUnit': 'ms',
+			'otherData': {'session': self.name, 'counters': self.counters},
+		}
+
+	def summary_table(self) -> str:
+		rows = [('span', 'calls', 'total ms', 'self ms', 'max ms', 'peak KiB')]
+		for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].total):
+			rows.append((name, str(stats.calls), f'{stats.total / 1000:.2f}', f'{stats.self_time / 1000:.2f}', f'{stats.max / 1000:.2f}', f'{stats.peak_memory / 1024:.0f}' if self.memory else '-'))
+		widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+		lines = ['  '.join(cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths))) for row in rows]
+		lines.insert(1, '-' * len(lines[0]))
+
+		if self.counters:
+			lines.append('')
+			name_width = max(len(name) for name in self.counters)
+			for name, value in sorted(self.counters.items()):
+				lines.append(f'{name.ljust(name_width)}  {value}')
+		return '\n'.join(lines)
+
+	def write(self, folder:str) -> str:
+		os.makedirs(folder, exist_ok=True)
+		stamp = time.strftime('%Y%m%d_%H%M%S')
+		base_path = os.path.join(folder, f'{_safe_name(self.name)}_{stamp}_{self.pid}')
+		with open(base_path + '.trace.json', 'w') as f:
+			json.dump(self.chrome_trace(), f)
+		with open(base_path + '.summary.txt', 'w') as f:
+			f.write(self.summary_table() + '\n')
+		return base_path
+
+def _safe_name(name:str) -> str:
+	return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name)
+
+def is_enabled() -> bool:
+	return _tracer is not None
+
+def start(name:str, memory = None) -> Tracer:
+	global _tracer
+	if _tracer is None:
+		_tracer = Tracer(name, trace_memory if memory is None else memory)
+	return _tracer
+
+def stop() -> Tracer:
+	global _tracer
+	tracer = _tracer
+	_tracer = None
+	if tracer is not None:
+		tracer.close()
+	return tracer
+
+def span(name:str, **args):
+	if _tracer is None:
+		return _null_span
+	return Span(_tracer, name, args)
+
+def count(name:str, value = 1):
+	if _tracer is None or not _tracer.stack:
+		return
+	_tracer.stack[-1].count(name, value)
+
+class _Session:
+	def __init__(self, name:str, folder:str):
+		self.name = name
+		self.folder = folder
+		self.tracer = None
+		self.span = None
+
+	def __enter__(self):
+		self.tracer = start(self.name)
+		self.span = Span(self.tracer, self.name, {})
+		self.span.__enter__()
+		return self.span
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.span.__exit__(exc_type, exc_val, exc_tb)
+		stop()
+		try:
+			base_path = self.tracer.write(self.folder)
+			print(f'Trace written to {base_path}.trace.json')
+		except OSError as e:
+			print(f'Failed to write trace for {self.name}: {e}')
+		return False
+
+def session(name:str, folder:str = None):
+	'''
+	Outermost traced region of a run. Starts tracing and writes the results on exit when an output folder is set,
+	is a plain span inside a running session, and a no-op otherwise.
+	'''
+	if _tracer is not None:
+		return Span(_tracer, name, {})
+	folder = folder or output_folder
+	if folder is None:
+		return _null_span
+	return _Session(name, folder)
+
+def traced(name:str = None, is_session = False):
+	def decorator(f):
+		span_name = name or f.__qualname__
+		@wraps(f)
+		def wrap(*args, **kw):
+			if _tracer is None and not (is_session and output_folder is not None):
+				return f(*args, **kw)
+			with (session(span_name) if is_session else Span(_tracer, span_name, {})):
+				return f(*args, **kw)
+		return wrap
+	return decorator
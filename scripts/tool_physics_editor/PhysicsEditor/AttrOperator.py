@@ -1,8 +1,9 @@
 from typing import Set
 import bpy
-import bmesh
 from bpy.types import Context, Event
 
+import PhysicsEditor.Utilities.utils_attribute as utils_attribute
+
 def NewFloatAttr(mesh_obj:bpy.types.Object, attr_name: str, attr_domain: str, remove_existing: bool = False):
     if mesh_obj.data.attributes.get(attr_name) is not None:
         if not remove_existing:
@@ -11,35 +12,7 @@ def NewFloatAttr(mesh_obj:bpy.types.Object, attr_name: str, attr_domain: str, re
     mesh_obj.data.attributes.new(attr_name, 'FLOAT', attr_domain)
 
 def AddAttr(mesh_obj:bpy.types.Object, attr_name: str, attr_domain: str, element_ids: list[int], attr_values: list[float], default_value: float = None):
-    bm = bmesh.new()
-    bm.from_object(mesh_obj, bpy.context.evaluated_depsgraph_get())
-
-    if attr_domain == 'POINT':
-        bm.verts.ensure_lookup_table()
-        layer = bm.verts.layers.float.get(attr_name)
-        if default_value is not None:
-            for v in bm.verts:
-                v[layer] = default_value
-        for p_id, i in enumerate(element_ids):
-            bm.verts[i][layer] = attr_values[p_id]
-    elif attr_domain == 'EDGE':
-        bm.edges.ensure_lookup_table()
-        layer = bm.edges.layers.float.get(attr_name)
-        if default_value is not None:
-            for e in bm.edges:
-                e[layer] = default_value
-        for p_id, i in enumerate(element_ids):
-            bm.edges[i][layer] = attr_values[p_id]
-    elif attr_domain == 'FACE':
-        bm.faces.ensure_lookup_table()
-        layer = bm.faces.layers.float.get(attr_name)
-        if default_value is not None:
-            for f in bm.faces:
-                f[layer] = default_value
-        for p_id, i in enumerate(element_ids):
-            bm.faces[i][layer] = attr_values[p_id]
-    bm.to_mesh(mesh_obj.data)
-    bm.free()
+    utils_attribute.SetFloatAttr(mesh_obj.data, attr_name, attr_domain, element_ids, attr_values, default_value)
 
 
 class OBJECT_OT_add_custom_attribute_dialog(bpy.types.Operator):
@@ -110,27 +83,10 @@ class OBJECT_OT_add_custom_attribute(bpy.types.Operator):
         if attr is None:
             attr = obj.data.attributes.new(attribute_name, 'FLOAT', domain)
         
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
-
-        if selection_mode[0]:  # Vertex selection mode
-            layer = bm.verts.layers.float.get(attr.name)
-            for v in bm.verts:
-                if v.select:
-                    v[layer] = float_value
-        elif selection_mode[1]:  # Edge selection mode
-            layer = bm.edges.layers.float.get(attr.name)
-            for e in bm.edges:
-                if e.select:
-                    e[layer] = float_value
-        elif selection_mode[2]:  # Face selection mode
-            layer = bm.faces.layers.float.get(attr.name)
-            for f in bm.faces:
-                if f.select:
-                    f[layer] = float_value
-                        
-        bmesh.update_edit_mesh(mesh)
+        attr_name = attr.name
+        # Leave edit mode so the selection and attribute arrays of the mesh are up to date
         bpy.ops.object.mode_set(mode='OBJECT')
+        utils_attribute.SetFloatAttrOnSelection(obj.data, attr_name, domain, float_value)
         bpy.ops.object.mode_set(mode='EDIT')
         context.scene.add_custom_attribute_name = context.scene.add_custom_attribute_name + '_new'
         return {'FINISHED'}
@@ -3,6 +3,7 @@ from submodule_version import __plugin_version__, make_version, Version
 from PhysicsEditor.NodeVersions import get_node_script_version
 
 import PhysicsEditor.Utilities.utils_node as utils_node
+import PhysicsEditor.Utilities.utils_scheduler as utils_scheduler
 
 global_vis_meshes = {}
 
@@ -101,6 +102,30 @@ def find_vis_meshes(who: bpy.types.Node):
     else:
         return None
 
+class AsyncInput:
+    '''
+    Input socket of a node as taken by async_input_snapshot. Either the snapshot of the async node feeding it,
+    computed on the worker by resolve_async_input, or the value of any other node, read on the main thread.
+    '''
+    def __init__(self, value = None, node_name: str = None, node_type: type = None, snapshot = None):
+        self.value = value
+        self.node_name = node_name
+        self.node_type = node_type
+        self.snapshot = snapshot
+
+def resolve_async_input(async_input: AsyncInput, token: utils_scheduler.EvaluationToken = None):
+    '''Socket value of an AsyncInput, what get_socket_input_single returns for it on the main thread.'''
+    if async_input.node_type is None:
+        return async_input.value
+    if token is None:
+        result = async_input.node_type.async_compute(async_input.snapshot)
+    elif async_input.node_name in token.computed:
+        result = token.computed[async_input.node_name]
+    else:
+        result = async_input.node_type.async_compute(async_input.snapshot, token)
+        token.computed[async_input.node_name] = result
+    return async_input.node_type.async_output(result, async_input.snapshot)
+
 class hclPhysicsNodeBase:
     instance_version: bpy.props.StringProperty(name='Version', default=Version((1,0,0)).as_str(), options={'HIDDEN'})
 
@@ -186,6 +211,48 @@ class hclPhysicsNodeBase:
     def get_socket_output(self, socket_name:str):
         return None
 
+    # Override these two functions to evaluate the heavy part of the node off the main thread.
+    # async_snapshot runs on the main thread and only reads raw bpy data into plain python/numpy, inputs coming from
+    # other nodes are taken with async_input_snapshot. async_compute runs on the worker thread and must not touch bpy.
+    def async_snapshot(self):
+        return None
+
+    @staticmethod
+    def async_compute(snapshot, token: utils_scheduler.EvaluationToken = None):
+        return None
+
+    # Override if downstream nodes edit the result in place, precomputed results are shared between calls
+    @staticmethod
+    def async_copy(result):
+        return result
+
+    # Override if the output socket value isn't the result of async_compute itself
+    @staticmethod
+    def async_output(result, snapshot):
+        return result
+
+    def async_input_snapshot(self, socket_name: str) -> AsyncInput:
+        '''
+        For async_snapshot, takes the input socket_name without evaluating the node feeding it if that node evaluates asynchronously.
+        async_compute gets the value with resolve_async_input.
+        '''
+        node = utils_node.get_linked_single(self.inputs[socket_name]) if socket_name in self.inputs else None
+        if isinstance(node, hclPhysicsNodeBase) and not node.mute:
+            snapshot = node.async_snapshot()
+            if snapshot is not None:
+                return AsyncInput(node_name=node.name, node_type=type(node), snapshot=snapshot)
+        return AsyncInput(value=utils_node.get_socket_input_single(self, socket_name))
+
+    def evaluate_async_part(self):
+        '''Result of async_compute, precomputed by the scheduler if available, otherwise computed in place.'''
+        result = utils_scheduler.get_precomputed(self)
+        if result is not None:
+            return type(self).async_copy(result)
+        snapshot = self.async_snapshot()
+        if snapshot is None:
+            return None
+        return type(self).async_compute(snapshot)
+
     def update(self):
         pass
 
@@ -217,6 +284,65 @@ class hclSingletonNodeBase:
         return True
         
 
+def _rebuild_vis_meshes(output_node: bpy.types.Node):
+    clear_vis_meshes()
+    if output_node.id_data.vis_meshes_collection is not None:
+        remove_collection(output_node.id_data.vis_meshes_collection)
+    meshes, rtn = output_node.backward_vis_mesh()
+    if meshes is not None and len(meshes) != 0:
+        coll = new_collection('VIS_MESHES')
+        move_object_to_collection(meshes, coll)
+        output_node.id_data.vis_meshes_collection = coll
+    return meshes, rtn
+
+def schedule_output_update(output_node: bpy.types.Node):
+    '''
+    Debounce edits of the graph feeding output_node. Snapshots of the raw bpy data of the nodes are taken on the main thread,
+    their async_compute, including the upstream nodes they read, runs on the worker and the vis meshes are rebuilt
+    on the main thread with those results.
+    '''
+    tree_name = output_node.id_data.name
+    output_name = output_node.name
+
+    def prepare():
+        tree = bpy.data.node_groups.get(tree_name)
+        if tree is None:
+            return {}
+        snapshots = {}
+        for node in tree.nodes:
+            # No check_valid here, it evaluates upstream nodes. Snapshots of unusable nodes are None or fail on the worker
+            if not isinstance(node, hclPhysicsNodeBase) or node.mute:
+                continue
+            snapshot = node.async_snapshot()
+            if snapshot is not None:
+                snapshots[node.name] = (type(node).async_compute, snapshot)
+        return snapshots
+
+    def compute(snapshots, token):
+        for node_name, (compute_func, snapshot) in snapshots.items():
+            token.check()
+            if node_name in token.computed:
+                continue
+            try:
+                token.computed[node_name] = compute_func(snapshot, token)
+            except utils_scheduler.EvaluationCancelled:
+                raise
+            except Exception as e:
+                print(f"Physics editor evaluation of {node_name} failed: {e}")
+        return token.computed
+
+    def apply(results):
+        tree = bpy.data.node_groups.get(tree_name)
+        if tree is None or output_name not in tree.nodes:
+            return
+        with utils_scheduler.precomputed_scope(tree_name, results):
+            tree.nodes[output_name].rebuild_vis()
+
+    utils_scheduler.scheduler.request((tree_name, output_name), prepare, compute, apply)
+
+def cancel_output_update(output_node: bpy.types.Node):
+    utils_scheduler.scheduler.cancel((output_node.id_data.name, output_node.name))
+
 class ViewerOutputNodeBase(hclPhysicsNodeBase, bpy.types.Node):
     '''View Physics Data, doesn't output anything'''
 
@@ -233,18 +359,15 @@ class ViewerOutputNodeBase(hclPhysicsNodeBase, bpy.types.Node):
         return super().check_valid()
 
     def free(self):
+        cancel_output_update(self)
         clear_vis_meshes()
         super().free()
 
     def update(self):
-        clear_vis_meshes()
-        if self.id_data.vis_meshes_collection is not None:
-            remove_collection(self.id_data.vis_meshes_collection)
-        meshes, _ = self.backward_vis_mesh()
-        if meshes is not None and len(meshes) != 0:
-            coll = new_collection('VIS_MESHES')
-            move_object_to_collection(meshes, coll)
-            self.id_data.vis_meshes_collection = coll
+        schedule_output_update(self)
+
+    def rebuild_vis(self):
+        _rebuild_vis_meshes(self)
         #print(meshes)
 
 
@@ -275,18 +398,16 @@ class OutputNodeBase(hclPhysicsNodeBase, bpy.types.Node):
         return utils_node.NodeValidityReturn(False, self, "Invalid Physics Data linked")
 
     def free(self):
+        cancel_output_update(self)
         clear_vis_meshes()
         super().free()
 
     def update(self):
-        clear_vis_meshes()
-        if self.id_data.vis_meshes_collection is not None:
-            remove_collection(self.id_data.vis_meshes_collection)
-        meshes, rtn = self.backward_vis_mesh()
+        schedule_output_update(self)
+
+    def rebuild_vis(self):
+        meshes, rtn = _rebuild_vis_meshes(self)
         if meshes is not None and len(meshes) != 0:
-            coll = new_collection('VIS_MESHES')
-            move_object_to_collection(meshes, coll)
-            self.id_data.vis_meshes_collection = coll
             self.error_msg = ""
         else:
             self.error_msg = rtn.what()
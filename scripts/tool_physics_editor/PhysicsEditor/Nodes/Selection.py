@@ -1,10 +1,11 @@
 import bpy
-import bmesh
+import numpy as np
 from bpy.types import Node, NodeLink, NodeSocket
 
 import PhysicsEditor.Nodes.NodeBase as NodeBase
 
 import PhysicsEditor.Utilities.utils_node as utils_node
+import PhysicsEditor.Utilities.utils_attribute as utils_attribute
 
 def get_attr_enum_items(self, context):
     if self.inputs['Mesh'].is_linked:
@@ -28,6 +29,15 @@ valid_operators = {
     'BOOLEAN': ('Is','Not')
 }
 
+_float_operators = {
+    'Equal to': np.equal,
+    'Higher or equal to': np.greater_equal,
+    'Lower or equal to': np.less_equal,
+    'Higher than': np.greater,
+    'Lower than': np.less,
+    'Not equal to': np.not_equal,
+}
+
 def get_operator_enum_items(self, context):
     if self.type_enum_prop in valid_operators.keys():
         return zip(valid_operators[self.type_enum_prop], valid_operators[self.type_enum_prop], valid_operators[self.type_enum_prop])
@@ -83,79 +93,39 @@ class MeshAttrSelectionNode(NodeBase.hclPhysicsNodeBase, Node):
             return [], self.domain_enum_prop
         
         if socket_name == 'Indices On Domain':
-            mesh = utils_node.get_socket_input_single(self,'Mesh')
-            if self.attr_enum_prop not in mesh.data.attributes and self.type_enum_prop == 'FLOAT' and self.domain_enum_prop == 'POINT':
-                vg = mesh.vertex_groups[self.attr_enum_prop]
-                if self.operator_enum_prop == 'Higher than':
-                    return [i for i in range(len(mesh.data.vertices)) if vg.weight(i) > self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Lower than':
-                    return [i for i in range(len(mesh.data.vertices)) if vg.weight(i) < self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Equal to':
-                    return [i for i in range(len(mesh.data.vertices)) if vg.weight(i) == self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Not equal to':
-                    return [i for i in range(len(mesh.data.vertices)) if vg.weight(i) != self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Higher or equal to':
-                    return [i for i in range(len(mesh.data.vertices)) if vg.weight(i) >= self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Lower or equal to':
-                    return [i for i in range(len(mesh.data.vertices)) if vg.weight(i) <= self.float_operand_prop], self.domain_enum_prop
-                
-            attr = mesh.data.attributes[self.attr_enum_prop]
-            bm = bmesh.new()
-            bm.from_mesh(mesh.data)
-            if self.type_enum_prop == 'FLOAT':
-                if self.domain_enum_prop == 'POINT':
-                    layer = bm.verts.layers.float.get(attr.name)
-                elif self.domain_enum_prop == 'EDGE':
-                    layer = bm.edges.layers.float.get(attr.name)
-                elif self.domain_enum_prop == 'FACE':
-                    layer = bm.faces.layers.float.get(attr.name)
-
-                #print(bm.verts.layers.float)
-                if self.operator_enum_prop == 'Higher than':
-                    if self.domain_enum_prop == 'POINT':
-                        return [v.index for v in bm.verts if v[layer] > self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'EDGE':
-                        return [e.index for e in bm.edges if e[layer] > self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'FACE':
-                        return [f.index for f in bm.faces if f[layer] > self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Lower than':
-                    if self.domain_enum_prop == 'POINT':
-                        return [v.index for v in bm.verts if v[layer] < self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'EDGE':
-                        return [e.index for e in bm.edges if e[layer] < self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'FACE':
-                        return [f.index for f in bm.faces if f[layer] < self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Equal to':
-                    if self.domain_enum_prop == 'POINT':
-                        return [v.index for v in bm.verts if v[layer] == self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'EDGE':
-                        return [e.index for e in bm.edges if e[layer] == self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'FACE':
-                        return [f.index for f in bm.faces if f[layer] == self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Not equal to':
-                    if self.domain_enum_prop == 'POINT':
-                        return [v.index for v in bm.verts if v[layer] != self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'EDGE':
-                        return [e.index for e in bm.edges if e[layer] != self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'FACE':
-                        return [f.index for f in bm.faces if f[layer] != self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Higher or equal to':
-                    if self.domain_enum_prop == 'POINT':
-                        return [v.index for v in bm.verts if v[layer] >= self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'EDGE':
-                        return [e.index for e in bm.edges if e[layer] >= self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'FACE':
-                        return [f.index for f in bm.faces if f[layer] >= self.float_operand_prop], self.domain_enum_prop
-                elif self.operator_enum_prop == 'Lower or equal to':
-                    if self.domain_enum_prop == 'POINT':
-                        return [v.index for v in bm.verts if v[layer] <= self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'EDGE':
-                        return [e.index for e in bm.edges if e[layer] <= self.float_operand_prop], self.domain_enum_prop
-                    elif self.domain_enum_prop == 'FACE':
-                        return [f.index for f in bm.faces if f[layer] <= self.float_operand_prop], self.domain_enum_prop
-                    
-        
+            indices = self.evaluate_async_part()
+            if indices is not None:
+                return indices, self.domain_enum_prop
+
         return [], self.domain_enum_prop
+
+    def async_snapshot(self):
+        if self.type_enum_prop != 'FLOAT' or self.operator_enum_prop not in _float_operators:
+            return None
+        mesh = utils_node.get_socket_input_single(self,'Mesh')
+        if mesh is None:
+            return None
+
+        if self.attr_enum_prop not in mesh.data.attributes and self.domain_enum_prop == 'POINT':
+            values = utils_attribute.GetVertexGroupWeights(mesh, self.attr_enum_prop)
+        else:
+            attr = mesh.data.attributes.get(self.attr_enum_prop)
+            if attr is None or attr.data_type != 'FLOAT':
+                return None
+            values = utils_attribute.GetFloatAttr(mesh.data, self.attr_enum_prop)
+        if values is None:
+            return None
+
+        return values, self.operator_enum_prop, np.float32(self.float_operand_prop), self.domain_enum_prop
+
+    @staticmethod
+    def async_compute(snapshot, token = None):
+        values, operator, operand, domain = snapshot
+        return np.flatnonzero(_float_operators[operator](values, operand)).tolist()
+
+    @staticmethod
+    def async_output(result, snapshot):
+        return result, snapshot[3]
     
     def draw_buttons(self, context, layout):
         super().draw_buttons(context, layout)
@@ -211,7 +181,16 @@ class ConcatenateIndicesNode(NodeBase.hclPhysicsNodeBase, Node):
             return [], None
         
         if socket_name == 'Indices On Domain':
-            indices1 = utils_node.get_socket_input_single(self,'Indices 1')[0]
-            indices2 = utils_node.get_socket_input_single(self,'Indices 2')[0]
-            return indices1 + indices2, utils_node.get_socket_input_single(self,'Indices 1')[1]
-        return [], 'POINT'
\ No newline at end of file
+            return self.evaluate_async_part()
+        return [], 'POINT'
+
+    def async_snapshot(self):
+        if not self.inputs['Indices 1'].is_linked or not self.inputs['Indices 2'].is_linked:
+            return None
+        return self.async_input_snapshot('Indices 1'), self.async_input_snapshot('Indices 2')
+
+    @staticmethod
+    def async_compute(snapshot, token = None):
+        indices_input1 = NodeBase.resolve_async_input(snapshot[0], token)
+        indices_input2 = NodeBase.resolve_async_input(snapshot[1], token)
+        return list(indices_input1[0]) + list(indices_input2[0]), indices_input1[1]
\ No newline at end of file
@@ -1,4 +1,5 @@
 import bpy
+import numpy as np
 from bpy.types import Context, Node, NodeSocket, UILayout
 
 import PhysicsEditor.Utilities.utils_node as utils_node
@@ -187,26 +188,48 @@ class hclParticlesFromMeshNode(NodeBase.hclPhysicsNodeBase, Node):
             return None
         
         if socket_name == 'Particles':
-            mesh = utils_node.get_socket_input_single(self,'Mesh')
-            v_ids = [v.index for v in mesh.data.vertices]
-
-            if self.inputs['Fixed Particle Indices'].is_linked:
-                fixed_particle_indices_input = utils_node.get_socket_input_single(self,'Fixed Particle Indices')
-                f_ids = fixed_particle_indices_input[0]
-            else:
-                f_ids = []
-
-            output = {i: {
-                'position': tuple(mesh.data.vertices[i].co),
-                'normal': tuple(mesh.data.vertices[i].normal),
-                'mass': self.mass_prop,
-                'radius': self.radius_prop,
-                'friction': self.friction_prop,
-                'is_fixed': i in f_ids,
-            } for i in v_ids}
+            output = self.evaluate_async_part()
             #print(output)
             return {'particles':output, 'pivot':utils_node.get_socket_input_single(self,'Bind To Bone')['Bone Index'], 'constraints': []}
         return None
+
+    def async_snapshot(self):
+        mesh = utils_node.get_socket_input_single(self,'Mesh')
+        if mesh is None:
+            return None
+        num_verts = len(mesh.data.vertices)
+        positions = np.empty(num_verts * 3, dtype=np.float32)
+        normals = np.empty(num_verts * 3, dtype=np.float32)
+        mesh.data.vertices.foreach_get('co', positions)
+        mesh.data.vertices.foreach_get('normal', normals)
+
+        # The selection feeding the fixed indices is evaluated with async_compute
+        fixed_input = self.async_input_snapshot('Fixed Particle Indices') if self.inputs['Fixed Particle Indices'].is_linked else None
+
+        return positions.reshape(-1, 3), normals.reshape(-1, 3), fixed_input, self.mass_prop, self.radius_prop, self.friction_prop
+
+    @staticmethod
+    def async_compute(snapshot, token = None):
+        positions, normals, fixed_input, mass, radius, friction = snapshot
+        fixed_particle_indices_input = NodeBase.resolve_async_input(fixed_input, token) if fixed_input is not None else None
+        f_ids = fixed_particle_indices_input[0] if fixed_particle_indices_input is not None else []
+        is_fixed = np.zeros(len(positions), dtype=bool)
+        f_ids = np.asarray(f_ids, dtype=np.int64).ravel()
+        is_fixed[f_ids[(f_ids >= 0) & (f_ids < len(positions))]] = True
+
+        return {i: {
+            'position': tuple(co),
+            'normal': tuple(n),
+            'mass': mass,
+            'radius': radius,
+            'friction': friction,
+            'is_fixed': fixed,
+        } for i, (co, n, fixed) in enumerate(zip(positions.tolist(), normals.tolist(), is_fixed.tolist()))}
+
+    @staticmethod
+    def async_copy(result):
+        # SetParticleAttr edits the particle entries in place
+        return {i: p.copy() for i, p in result.items()}
         
     def draw_buttons(self, context, layout):
         super().draw_buttons(context, layout)
@@ -240,6 +263,7 @@ class hclParticlesFromMeshNode(NodeBase.hclPhysicsNodeBase, Node):
         else:
             f_ids = []
 
+        f_ids = set(f_ids)
         radius = [self.radius_prop if i not in f_ids else 0 for i in v_ids]
 
         return utils_prefabs.VisVertsFromMesh(mesh, v_ids, radius)
@@ -292,20 +316,36 @@ class hclLinksFromMeshNode(NodeBase.hclPhysicsNodeBase, Node):
             return None
         
         if socket_name == 'Links':
-            mesh = utils_node.get_socket_input_single(self,'Mesh')
-            if self.inputs['Edge Indices (Default: All)'].is_linked:
-                edge_indices_input = utils_node.get_socket_input_single(self,'Edge Indices (Default: All)')
-                e_ids = edge_indices_input[0]
-            else:
-                e_ids = [i for i in range(len(mesh.data.edges))]
-            output = {i: {
-                'stiffness': self.stiffness_prop,
-                'particleA': mesh.data.edges[i].vertices[0],
-                'particleB': mesh.data.edges[i].vertices[1],
-            } for i in e_ids}
+            output = self.evaluate_async_part()
             return {'links':output}
         return None
 
+    def async_snapshot(self):
+        mesh = utils_node.get_socket_input_single(self,'Mesh')
+        if mesh is None:
+            return None
+        edge_verts = np.empty(len(mesh.data.edges) * 2, dtype=np.int32)
+        mesh.data.edges.foreach_get('vertices', edge_verts)
+
+        edge_input = self.async_input_snapshot('Edge Indices (Default: All)') if self.inputs['Edge Indices (Default: All)'].is_linked else None
+
+        return edge_verts.reshape(-1, 2), edge_input, self.stiffness_prop
+
+    @staticmethod
+    def async_compute(snapshot, token = None):
+        edge_verts, edge_input, stiffness = snapshot
+        edge_indices_input = NodeBase.resolve_async_input(edge_input, token) if edge_input is not None else None
+        e_ids = edge_indices_input[0] if edge_indices_input is not None else None
+        if e_ids is None:
+            e_ids = range(len(edge_verts))
+        e_ids = [int(i) for i in e_ids]
+        pairs = edge_verts[np.asarray(e_ids, dtype=np.int64)].tolist() if len(e_ids) else []
+        return {i: {
+            'stiffness': stiffness,
+            'particleA': a,
+            'particleB': b,
+        } for i, (a, b) in zip(e_ids, pairs)}
+
     def draw_buttons(self, context, layout):
         super().draw_buttons(context, layout)
         layout.label(text="Link Stiffness:")
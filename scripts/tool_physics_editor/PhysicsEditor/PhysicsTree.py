@@ -17,6 +17,7 @@ import PhysicsEditor.Nodes.PhysicsData as PhysicsData
 import PhysicsEditor.Nodes.Drivers as Drivers
 
 import PhysicsEditor.Utilities.utils_node as utils_node
+import PhysicsEditor.Utilities.utils_scheduler as utils_scheduler
 
 from submodule_version import compare_versions
 
@@ -158,6 +159,7 @@ def register():
     nodeitems_utils.register_node_categories('HCL_NODES', node_categories)
 
 def unregister():
+    utils_scheduler.scheduler.shutdown()
     nodeitems_utils.unregister_node_categories('HCL_NODES')
 
     from bpy.utils import unregister_class
@@ -0,0 +1,83 @@
+import bpy
+import numpy as np
+
+def GetDomainElements(mesh: bpy.types.Mesh, domain: str):
+    if domain == 'POINT':
+        return mesh.vertices
+    elif domain == 'EDGE':
+        return mesh.edges
+    elif domain == 'FACE':
+        return mesh.polygons
+    elif domain == 'CORNER':
+        return mesh.loops
+    raise ValueError(f"Unsupported attribute domain '{domain}'")
+
+def GetSelectionMask(mesh: bpy.types.Mesh, domain: str) -> np.ndarray:
+    '''
+    Selection state of every element of the domain. Mesh must not be in edit mode, or the state is stale.
+    '''
+    elements = GetDomainElements(mesh, domain)
+    mask = np.zeros(len(elements), dtype=bool)
+    elements.foreach_get('select', mask)
+    return mask
+
+def GetFloatAttr(mesh: bpy.types.Mesh, attr_name: str) -> np.ndarray | None:
+    attr = mesh.attributes.get(attr_name)
+    if attr is None:
+        return None
+    values = np.empty(len(attr.data), dtype=np.float32)
+    attr.data.foreach_get('value', values)
+    return values
+
+def GetVertexGroupWeights(obj: bpy.types.Object, group_name: str) -> np.ndarray | None:
+    '''
+    Weight of every vertex in the vertex group, 0 where unassigned. bpy has no foreach_get for group memberships,
+    the (vertex, weight) pairs are read in one flat pass and scattered with numpy.
+    '''
+    vg = obj.vertex_groups.get(group_name)
+    if vg is None:
+        return None
+    vg_index = vg.index
+    mesh = obj.data
+    values = np.zeros(len(mesh.vertices), dtype=np.float32)
+    entries = np.fromiter((x for v in mesh.vertices for g in v.groups if g.group == vg_index for x in (v.index, g.weight)), dtype=np.float64)
+    if len(entries) != 0:
+        entries = entries.reshape(-1, 2)
+        values[entries[:, 0].astype(np.int64)] = entries[:, 1]
+    return values
+
+def SetFloatAttr(mesh: bpy.types.Mesh, attr_name: str, attr_domain: str, element_ids = None, attr_values = None, default_value: float = None, create_if_not_exist = True) -> bool:
+    '''
+    Write a FLOAT attribute with a single foreach_set.
+        element_ids: indices of the elements to write, None for all elements
+        attr_values: one value per element id, or a scalar for all of them
+        default_value: if given, elements not in element_ids are reset to it, otherwise they keep their value
+    '''
+    attr = mesh.attributes.get(attr_name)
+    if attr is None:
+        if not create_if_not_exist:
+            return False
+        attr = mesh.attributes.new(attr_name, 'FLOAT', attr_domain)
+    elif attr.data_type != 'FLOAT' or attr.domain != attr_domain:
+        return False
+
+    num_elements = len(attr.data)
+    if default_value is not None:
+        values = np.full(num_elements, default_value, dtype=np.float32)
+    else:
+        values = np.empty(num_elements, dtype=np.float32)
+        attr.data.foreach_get('value', values)
+
+    if attr_values is not None:
+        if element_ids is None:
+            values[:] = attr_values
+        else:
+            values[np.asarray(element_ids, dtype=np.int64)] = attr_values
+
+    attr.data.foreach_set('value', values)
+    mesh.update()
+    return True
+
+def SetFloatAttrOnSelection(mesh: bpy.types.Mesh, attr_name: str, attr_domain: str, value: float, create_if_not_exist = True) -> bool:
+    mask = GetSelectionMask(mesh, attr_domain)
+    return SetFloatAttr(mesh, attr_name, attr_domain, np.flatnonzero(mask), value, create_if_not_exist=create_if_not_exist)
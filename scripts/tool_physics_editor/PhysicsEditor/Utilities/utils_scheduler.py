@@ -0,0 +1,150 @@
+import time
+import threading
+from contextlib import contextmanager
+
+import bpy
+
+class EvaluationCancelled(Exception):
+    pass
+
+class EvaluationToken:
+    '''Handed to worker computations, cancelled as soon as a newer request for the same key comes in.'''
+    def __init__(self):
+        self._cancelled = threading.Event()
+        # Results computed so far by the job, so inputs shared by several computations are computed once
+        self.computed: dict = {}
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise EvaluationCancelled()
+
+class _EvaluationJob:
+    def __init__(self, key, prepare, compute, apply, deadline: float):
+        self.key = key
+        self.prepare = prepare
+        self.compute = compute
+        self.apply = apply
+        self.deadline = deadline
+        self.token = EvaluationToken()
+        self.future = None
+
+class EvaluationScheduler:
+    '''
+    Debounced three stage evaluation:
+        prepare() -> snapshot                   main thread, reads bpy data into plain python/numpy
+        compute(snapshot, token) -> result      worker thread, must not touch bpy
+        apply(result)                           main thread through bpy.app.timers, does the bpy writes
+    A new request for the same key restarts the debounce and cancels the pending or running job.
+    '''
+    poll_interval = 0.05
+
+    def __init__(self, debounce: float = 0.25, max_workers: int = 1):
+        self.debounce = debounce
+        self.max_workers = max_workers
+        self._executor = None
+        self._jobs: dict = {}
+        self._timer_registered = False
+
+    def request(self, key, prepare, compute, apply, debounce: float | None = None):
+        self.cancel(key)
+        delay = self.debounce if debounce is None else debounce
+        self._jobs[key] = _EvaluationJob(key, prepare, compute, apply, time.monotonic() + delay)
+        if not self._timer_registered:
+            bpy.app.timers.register(self._tick, first_interval=min(delay, self.poll_interval), persistent=True)
+            self._timer_registered = True
+
+    def cancel(self, key = None):
+        keys = list(self._jobs.keys()) if key is None else [key]
+        for k in keys:
+            job = self._jobs.pop(k, None)
+            if job is not None:
+                job.token.cancel()
+
+    def is_pending(self, key) -> bool:
+        return key in self._jobs
+
+    def shutdown(self):
+        self.cancel()
+        if self._timer_registered and bpy.app.timers.is_registered(self._tick):
+            bpy.app.timers.unregister(self._tick)
+        self._timer_registered = False
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> 'ThreadPoolExecutor':
+        if self._executor is None:
+            # Imported with the first evaluation, registering the node tree doesn't need the pool
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hclPhysicsEval')
+        return self._executor
+
+    @staticmethod
+    def _run_compute(job: _EvaluationJob, snapshot):
+        job.token.check()
+        return job.compute(snapshot, job.token)
+
+    def _tick(self):
+        now = time.monotonic()
+        for key, job in list(self._jobs.items()):
+            if job.future is None:
+                if now < job.deadline:
+                    continue
+                try:
+                    snapshot = job.prepare()
+                except Exception as e:
+                    print(f"Physics editor evaluation of {key} failed to prepare: {e}")
+                    self._jobs.pop(key, None)
+                    continue
+                job.future = self._get_executor().submit(self._run_compute, job, snapshot)
+                continue
+
+            if not job.future.done():
+                continue
+
+            self._jobs.pop(key, None)
+            if job.token.cancelled:
+                continue
+            try:
+                result = job.future.result()
+            except EvaluationCancelled:
+                continue
+            except Exception as e:
+                print(f"Physics editor evaluation of {key} failed: {e}")
+                continue
+            try:
+                job.apply(result)
+            except Exception as e:
+                print(f"Physics editor evaluation of {key} failed to apply: {e}")
+
+        if len(self._jobs) == 0:
+            self._timer_registered = False
+            return None
+        return self.poll_interval
+
+scheduler = EvaluationScheduler()
+
+# Results computed by the worker, only visible while the matching apply stage runs
+_precomputed: dict[tuple[str, str], object] = {}
+
+@contextmanager
+def precomputed_scope(tree_name: str, results: dict):
+    for node_name, result in results.items():
+        _precomputed[(tree_name, node_name)] = result
+    try:
+        yield
+    finally:
+        for node_name in results.keys():
+            _precomputed.pop((tree_name, node_name), None)
+
+def get_precomputed(node: bpy.types.Node):
+    if len(_precomputed) == 0:
+        return None
+    return _precomputed.get((node.id_data.name, node.name), None)
@@ -1,6 +1,9 @@
 import bpy
 import os
 import sys
+import time
+
+_import_start = time.perf_counter()
 
 dir = os.path.dirname(os.path.realpath(__file__))
 if dir not in sys.path:
@@ -15,6 +18,8 @@ import PhysicsEditor.PhysicsTree as PhysicsTree
 
 import PhysicsEditor.ActivateVisOperator as ActivateVisOperator
 
+_import_seconds = time.perf_counter() - _import_start
+
 bl_info = {
 	"name": "Starfield Havok Physics Editor",
 	"author": "SesamePaste",
@@ -29,6 +34,7 @@ bl_info = {
 __plugin_version__ = Version(bl_info['version'])
 
 def register():
+	register_start = time.perf_counter()
 	bpy.types.Scene.sf_physics_editor_version = bpy.props.StringProperty(
 		name="__sf_physics_editor_version__",
 		default = f"{bl_info['version'][0]}.{bl_info['version'][1]}.{bl_info['version'][2]}",
@@ -36,6 +42,7 @@ def register():
 	AttrOperator.register()
 	PhysicsTree.register()
 	ActivateVisOperator.register()
+	print(f"Starfield Havok Physics Editor registered in {(time.perf_counter() - register_start) * 1000:.1f} ms, module imports took {_import_seconds * 1000:.1f} ms")
 
 def unregister():
 	ActivateVisOperator.unregister()
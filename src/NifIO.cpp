@@ -1584,7 +1584,31 @@ bool nif::ni_template::NiArmatureTemplate::ToNif(NifIO& nif)
 		}
 	}
 
-	if (!this->physics_data.empty()) {
+	if (!this->physics_binary_path.empty()) {
+		std::ifstream physics_file(this->physics_binary_path, std::ios::binary);
+		if (!physics_file.is_open()) {
+			std::cout << "Failed to open composed physics data." << std::endl;
+			return false;
+		}
+		std::string physics_bytes((std::istreambuf_iterator<char>(physics_file)), std::istreambuf_iterator<char>());
+		physics_file.close();
+
+		auto bscloth = dynamic_cast<nif::BSClothExtraData*>(nif.AddBlock(nif::NiRTTI::BSClothExtraData));
+
+		root_node->AddExtraData(nif.block_manager.FindBlock(bscloth));
+
+		// Write the composed blob as is, prefixed by its length like BSClothExtraData::Serialize does
+		bscloth->_decode_binary = false;
+		bscloth->data_length = physics_bytes.size();
+		bscloth->binary_bytes = uint32_t(bscloth->data_length + 4);
+		bscloth->binary_data = new uint8_t[bscloth->binary_bytes];
+		size_t offset = 0;
+		utils::writeToBuffer<uint32_t>(bscloth->binary_data, offset, uint32_t(bscloth->data_length));
+		std::memcpy(bscloth->binary_data + offset, physics_bytes.data(), physics_bytes.size());
+
+		root_node->flags |= 1 << 29;
+	}
+	else if (!this->physics_data.empty()) {
 		auto bscloth = dynamic_cast<nif::BSClothExtraData*>(nif.AddBlock(nif::NiRTTI::BSClothExtraData));
 
 		root_node->AddExtraData(nif.block_manager.FindBlock(bscloth));